@@ -6,19 +6,29 @@ Implements:
 2. Presence awareness (active users, cursors)
 3. Real-time notifications
 """
-import json
 import asyncio
 import logging
 from typing import Dict, Any
+
+import orjson
+from channels.consumer import get_handler_name
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 from asgiref.sync import sync_to_async
+from pydantic import ValidationError
 
-from apps.core.utils import IdempotencyService, get_redis_client
+from apps.core.cache import AsyncTTLCache
+from apps.core.utils import IdempotencyService, RateLimitService, get_redis_client
 from apps.core.exceptions import PermissionDeniedError
 from apps.workspaces.permissions import has_document_permission
+from .schemas import (
+    parse_incoming_message, parse_binary_message, describe_validation_error,
+    encode_operation_frame, encode_sync_frame, encode_control_frame,
+    Frame, CursorData, AwarenessData, TypingData
+)
 from .services import (
     CollaborationService, PresenceService, 
     CRDTService, OperationProcessor
@@ -26,8 +36,172 @@ from .services import (
 
 logger = logging.getLogger(__name__)
 
+# Connect-time lookups shared by every connection to a document in this
+# process; busted on user.joined/user.left and operation broadcasts.
+active_users_cache = AsyncTTLCache(ttl=1.0)
+state_vector_cache = AsyncTTLCache(ttl=1.0)
+
+
+def combine_events(events: list) -> Dict:
+    """
+    Wrap several group events into one message for a single group_send.
+    
+    A lone event is sent as-is; consumers unpack 'combined.broadcast' in
+    combined_broadcast.
+    """
+    if len(events) == 1:
+        return events[0]
+    return {'type': 'combined.broadcast', 'events': events}
+
+
+class OperationBatcher:
+    """
+    Coalesces CRDT operations for one document within this process.
+    
+    Operations submitted within a short window are processed with a single
+    OperationProcessor.process_batch call and fanned out with a single
+    group_send, instead of one threadpool hop and one broadcast each.
+    """
+    
+    BATCH_WINDOW = 0.01  # seconds
+    MAX_BATCH_SIZE = 100
+    
+    _batchers: Dict[str, 'OperationBatcher'] = {}
+    
+    def __init__(self, document_id: str, document_group: str, channel_layer):
+        self.document_id = document_id
+        self.document_group = document_group
+        self.channel_layer = channel_layer
+        self.queue = asyncio.Queue()
+        self.task = None
+    
+    @classmethod
+    def submit(cls, document_id: str, document_group: str, channel_layer, operation: Dict) -> asyncio.Future:
+        """
+        Queue an operation for the document's batcher.
+        
+        Returns a future resolved with the operation's process_operation-style
+        result once the batch containing it has been committed.
+        """
+        batcher = cls._batchers.get(document_group)
+        if batcher is None:
+            batcher = cls(document_id, document_group, channel_layer)
+            cls._batchers[document_group] = batcher
+            batcher.task = asyncio.ensure_future(batcher._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        batcher.queue.put_nowait((operation, future))
+        return future
+    
+    async def _run(self):
+        """
+        Drain the queue in windows until it is empty, then retire.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.queue.empty():
+                batch = [self.queue.get_nowait()]
+                deadline = loop.time() + self.BATCH_WINDOW
+                
+                while len(batch) < self.MAX_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                await self._flush(batch)
+        finally:
+            if self._batchers.get(self.document_group) is self:
+                del self._batchers[self.document_group]
+    
+    async def _flush(self, batch):
+        """
+        Persist a batch, resolve its futures, then broadcast accepted operations.
+        """
+        operations = [operation for operation, _ in batch]
+        
+        try:
+            results = await sync_to_async(OperationProcessor.process_batch)(
+                document_id=self.document_id,
+                operations=[
+                    {
+                        'user_id': operation['user_id'],
+                        'operation_data': operation['operation_data'],
+                        'client_version': operation['client_version'],
+                        'message_id': operation['message_id'],
+                    }
+                    for operation in operations
+                ]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # The batch is committed; senders get their results even if the
+        # broadcast below fails
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        
+        broadcast = [
+            {
+                'operation': result['operation'],
+                'update': result['update'],
+                'version': result['version'],
+                'user_id': operation['user_id'],
+                'exclude_channel': operation['channel_name'],  # Don't send back to sender
+            }
+            for operation, result in zip(operations, results)
+            if result['success']
+        ]
+        
+        if not broadcast:
+            return
+        
+        # Cursor positions sent with operations ride in the same
+        # group_send as the operations themselves.
+        events = [{'type': 'operation.broadcast', 'ops': broadcast}]
+        events.extend(
+            {
+                'type': 'cursor.update',
+                'user_id': operation['user_id'],
+                'cursor': operation['cursor'],
+                'exclude_channel': operation['channel_name'],
+            }
+            for operation, result in zip(operations, results)
+            if result['success'] and operation.get('cursor') is not None
+        )
+        
+        try:
+            await self.channel_layer.group_send(
+                self.document_group,
+                combine_events(events)
+            )
+        except Exception:
+            logger.exception(f"Failed to broadcast operations for document {self.document_id}")
+
 
-class DocumentConsumer(AsyncWebsocketConsumer):
+class JSONWebsocketConsumer(AsyncWebsocketConsumer):
+    """
+    Base consumer that encodes outgoing frames with orjson.
+    
+    Frames are still sent as text so existing clients keep parsing them
+    with JSON.parse.
+    """
+    
+    async def send_json(self, content):
+        """
+        Send JSON message to client.
+        """
+        await self.send(text_data=orjson.dumps(content).decode())
+
+
+class DocumentConsumer(JSONWebsocketConsumer):
     """
     WebSocket consumer for real-time document collaboration.
     
@@ -38,20 +212,56 @@ class DocumentConsumer(AsyncWebsocketConsumer):
     - Block-level locking
     """
     
+    # Sharded Redis Pub/Sub layer; see CHANNEL_LAYERS in settings
+    channel_layer_alias = 'collaboration'
+    
+    # Clients offering this subprotocol exchange CRDT updates as binary
+    # frames; see the binary frame helpers in schemas.py for the layout.
+    BINARY_SUBPROTOCOL = 'crdt.binary'
+    # Additionally carries presence/control frames as msgpack instead of JSON
+    MSGPACK_SUBPROTOCOL = 'crdt.msgpack'
+    
+    PRESENCE_FLUSH_INTERVAL = PresenceService.CURSOR_UPDATE_THROTTLE
+    ACCESS_CACHE_TTL = 60  # seconds
+    USER_DATA_CACHE_TTL = 300  # seconds
+    
+    # Message type -> handler method name, resolved per message with getattr
+    # so no dict of bound methods is built on the hot path.
+    _HANDLER_NAMES = {
+        'operation': 'handle_operation',
+        'cursor': 'handle_cursor_update',
+        'awareness': 'handle_awareness_update',
+        'block.lock': 'handle_block_lock',
+        'block.unlock': 'handle_block_unlock',
+        'typing.start': 'handle_typing_start',
+        'typing.stop': 'handle_typing_stop',
+        'ping': 'handle_ping',
+        'sync': 'handle_sync',
+    }
+    
+    # Per-connection state defaults; instances only store what they set
+    document_id = None
+    document_group = None
+    user = None
+    user_id_str = None
+    session_id = None
+    user_color = None
+    binary_frames = False
+    msgpack_frames = False
+    _presence_flush = None
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.document_id = None
-        self.document_group = None
-        self.user = None
-        self.session_id = None
-        self.user_color = None
+        self._background_tasks = set()
+        self._pending_presence = {}
     
     async def connect(self):
         """
         Handle WebSocket connection.
         """
         self.user = self.scope['user']
-        self.document_id = self.scope['url_route']['kwargs']['document_id']
+        # URL kwargs carry a UUID; stringify once for keys, groups and events
+        self.document_id = str(self.scope['url_route']['kwargs']['document_id'])
         self.document_group = f'document_{self.document_id}'
         
         # Authenticate user
@@ -60,6 +270,8 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             await self.close(code=4001)
             return
         
+        self.user_id_str = str(self.user.id)
+        
         # Check document access permissions
         has_access = await self._check_document_access()
         if not has_access:
@@ -68,7 +280,15 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             return
         
         # Accept connection
-        await self.accept()
+        subprotocols = self.scope.get('subprotocols', ())
+        if self.MSGPACK_SUBPROTOCOL in subprotocols:
+            self.binary_frames = self.msgpack_frames = True
+            await self.accept(subprotocol=self.MSGPACK_SUBPROTOCOL)
+        elif self.BINARY_SUBPROTOCOL in subprotocols:
+            self.binary_frames = True
+            await self.accept(subprotocol=self.BINARY_SUBPROTOCOL)
+        else:
+            await self.accept()
         
         # Join document room
         await self.channel_layer.group_add(
@@ -87,8 +307,12 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             'data': {
                 'session_id': self.session_id,
                 'user_color': self.user_color,
-                'document_state': await self._get_document_state(),
-                'active_users': await self._get_active_users(),
+                'state_vector': await state_vector_cache.get_or_call(
+                    self.document_id, self._get_state_vector
+                ),
+                'active_users': await active_users_cache.get_or_call(
+                    self.document_id, self._get_active_users
+                ),
             }
         })
         
@@ -97,7 +321,7 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             self.document_group,
             {
                 'type': 'user.joined',
-                'user_id': str(self.user.id),
+                'user_id': self.user_id_str,
                 'user_data': await self._get_user_data(),
             }
         )
@@ -108,7 +332,11 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         """
         Handle WebSocket disconnection.
         """
-        if self.document_group and self.user:
+        if self._presence_flush is not None:
+            self._presence_flush.cancel()
+            self._presence_flush = None
+        
+        if self.document_group and self.user_id_str:
             # Remove from group
             await self.channel_layer.group_discard(
                 self.document_group,
@@ -124,40 +352,51 @@ class DocumentConsumer(AsyncWebsocketConsumer):
                 self.document_group,
                 {
                     'type': 'user.left',
-                    'user_id': str(self.user.id),
+                    'user_id': self.user_id_str,
                 }
             )
             
             logger.info(f"User {self.user.id} disconnected from document {self.document_id}")
     
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Handle incoming WebSocket messages.
+        
+        Binary frames carry a raw CRDT operation; text frames are JSON.
         """
+        # Shed floods before parsing or the idempotency round-trip
+        if not await RateLimitService.ahit(f"msg:{self.user_id_str}", settings.WS_RATE_LIMIT_MESSAGES):
+            logger.warning(f"Message rate limit exceeded for user {self.user_id_str}")
+            await self.close(code=4008)
+            return
+        
         try:
-            data = json.loads(text_data)
-            message_type = data.get('type')
-            message_id = data.get('id')
-            payload = data.get('data', {})
+            if bytes_data is not None:
+                message = parse_binary_message(bytes_data)
+            else:
+                message = parse_incoming_message(text_data)
+        except ValidationError as e:
+            error_message = describe_validation_error(e)
+            logger.warning(f"Rejected message: {error_message}")
+            await self.send_error(error_message)
+            return
+        except ValueError as e:
+            logger.warning(f"Rejected binary frame: {e}")
+            await self.send_error("Invalid binary frame")
+            return
+        
+        try:
+            message_id = message.id
             
             # Idempotency check
-            if message_id:
-                is_duplicate = await sync_to_async(IdempotencyService.is_duplicate)(message_id)
-                if is_duplicate:
-                    logger.debug(f"Duplicate message {message_id} ignored")
-                    return
-                await sync_to_async(IdempotencyService.mark_processed)(message_id)
+            if message_id and not await IdempotencyService.acheck_and_mark(message_id):
+                logger.debug(f"Duplicate message {message_id} ignored")
+                return
             
             # Route message to appropriate handler
-            handler = self._get_message_handler(message_type)
-            if handler:
-                await handler(payload, message_id)
-            else:
-                logger.warning(f"Unknown message type: {message_type}")
-                await self.send_error(f"Unknown message type: {message_type}")
+            handler = self._get_message_handler(message.type)
+            await handler(message.data, message_id)
         
-        except json.JSONDecodeError:
-            await self.send_error("Invalid JSON")
         except Exception as e:
             logger.exception(f"Error processing message: {e}")
             await self.send_error("Internal server error")
@@ -166,118 +405,90 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         """
         Map message type to handler method.
         """
-        handlers = {
-            'operation': self.handle_operation,
-            'cursor': self.handle_cursor_update,
-            'awareness': self.handle_awareness_update,
-            'block.lock': self.handle_block_lock,
-            'block.unlock': self.handle_block_unlock,
-            'typing.start': self.handle_typing_start,
-            'typing.stop': self.handle_typing_stop,
-            'ping': self.handle_ping,
-        }
-        return handlers.get(message_type)
+        return getattr(self, self._HANDLER_NAMES[message_type], None)
     
     async def handle_operation(self, payload: Dict, message_id: str):
         """
         Handle CRDT operation (Yjs/Automerge update).
         
         This is the critical path for conflict-free concurrent editing.
+        Operations are queued on the document's OperationBatcher; the
+        acknowledgment is sent once the batch containing it is committed.
         """
         operation_data = payload.get('operation')
         client_version = payload.get('version')
+        cursor = payload.get('cursor')
         
         if not operation_data:
             await self.send_error("Missing operation data")
             return
         
-        try:
-            # Process operation through CRDT service
-            result = await sync_to_async(OperationProcessor.process_operation)(
+        if cursor is not None:
+            # Broadcast with the operation; supersedes any buffered cursor
+            self._pending_presence.pop('cursor', None)
+            self._spawn(PresenceService.aupdate_cursor(
                 document_id=self.document_id,
-                user_id=str(self.user.id),
-                operation_data=operation_data,
-                client_version=client_version,
-                message_id=message_id
-            )
-            
-            if not result['success']:
-                await self.send_error(result['error'])
-                return
-            
-            # Broadcast operation to other users
-            await self.channel_layer.group_send(
-                self.document_group,
-                {
-                    'type': 'operation.broadcast',
-                    'operation': result['operation'],
-                    'version': result['version'],
-                    'user_id': str(self.user.id),
-                    'exclude_channel': self.channel_name,  # Don't send back to sender
-                }
-            )
-            
-            # Acknowledge to sender
-            await self.send_json({
-                'type': 'operation.ack',
-                'id': message_id,
-                'version': result['version'],
-            })
+                user_id=self.user_id_str,
+                cursor_data=cursor
+            ))
+        
+        future = OperationBatcher.submit(
+            document_id=self.document_id,
+            document_group=self.document_group,
+            channel_layer=self.channel_layer,
+            operation={
+                'user_id': self.user_id_str,
+                'operation_data': operation_data,
+                'client_version': client_version,
+                'message_id': message_id,
+                'channel_name': self.channel_name,
+                'cursor': cursor,
+            }
+        )
         
+        self._spawn(self._send_operation_ack(future, message_id))
+    
+    async def _send_operation_ack(self, future: asyncio.Future, message_id: str):
+        """
+        Acknowledge an operation to the sender once its batch is committed.
+        """
+        try:
+            result = await future
         except Exception as e:
             logger.exception(f"Error processing operation: {e}")
             await self.send_error("Failed to process operation")
+            return
+        
+        if not result['success']:
+            await self.send_error(result['error'])
+            return
+        
+        await self.send_json({
+            'type': 'operation.ack',
+            'id': message_id,
+            'version': result['version'],
+        })
     
     async def handle_cursor_update(self, payload: Dict, message_id: str):
         """
         Handle cursor/selection position update.
+        
+        Only the latest position matters, so it is buffered and written
+        and broadcast on the next presence flush.
         """
-        cursor_data = {
+        self._pending_presence['cursor'] = {
             'position': payload.get('position'),
             'selection': payload.get('selection'),
             'block_id': payload.get('block_id'),
         }
-        
-        # Update presence in Redis
-        await sync_to_async(PresenceService.update_cursor)(
-            document_id=self.document_id,
-            user_id=str(self.user.id),
-            cursor_data=cursor_data
-        )
-        
-        # Broadcast to other users
-        await self.channel_layer.group_send(
-            self.document_group,
-            {
-                'type': 'cursor.update',
-                'user_id': str(self.user.id),
-                'cursor': cursor_data,
-                'exclude_channel': self.channel_name,
-            }
-        )
+        self._schedule_presence_flush()
     
     async def handle_awareness_update(self, payload: Dict, message_id: str):
         """
         Handle general awareness state update (Yjs awareness).
         """
-        awareness_data = payload.get('state', {})
-        
-        await sync_to_async(PresenceService.update_awareness)(
-            document_id=self.document_id,
-            user_id=str(self.user.id),
-            state=awareness_data
-        )
-        
-        # Broadcast to other users
-        await self.channel_layer.group_send(
-            self.document_group,
-            {
-                'type': 'awareness.update',
-                'user_id': str(self.user.id),
-                'state': awareness_data,
-                'exclude_channel': self.channel_name,
-            }
-        )
+        self._pending_presence['awareness'] = payload.get('state', {})
+        self._schedule_presence_flush()
     
     async def handle_block_lock(self, payload: Dict, message_id: str):
         """
@@ -289,10 +500,10 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             await self.send_error("Missing block_id")
             return
         
-        success = await sync_to_async(CollaborationService.acquire_block_lock)(
+        success = await CollaborationService.aacquire_block_lock(
             document_id=self.document_id,
             block_id=block_id,
-            user_id=str(self.user.id)
+            user_id=self.user_id_str
         )
         
         if success:
@@ -302,7 +513,7 @@ class DocumentConsumer(AsyncWebsocketConsumer):
                 {
                     'type': 'block.locked',
                     'block_id': block_id,
-                    'user_id': str(self.user.id),
+                    'user_id': self.user_id_str,
                 }
             )
         else:
@@ -318,10 +529,10 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             await self.send_error("Missing block_id")
             return
         
-        await sync_to_async(CollaborationService.release_block_lock)(
+        await CollaborationService.arelease_block_lock(
             document_id=self.document_id,
             block_id=block_id,
-            user_id=str(self.user.id)
+            user_id=self.user_id_str
         )
         
         # Notify all users about the unlock
@@ -330,7 +541,7 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             {
                 'type': 'block.unlocked',
                 'block_id': block_id,
-                'user_id': str(self.user.id),
+                'user_id': self.user_id_str,
             }
         )
     
@@ -338,42 +549,24 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         """
         User started typing indicator.
         """
-        block_id = payload.get('block_id')
-        
-        await self.channel_layer.group_send(
-            self.document_group,
-            {
-                'type': 'typing.started',
-                'user_id': str(self.user.id),
-                'block_id': block_id,
-                'exclude_channel': self.channel_name,
-            }
-        )
+        self._pending_presence['typing'] = ('typing.started', payload.get('block_id'))
+        self._schedule_presence_flush()
     
     async def handle_typing_stop(self, payload: Dict, message_id: str):
         """
         User stopped typing indicator.
         """
-        block_id = payload.get('block_id')
-        
-        await self.channel_layer.group_send(
-            self.document_group,
-            {
-                'type': 'typing.stopped',
-                'user_id': str(self.user.id),
-                'block_id': block_id,
-                'exclude_channel': self.channel_name,
-            }
-        )
+        self._pending_presence['typing'] = ('typing.stopped', payload.get('block_id'))
+        self._schedule_presence_flush()
     
     async def handle_ping(self, payload: Dict, message_id: str):
         """
         Keep-alive ping.
         """
         # Update last activity
-        await sync_to_async(PresenceService.update_activity)(
+        await PresenceService.aupdate_activity(
             document_id=self.document_id,
-            user_id=str(self.user.id)
+            user_id=self.user_id_str
         )
         
         await self.send_json({
@@ -381,23 +574,182 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             'timestamp': timezone.now().isoformat(),
         })
     
+    async def handle_sync(self, payload: Dict, message_id: str):
+        """
+        Answer a client's state vector with only the updates it is missing.
+        
+        Binary clients get a JSON header followed by one binary sync frame
+        holding the snapshot and updates as raw bytes.
+        """
+        update = await self._get_state_update(
+            payload.get('state_vector') or {}, raw=self.binary_frames
+        )
+        
+        if 'error' in update:
+            await self.send_error(update['error'])
+            return
+        
+        if self.binary_frames:
+            snapshot = update['snapshot']
+            payloads = [op['payload'] for op in update['updates']]
+            await self.send_json({
+                'type': 'sync.update',
+                'id': message_id,
+                'data': {
+                    'version': update['version'],
+                    'snapshot_version': snapshot['version'] if snapshot else None,
+                    'updates': [
+                        {key: value for key, value in op.items() if key != 'payload'}
+                        for op in update['updates']
+                    ],
+                },
+            })
+            await self.send(bytes_data=encode_sync_frame(
+                update['version'],
+                [snapshot['payload'], *payloads] if snapshot else payloads
+            ))
+            return
+        
+        await self.send_json({
+            'type': 'sync.update',
+            'id': message_id,
+            'data': update,
+        })
+    
+    def _schedule_presence_flush(self):
+        """
+        Arm the presence flush timer if it is not already pending.
+        """
+        if self._presence_flush is None:
+            self._presence_flush = asyncio.get_running_loop().call_later(
+                self.PRESENCE_FLUSH_INTERVAL,
+                self._start_presence_flush
+            )
+    
+    def _start_presence_flush(self):
+        self._presence_flush = None
+        self._spawn(self._flush_presence())
+    
+    async def _flush_presence(self):
+        """
+        Persist and broadcast the latest buffered presence state.
+        
+        Cursor and awareness are written to Redis together in one call;
+        each kind is then broadcast once regardless of how many updates
+        arrived since the previous flush, all in a single group_send.
+        """
+        pending, self._pending_presence = self._pending_presence, {}
+        if not pending:
+            return
+        
+        user_id = self.user_id_str
+        
+        try:
+            if 'cursor' in pending or 'awareness' in pending:
+                await PresenceService.aupdate_many(
+                    document_id=self.document_id,
+                    user_id=user_id,
+                    cursor_data=pending.get('cursor'),
+                    state=pending.get('awareness')
+                )
+            
+            events = []
+            
+            if 'cursor' in pending:
+                events.append({
+                    'type': 'cursor.update',
+                    'user_id': user_id,
+                    'cursor': pending['cursor'],
+                    'exclude_channel': self.channel_name,
+                })
+            
+            if 'awareness' in pending:
+                events.append({
+                    'type': 'awareness.update',
+                    'user_id': user_id,
+                    'state': pending['awareness'],
+                    'exclude_channel': self.channel_name,
+                })
+            
+            if 'typing' in pending:
+                event_type, block_id = pending['typing']
+                events.append({
+                    'type': event_type,
+                    'user_id': user_id,
+                    'block_id': block_id,
+                    'exclude_channel': self.channel_name,
+                })
+            
+            if events:
+                await self.channel_layer.group_send(
+                    self.document_group,
+                    combine_events(events)
+                )
+        except Exception as e:
+            logger.exception(f"Error flushing presence: {e}")
+    
+    def _spawn(self, coro):
+        """
+        Run a coroutine in the background, keeping a reference until done.
+        """
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
     # =========================================================================
     # Group message handlers (receive broadcasts from channel layer)
     # =========================================================================
     
+    async def combined_broadcast(self, event):
+        """
+        Dispatch each sub-event of a combined group message.
+        """
+        for sub_event in event['events']:
+            await getattr(self, get_handler_name(sub_event))(sub_event)
+    
     async def operation_broadcast(self, event):
         """
-        Broadcast operation to client (from other users).
+        Broadcast a batch of operations to client (from other users).
+        
+        A single operation keeps the plain 'operation' frame; larger
+        batches are sent as one 'operation.batch' frame. Clients that
+        negotiated BINARY_SUBPROTOCOL get one binary frame per operation.
         """
-        if event.get('exclude_channel') == self.channel_name:
+        state_vector_cache.invalidate(self.document_id)
+        
+        if self.binary_frames:
+            for op in event['ops']:
+                if op.get('exclude_channel') != self.channel_name:
+                    await self.send(bytes_data=encode_operation_frame(
+                        op['version'], op['update']
+                    ))
+            return
+        
+        operations = [
+            {
+                'operation': op['operation'],
+                'version': op['version'],
+                'user_id': op['user_id'],
+            }
+            for op in event['ops']
+            if op.get('exclude_channel') != self.channel_name
+        ]
+        
+        if not operations:
+            return
+        
+        if len(operations) == 1:
+            await self.send_json({
+                'type': 'operation',
+                'data': operations[0]
+            })
             return
         
         await self.send_json({
-            'type': 'operation',
+            'type': 'operation.batch',
             'data': {
-                'operation': event['operation'],
-                'version': event['version'],
-                'user_id': event['user_id'],
+                'operations': operations,
             }
         })
     
@@ -408,13 +760,10 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         if event.get('exclude_channel') == self.channel_name:
             return
         
-        await self.send_json({
-            'type': 'cursor.update',
-            'data': {
-                'user_id': event['user_id'],
-                'cursor': event['cursor'],
-            }
-        })
+        await self.send_frame(Frame(
+            'cursor.update',
+            CursorData(event['user_id'], event['cursor'])
+        ))
     
     async def awareness_update(self, event):
         """
@@ -423,18 +772,17 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         if event.get('exclude_channel') == self.channel_name:
             return
         
-        await self.send_json({
-            'type': 'awareness',
-            'data': {
-                'user_id': event['user_id'],
-                'state': event['state'],
-            }
-        })
+        await self.send_frame(Frame(
+            'awareness',
+            AwarenessData(event['user_id'], event['state'])
+        ))
     
     async def user_joined(self, event):
         """
         Notify client that a user joined.
         """
+        active_users_cache.invalidate(self.document_id)
+        
         await self.send_json({
             'type': 'user.joined',
             'data': event['user_data']
@@ -444,6 +792,8 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         """
         Notify client that a user left.
         """
+        active_users_cache.invalidate(self.document_id)
+        
         await self.send_json({
             'type': 'user.left',
             'data': {
@@ -482,13 +832,10 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         if event.get('exclude_channel') == self.channel_name:
             return
         
-        await self.send_json({
-            'type': 'typing.start',
-            'data': {
-                'user_id': event['user_id'],
-                'block_id': event.get('block_id'),
-            }
-        })
+        await self.send_frame(Frame(
+            'typing.start',
+            TypingData(event['user_id'], event.get('block_id'))
+        ))
     
     async def typing_stopped(self, event):
         """
@@ -497,23 +844,23 @@ class DocumentConsumer(AsyncWebsocketConsumer):
         if event.get('exclude_channel') == self.channel_name:
             return
         
-        await self.send_json({
-            'type': 'typing.stop',
-            'data': {
-                'user_id': event['user_id'],
-                'block_id': event.get('block_id'),
-            }
-        })
+        await self.send_frame(Frame(
+            'typing.stop',
+            TypingData(event['user_id'], event.get('block_id'))
+        ))
     
     # =========================================================================
     # Helper methods
     # =========================================================================
     
-    async def send_json(self, content):
+    async def send_frame(self, frame):
         """
-        Send JSON message to client.
+        Send a control frame as msgpack or JSON, per the negotiated subprotocol.
         """
-        await self.send(text_data=json.dumps(content))
+        if self.msgpack_frames:
+            await self.send(bytes_data=encode_control_frame(frame))
+        else:
+            await self.send_json(frame)
     
     async def send_error(self, message: str):
         """
@@ -526,74 +873,111 @@ class DocumentConsumer(AsyncWebsocketConsumer):
             }
         })
     
-    @database_sync_to_async
-    def _check_document_access(self) -> bool:
+    async def _check_document_access(self) -> bool:
         """
         Check if user has access to the document.
+        
+        The decision is cached briefly so reconnect storms don't repeat the
+        document and permission lookups; permission signals invalidate it.
+        """
+        cache_key = f"perm:{self.user_id_str}:{self.document_id}"
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            return cached == '1'
+        
+        has_access = await self._query_document_access()
+        await cache.aset(cache_key, '1' if has_access else '0', self.ACCESS_CACHE_TTL)
+        return has_access
+    
+    @database_sync_to_async
+    def _query_document_access(self) -> bool:
+        """
+        Check document access against the database.
         """
         from apps.documents.models import Document
-        from apps.workspaces.models import Workspace
         
-        try:
-            document = Document.objects.select_related('workspace').get(
-                id=self.document_id,
-                is_deleted=False
-            )
-            
-            # Check if user has view permission
-            return has_document_permission(self.user, document, 'can_view')
-        except Document.DoesNotExist:
+        # has_document_permission only reads the ids below (the workspace
+        # role lookup keys on workspace.id), so skip every other column.
+        document = Document.objects.select_related('workspace').only(
+            'id', 'created_by', 'workspace__id'
+        ).filter(
+            id=self.document_id,
+            is_deleted=False
+        ).first()
+        
+        if document is None:
             return False
+        
+        # Check if user has view permission
+        return has_document_permission(self.user, document, 'can_view')
     
-    @database_sync_to_async
-    def _create_session(self) -> Dict:
+    async def _create_session(self) -> Dict:
         """
         Create a collaboration session.
         """
-        return CollaborationService.create_session(
+        return await CollaborationService.acreate_session(
             document_id=self.document_id,
-            user_id=str(self.user.id),
+            user=self.user,
             channel_name=self.channel_name
         )
     
-    @database_sync_to_async
-    def _end_session(self):
+    async def _end_session(self):
         """
         End collaboration session.
         """
-        CollaborationService.end_session(
+        await CollaborationService.aend_session(
             document_id=self.document_id,
-            user_id=str(self.user.id)
+            user_id=self.user_id_str
         )
     
     @database_sync_to_async
-    def _get_document_state(self) -> Dict:
+    def _get_state_vector(self) -> Dict:
         """
-        Get current document state for initial sync.
+        Get the document's state vector for initial sync.
         """
-        return CRDTService.get_document_state(self.document_id)
+        return CRDTService.get_state_vector(self.document_id)
     
     @database_sync_to_async
-    def _get_active_users(self) -> list:
+    def _get_state_update(self, client_state_vector: Dict, raw: bool = False) -> Dict:
+        """
+        Get the operations missing from the client's state vector.
+        """
+        return CRDTService.encode_state_as_update(
+            self.document_id, client_state_vector, raw=raw
+        )
+    
+    async def _get_active_users(self) -> list:
         """
         Get list of currently active users on this document.
         """
-        return PresenceService.get_active_users(self.document_id)
+        return await PresenceService.aget_active_users(self.document_id)
     
-    @database_sync_to_async
-    def _get_user_data(self) -> Dict:
+    async def _get_user_data(self) -> Dict:
         """
         Get serialized user data for presence.
         """
-        from apps.users.serializers import UserPublicSerializer
+        cache_key = f"user_pub:{self.user_id_str}"
+        user_data = await cache.aget(cache_key)
+        if user_data is None:
+            user_data = await self._serialize_user()
+            await cache.aset(cache_key, user_data, self.USER_DATA_CACHE_TTL)
+        
         return {
-            **UserPublicSerializer(self.user).data,
+            **user_data,
             'color': self.user_color,
             'session_id': self.session_id,
         }
+    
+    @database_sync_to_async
+    def _serialize_user(self) -> Dict:
+        """
+        Serialize the connected user's public profile.
+        """
+        from apps.users.serializers import UserPublicSerializer
+        return dict(UserPublicSerializer(self.user).data)
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(JSONWebsocketConsumer):
     """
     WebSocket consumer for real-time notifications.
     """
@@ -624,13 +1008,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Send notification to client.
         """
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'notification',
             'data': event['data']
-        }))
+        })
 
 
-class WorkspaceConsumer(AsyncWebsocketConsumer):
+class WorkspaceConsumer(JSONWebsocketConsumer):
     """
     WebSocket consumer for real-time workspace updates.
     
@@ -693,63 +1077,63 @@ class WorkspaceConsumer(AsyncWebsocketConsumer):
     
     async def board_created(self, event):
         """Broadcast board creation to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'board.created',
             'data': event['data']
-        }))
+        })
     
     async def board_updated(self, event):
         """Broadcast board updates to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'board.updated',
             'data': event['data']
-        }))
+        })
     
     async def board_deleted(self, event):
         """Broadcast board deletion to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'board.deleted',
             'data': event['data']
-        }))
+        })
     
     async def member_joined(self, event):
         """Broadcast member join to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'member.joined',
             'data': event['data']
-        }))
+        })
     
     async def member_left(self, event):
         """Broadcast member leave to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'member.left',
             'data': event['data']
-        }))
+        })
     
     async def member_role_updated(self, event):
         """Broadcast member role update to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'member.role_updated',
             'data': event['data']
-        }))
+        })
     
     async def card_created(self, event):
         """Broadcast card creation to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'card.created',
             'data': event['data']
-        }))
+        })
     
     async def card_updated(self, event):
         """Broadcast card updates to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'card.updated',
             'data': event['data']
-        }))
+        })
     
     async def card_comment_created(self, event):
         """Broadcast card comment creation to all workspace members."""
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             'type': 'card.comment_created',
             'data': event['data']
-        }))
+        })
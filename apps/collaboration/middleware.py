@@ -3,37 +3,79 @@ JWT Authentication Middleware for WebSocket Connections
 
 Authenticates WebSocket connections using JWT tokens.
 """
+import hashlib
 import logging
-from urllib.parse import parse_qs
-from channels.db import database_sync_to_async
+import time
+from urllib.parse import unquote_plus
 from channels.middleware import BaseMiddleware
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from rest_framework_simplejwt.tokens import AccessToken, TokenError
 from django.contrib.auth import get_user_model
+from apps.core.utils import RateLimitService
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-@database_sync_to_async
-def get_user_from_token(token_string):
+# Only what WebSocket consumers read (identity + public profile), so the
+# handshake doesn't pull bio, preferences or the password hash.
+WEBSOCKET_USER_FIELDS = (
+    'id', 'email', 'username', 'first_name', 'last_name',
+    'avatar', 'avatar_color', 'is_active',
+)
+
+
+async def get_user_from_token(token_string):
     """
     Validate JWT token and return user.
+    
+    A validated token's user id is cached until the token expires, so
+    reconnects skip signature verification. The user row is still loaded
+    (with a narrow column set) so deactivated users are rejected.
     """
+    cache_key = f"jwt:{hashlib.sha256(token_string.encode()).hexdigest()}"
+    
     try:
-        token = AccessToken(token_string)
-        user_id = token.payload.get('user_id')
+        user_id = await cache.aget(cache_key)
         
-        if not user_id:
-            return AnonymousUser()
+        if user_id is None:
+            token = AccessToken(token_string)
+            user_id = token.payload.get('user_id')
+            
+            if not user_id:
+                return AnonymousUser()
+            
+            ttl = int(token.payload['exp'] - time.time())
+            if ttl > 0:
+                await cache.aset(cache_key, user_id, ttl)
         
-        user = User.objects.get(id=user_id, is_active=True)
-        return user
+        return await User.objects.only(*WEBSOCKET_USER_FIELDS).aget(
+            id=user_id,
+            is_active=True
+        )
     except (TokenError, User.DoesNotExist) as e:
         logger.warning(f"Token validation failed: {e}")
         return AnonymousUser()
 
 
+def get_query_token(query_string: bytes):
+    """
+    Extract the 'token' parameter from a raw query string.
+    
+    Scans for the one parameter we need instead of building a parse_qs
+    dict; only percent/plus-encoded values are decoded.
+    """
+    for part in query_string.split(b'&'):
+        if part.startswith(b'token='):
+            token = part[6:].decode()
+            if '%' in token or '+' in token:
+                token = unquote_plus(token)
+            return token or None
+    return None
+
+
 class JWTAuthMiddleware(BaseMiddleware):
     """
     Custom middleware to authenticate WebSocket connections using JWT.
@@ -45,9 +87,7 @@ class JWTAuthMiddleware(BaseMiddleware):
     
     async def __call__(self, scope, receive, send):
         # Extract token from query string
-        query_string = scope.get('query_string', b'').decode()
-        query_params = parse_qs(query_string)
-        token = query_params.get('token', [None])[0]
+        token = get_query_token(scope.get('query_string', b''))
         
         # Fallback to subprotocol if no query param
         if not token and 'subprotocols' in scope:
@@ -69,9 +109,25 @@ class JWTAuthMiddleware(BaseMiddleware):
 class RateLimitMiddleware(BaseMiddleware):
     """
     Rate limiting for WebSocket connections.
+    
+    Caps handshakes per user per minute (WS_RATE_LIMIT_CONNECTIONS) so a
+    reconnect loop can't hammer auth and session setup. Must run inside
+    JWTAuthMiddleware so scope['user'] is populated. Per-message limits
+    are enforced in DocumentConsumer.receive.
     """
     
     async def __call__(self, scope, receive, send):
-        # TODO: Implement rate limiting logic
-        # Can use Redis to track message rates per user/connection
+        user = scope.get('user')
+        
+        if user is not None and user.is_authenticated:
+            allowed = await RateLimitService.ahit(
+                f"conn:{user.id}",
+                settings.WS_RATE_LIMIT_CONNECTIONS
+            )
+            if not allowed:
+                logger.warning(f"Connection rate limit exceeded for user {user.id}")
+                await receive()  # websocket.connect
+                await send({'type': 'websocket.close', 'code': 4008})
+                return
+        
         return await super().__call__(scope, receive, send)
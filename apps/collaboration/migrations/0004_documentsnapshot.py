@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:41
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0003_initial'),
+        ('documents', '0003_alter_block_content_alter_block_properties_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSnapshot',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('state', models.BinaryField(help_text='Merged CRDT update in binary format')),
+                ('version', models.PositiveIntegerField(help_text='Last operation version folded into the snapshot')),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='crdt_snapshot', to='documents.document')),
+            ],
+            options={
+                'db_table': 'document_snapshots',
+            },
+        ),
+    ]
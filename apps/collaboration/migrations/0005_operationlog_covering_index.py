@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0004_documentsnapshot'),
+        ('documents', '0003_alter_block_content_alter_block_properties_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='operationlog',
+            name='operation_l_documen_28d74e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='operationlog',
+            name='operation_l_operati_fd1edf_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='operationlog',
+            name='operation_l_timesta_709332_idx',
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='operation_id',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='timestamp',
+            field=models.BigIntegerField(help_text='High-precision timestamp for ordering'),
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='version',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='operationlog',
+            index=models.Index(fields=['document', 'version'], include=('operation_id', 'client_id', 'timestamp'), name='oplog_doc_ver_covering'),
+        ),
+    ]
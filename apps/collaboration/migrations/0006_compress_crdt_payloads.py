@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:53
+
+import apps.core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0005_operationlog_covering_index'),
+    ]
+
+    # Existing rows are stored raw; give them the 0x00 (raw) encoding tag
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "UPDATE operation_logs SET payload = decode('00', 'hex') || payload",
+                "UPDATE document_snapshots SET state = decode('00', 'hex') || state",
+            ],
+            reverse_sql=[
+                "UPDATE operation_logs SET payload = substring(payload from 2)",
+                "UPDATE document_snapshots SET state = substring(state from 2)",
+            ],
+        ),
+        migrations.AlterField(
+            model_name='documentsnapshot',
+            name='state',
+            field=apps.core.models.CompressedBinaryField(help_text='Merged CRDT update in binary format'),
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='payload',
+            field=apps.core.models.CompressedBinaryField(help_text='CRDT update in binary format'),
+        ),
+    ]
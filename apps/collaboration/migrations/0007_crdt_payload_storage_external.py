@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0006_compress_crdt_payloads'),
+    ]
+
+    # Payloads are zstd-compressed by CompressedBinaryField; skip TOAST's
+    # pglz pass on write and read, keep out-of-line storage for large values
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "ALTER TABLE operation_logs ALTER COLUMN payload SET STORAGE EXTERNAL",
+                "ALTER TABLE document_snapshots ALTER COLUMN state SET STORAGE EXTERNAL",
+            ],
+            reverse_sql=[
+                "ALTER TABLE operation_logs ALTER COLUMN payload SET STORAGE EXTENDED",
+                "ALTER TABLE document_snapshots ALTER COLUMN state SET STORAGE EXTENDED",
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0007_crdt_payload_storage_external'),
+        ('documents', '0003_alter_block_content_alter_block_properties_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='collaborationsession',
+            name='collaborati_last_ac_8e3e18_idx',
+        ),
+        migrations.AddIndex(
+            model_name='collaborationsession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['last_activity'], name='collab_session_live_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+PARTITIONS = 16
+
+# Indexes and foreign keys shared by both layouts; created after the data
+# copy, once the old table (and its index names) are gone
+COMMON_SQL = [
+    'CREATE INDEX "operation_logs_created_at_a9935f2e" ON operation_logs (created_at)',
+    'CREATE INDEX "operation_logs_updated_at_e6acee3a" ON operation_logs (updated_at)',
+    'CREATE INDEX "operation_logs_user_id_81c5cda2" ON operation_logs (user_id)',
+    'CREATE INDEX "oplog_doc_ver_covering" ON operation_logs (document_id, version) '
+    'INCLUDE (operation_id, client_id, "timestamp")',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "operation_logs_document_id_27cdfe0d_fk_documents_id" '
+    'FOREIGN KEY (document_id) REFERENCES documents (id) DEFERRABLE INITIALLY DEFERRED',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "operation_logs_user_id_81c5cda2_fk_users_id" '
+    'FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED',
+]
+
+# Hash-partition on document_id: each document's operations share one
+# partition, so its heap pages and index stay small and cache-resident.
+# Primary key and unique constraints must include the partition key.
+PARTITION_SQL = [
+    'ALTER TABLE operation_logs RENAME TO operation_logs_unpartitioned',
+    'CREATE TABLE operation_logs (LIKE operation_logs_unpartitioned '
+    'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+    'PARTITION BY HASH (document_id)',
+    *[
+        f'CREATE TABLE operation_logs_p{i} PARTITION OF operation_logs '
+        f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {i})'
+        for i in range(PARTITIONS)
+    ],
+    'ALTER TABLE operation_logs ALTER COLUMN payload SET STORAGE EXTERNAL',
+    'INSERT INTO operation_logs SELECT * FROM operation_logs_unpartitioned',
+    'DROP TABLE operation_logs_unpartitioned',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "operation_logs_pkey" PRIMARY KEY (id, document_id)',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "oplog_doc_operation_uniq" UNIQUE (document_id, operation_id)',
+    *COMMON_SQL,
+]
+
+UNPARTITION_SQL = [
+    'ALTER TABLE operation_logs RENAME TO operation_logs_partitioned',
+    'CREATE TABLE operation_logs (LIKE operation_logs_partitioned '
+    'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)',
+    'INSERT INTO operation_logs SELECT * FROM operation_logs_partitioned',
+    'DROP TABLE operation_logs_partitioned',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "operation_logs_pkey" PRIMARY KEY (id)',
+    'ALTER TABLE operation_logs ADD CONSTRAINT "operation_logs_operation_id_key" UNIQUE (operation_id)',
+    'CREATE INDEX "operation_logs_operation_id_3a10cc3f_like" ON operation_logs '
+    '(operation_id varchar_pattern_ops)',
+    'CREATE INDEX "operation_logs_document_id_27cdfe0d" ON operation_logs (document_id)',
+    *COMMON_SQL,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0008_collaborationsession_live_index'),
+        ('documents', '0003_alter_block_content_alter_block_properties_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='operationlog',
+                    name='document',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='documents.document'),
+                ),
+                migrations.AlterField(
+                    model_name='operationlog',
+                    name='operation_id',
+                    field=models.CharField(max_length=100),
+                ),
+                migrations.AddConstraint(
+                    model_name='operationlog',
+                    constraint=models.UniqueConstraint(fields=('document', 'operation_id'), name='oplog_doc_operation_uniq'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0009_partition_operation_logs'),
+    ]
+
+    # Existing ids are 32-char hex digests, which Postgres casts to uuid
+    operations = [
+        migrations.AlterField(
+            model_name='operationlog',
+            name='operation_id',
+            field=models.UUIDField(),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0010_operationlog_operation_id_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterModelTableComment(
+            name='operationlog',
+            table_comment='Partitioned by hash(document_id), 16 partitions; see migration 0009',
+        ),
+    ]
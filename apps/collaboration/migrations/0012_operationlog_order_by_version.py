@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0011_operationlog_table_comment'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='operationlog',
+            options={'ordering': ['version']},
+        ),
+    ]
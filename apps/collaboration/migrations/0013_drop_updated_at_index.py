@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0012_operationlog_order_by_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collaborationsession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='documentsnapshot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
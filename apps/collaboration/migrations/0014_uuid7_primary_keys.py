@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:20
+
+import apps.core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0013_drop_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collaborationsession',
+            name='id',
+            field=models.UUIDField(default=apps.core.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='documentsnapshot',
+            name='id',
+            field=models.UUIDField(default=apps.core.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='operationlog',
+            name='id',
+            field=models.UUIDField(default=apps.core.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
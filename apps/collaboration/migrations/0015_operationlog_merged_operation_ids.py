@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:31
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('collaboration', '0014_uuid7_primary_keys'),
+        ('documents', '0005_uuid7_primary_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operationlog',
+            name='merged_operation_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.UUIDField(), blank=True, default=list, help_text='IDs of later operations folded into this row by a merge', size=None),
+        ),
+        migrations.AddIndex(
+            model_name='operationlog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['merged_operation_ids'], name='oplog_merged_ids_gin'),
+        ),
+    ]
@@ -6,7 +6,8 @@ Tracks real-time presence, cursors, and collaborative editing sessions.
 from django.db import models
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
-from apps.core.models import BaseModel
+from django.contrib.postgres.indexes import GinIndex
+from apps.core.models import BaseModel, CompressedBinaryField
 
 
 class CollaborationSession(BaseModel):
@@ -50,7 +51,12 @@ class CollaborationSession(BaseModel):
         indexes = [
             models.Index(fields=['document', 'is_active']),
             models.Index(fields=['user', 'is_active']),
-            models.Index(fields=['last_activity']),
+            # Only live sessions are scanned by expiry and presence sync
+            models.Index(
+                fields=['last_activity'],
+                condition=models.Q(is_active=True),
+                name='collab_session_live_idx',
+            ),
         ]
     
     def __str__(self):
@@ -61,12 +67,17 @@ class OperationLog(BaseModel):
     """
     Log of operations for Operational Transformation / CRDT.
     Enables conflict-free merging and replay.
+    
+    The table is hash-partitioned on document_id (see 0009), so every
+    unique constraint must include document and per-document queries
+    should always filter on it to prune to a single partition.
     """
     
     document = models.ForeignKey(
         'documents.Document',
         on_delete=models.CASCADE,
-        related_name='operations'
+        related_name='operations',
+        db_index=False,  # Leading column of oplog_doc_ver_covering
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -75,40 +86,91 @@ class OperationLog(BaseModel):
     )
     
     # Operation metadata
-    operation_id = models.CharField(max_length=100, unique=True, db_index=True)
+    operation_id = models.UUIDField()
+    merged_operation_ids = ArrayField(
+        models.UUIDField(),
+        default=list,
+        blank=True,
+        help_text='IDs of later operations folded into this row by a merge'
+    )
     operation_type = models.CharField(
         max_length=50,
         help_text='insert, delete, update, move, etc.'
     )
     
-    # Operation payload (Yjs/Automerge update)
-    payload = models.BinaryField(
+    # Operation payload (Yjs/Automerge update); STORAGE EXTERNAL, see 0007
+    payload = CompressedBinaryField(
         help_text='CRDT update in binary format'
     )
     
     # Context for ordering
-    version = models.PositiveIntegerField(db_index=True)
+    version = models.PositiveIntegerField()
     client_id = models.CharField(max_length=100)
     
     # Timestamp for conflict resolution
     timestamp = models.BigIntegerField(
-        db_index=True,
         help_text='High-precision timestamp for ordering'
     )
     
     class Meta:
         db_table = 'operation_logs'
-        ordering = ['version', 'timestamp']
+        db_table_comment = 'Partitioned by hash(document_id), 16 partitions; see migration 0009'
+        # version is a per-document counter claimed atomically, so it is
+        # already a strict order; timestamp is informational only
+        ordering = ['version']
         indexes = [
-            models.Index(fields=['document', 'version']),
-            models.Index(fields=['operation_id']),
-            models.Index(fields=['timestamp']),
+            # Serves every sync read (document_id = X AND version > N ORDER
+            # BY version) in index order. Payload is not included: Yjs
+            # updates can exceed the btree tuple size limit.
+            models.Index(
+                fields=['document', 'version'],
+                include=['operation_id', 'client_id', 'timestamp'],
+                name='oplog_doc_ver_covering',
+            ),
+            # Duplicate lookups for operations merged into an earlier row
+            GinIndex(fields=['merged_operation_ids'], name='oplog_merged_ids_gin'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'operation_id'],
+                name='oplog_doc_operation_uniq',
+            ),
         ]
     
     def __str__(self):
         return f"{self.operation_type} v{self.version} by {self.user.email}"
 
 
+class DocumentSnapshot(BaseModel):
+    """
+    Compacted CRDT state for a document.
+    
+    Operations up to and including `version` are merged into `state`
+    (a single Yjs update) and pruned from the operation log, so syncing
+    clients receive the snapshot plus only the tail of operations.
+    """
+    
+    document = models.OneToOneField(
+        'documents.Document',
+        on_delete=models.CASCADE,
+        related_name='crdt_snapshot'
+    )
+    
+    # Merged Yjs update covering every operation <= version
+    state = CompressedBinaryField(
+        help_text='Merged CRDT update in binary format'
+    )
+    version = models.PositiveIntegerField(
+        help_text='Last operation version folded into the snapshot'
+    )
+    
+    class Meta:
+        db_table = 'document_snapshots'
+    
+    def __str__(self):
+        return f"Snapshot of {self.document_id} at v{self.version}"
+
+
 class PresenceAwareness(models.Model):
     """
     Real-time presence awareness state.
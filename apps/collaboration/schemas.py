@@ -0,0 +1,235 @@
+"""
+WebSocket Message Schemas
+
+Inbound DocumentConsumer frames are parsed and validated in a single pass
+with Pydantic (jiter JSON parsing + a discriminated union on 'type').
+
+High-frequency outbound frames are slotted dataclasses, which orjson
+serializes natively without building intermediate dicts.
+
+Clients that negotiate the binary subprotocol exchange CRDT updates as
+binary frames (see the "Binary frames" section below) instead of hex in JSON.
+With the msgpack subprotocol, control messages travel as msgpack frames too.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+
+import msgpack
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+
+class WsMessage(BaseModel):
+    """
+    Common envelope for client -> server messages.
+    """
+    id: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class OperationMessage(WsMessage):
+    type: Literal['operation']
+
+
+class CursorMessage(WsMessage):
+    type: Literal['cursor']
+
+
+class AwarenessMessage(WsMessage):
+    type: Literal['awareness']
+
+
+class BlockLockMessage(WsMessage):
+    type: Literal['block.lock']
+
+
+class BlockUnlockMessage(WsMessage):
+    type: Literal['block.unlock']
+
+
+class TypingStartMessage(WsMessage):
+    type: Literal['typing.start']
+
+
+class TypingStopMessage(WsMessage):
+    type: Literal['typing.stop']
+
+
+class PingMessage(WsMessage):
+    type: Literal['ping']
+
+
+class SyncMessage(WsMessage):
+    type: Literal['sync']
+
+
+IncomingMessage = Annotated[
+    Union[
+        OperationMessage,
+        CursorMessage,
+        AwarenessMessage,
+        BlockLockMessage,
+        BlockUnlockMessage,
+        TypingStartMessage,
+        TypingStopMessage,
+        PingMessage,
+        SyncMessage,
+    ],
+    Field(discriminator='type'),
+]
+
+# Built once at import; constructing a TypeAdapter compiles the validator.
+incoming_message_adapter = TypeAdapter(IncomingMessage)
+
+
+def parse_incoming_message(raw) -> IncomingMessage:
+    """
+    Parse and validate a raw WebSocket frame (str or bytes).
+
+    Raises pydantic.ValidationError on malformed JSON or payloads.
+    """
+    return incoming_message_adapter.validate_json(raw)
+
+
+def describe_validation_error(error: ValidationError) -> str:
+    """
+    Map a validation error to the message sent back to the client.
+    """
+    first = error.errors()[0]
+    if first['type'] == 'json_invalid':
+        return "Invalid JSON"
+    if first['type'] == 'union_tag_invalid':
+        return f"Unknown message type: {first['ctx']['tag']}"
+    if first['type'] == 'union_tag_not_found':
+        return "Unknown message type: None"
+    return "Invalid message format"
+
+
+# =============================================================================
+# Outbound frames (server -> client)
+# =============================================================================
+
+@dataclass(slots=True)
+class Frame:
+    """
+    Envelope for server -> client messages.
+    """
+    type: str
+    data: Any
+
+
+@dataclass(slots=True)
+class CursorData:
+    user_id: str
+    cursor: Optional[Dict[str, Any]]
+
+
+@dataclass(slots=True)
+class AwarenessData:
+    user_id: str
+    state: Optional[Dict[str, Any]]
+
+
+@dataclass(slots=True)
+class TypingData:
+    user_id: str
+    block_id: Optional[str]
+
+
+# =============================================================================
+# Binary frames
+# =============================================================================
+
+# Frame tags (first byte)
+OPERATION_FRAME = 0x01
+CONTROL_FRAME = 0x02
+SYNC_FRAME = 0x03
+
+# Client -> server: tag, msgpack header length, header, raw update
+INBOUND_HEADER = struct.Struct('>BH')
+
+# Server -> client: tag, document version, body
+OUTBOUND_HEADER = struct.Struct('>BI')
+
+# Length prefix for each update inside a sync frame
+LENGTH_PREFIX = struct.Struct('>I')
+
+
+def parse_binary_message(frame: bytes) -> IncomingMessage:
+    """
+    Parse a binary client frame.
+    
+    Control frames carry a msgpack-encoded message envelope, validated by
+    the same schemas as JSON text frames (pydantic.ValidationError if
+    invalid). Operation frames carry a msgpack header with the envelope's
+    scalar fields (id, version, client_id, type); the rest of the frame is
+    the raw CRDT update, passed through as bytes. Raises ValueError if the
+    frame itself is malformed.
+    """
+    if not frame:
+        raise ValueError("Truncated frame")
+    
+    if frame[0] == CONTROL_FRAME:
+        try:
+            envelope = msgpack.unpackb(frame[1:])
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ValueError("Invalid control frame") from e
+        return incoming_message_adapter.validate_python(envelope)
+    
+    if len(frame) < INBOUND_HEADER.size:
+        raise ValueError("Truncated frame")
+    
+    tag, header_length = INBOUND_HEADER.unpack_from(frame)
+    if tag != OPERATION_FRAME:
+        raise ValueError(f"Unknown frame tag: {tag}")
+    
+    body_start = INBOUND_HEADER.size + header_length
+    try:
+        header = msgpack.unpackb(frame[INBOUND_HEADER.size:body_start])
+    except (ValueError, msgpack.UnpackException) as e:
+        raise ValueError("Invalid frame header") from e
+    if not isinstance(header, dict):
+        raise ValueError("Invalid frame header")
+    
+    operation = {
+        'type': header.get('type', 'update'),
+        'payload': frame[body_start:],
+    }
+    if header.get('client_id'):
+        operation['client_id'] = header['client_id']
+    
+    return OperationMessage(
+        type='operation',
+        id=header.get('id'),
+        data={'operation': operation, 'version': header.get('version')},
+    )
+
+
+def _pack_default(obj):
+    # Outbound frames are slotted dataclasses; msgpack needs plain maps
+    return {name: getattr(obj, name) for name in obj.__slots__}
+
+
+def encode_control_frame(message) -> bytes:
+    """
+    Encode a control message (dict or Frame) as a msgpack control frame.
+    """
+    return bytes([CONTROL_FRAME]) + msgpack.packb(message, default=_pack_default)
+
+
+def encode_operation_frame(version: int, update: bytes) -> bytes:
+    """
+    Encode one broadcast operation as a binary frame.
+    """
+    return OUTBOUND_HEADER.pack(OPERATION_FRAME, version) + update
+
+
+def encode_sync_frame(version: int, updates: List[bytes]) -> bytes:
+    """
+    Encode a sync reply: length-prefixed updates, snapshot first if any.
+    """
+    parts = [OUTBOUND_HEADER.pack(SYNC_FRAME, version)]
+    for update in updates:
+        parts.append(LENGTH_PREFIX.pack(len(update)))
+        parts.append(update)
+    return b''.join(parts)
@@ -49,18 +49,50 @@ The system prevents "Last-Write-Wins" data loss through:
 5. **Merge Function**: CRDT merge is commutative and associative
 
 """
+import asyncio
 import logging
 import time
-import hashlib
-import json
-from typing import Dict, List, Optional, Any
+import uuid
+import zlib
+from itertools import groupby, islice
+from typing import Dict, Iterator, List, Optional, Any
+import orjson
+from pycrdt import merge_updates
 from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Q, Subquery
 from django.utils import timezone
-from apps.core.utils import get_redis_client
+from apps.core.utils import RedisScript, get_redis_client
 
 logger = logging.getLogger(__name__)
 
+# Atomic check-and-delete for block locks (only the owner may release)
+RELEASE_LOCK_SCRIPT = RedisScript("""
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+""")
+
+# Keys every client operation must carry
+REQUIRED_OPERATION_FIELDS = frozenset(('payload', 'type'))
+
+# Fixed namespace for deterministic (uuid5) operation ids
+OPERATION_ID_NAMESPACE = uuid.UUID('e66b1a12-0482-4c60-975d-72a9283ac4e4')
+
+# Cursor colors assigned to collaborators
+USER_COLORS = (
+    '#ef4444', '#f59e0b', '#10b981', '#3b82f6',
+    '#6366f1', '#8b5cf6', '#ec4899', '#f97316',
+)
+
+
+class _VersionConflict(Exception):
+    """
+    Rolls back a batch whose version claim lost to a concurrent writer.
+    """
+
 
 class CRDTService:
     """
@@ -69,50 +101,79 @@ class CRDTService:
     Designed to work with Yjs or Automerge clients.
     """
     
+    DOC_STATE_TTL = 300  # seconds
+    SNAPSHOT_CHUNK_SIZE = 1000  # operations merged per step
+    
     @staticmethod
     def get_document_state(document_id: str) -> Dict:
         """
         Get the current CRDT state for a document.
         
+        The state at a given version never changes, so the serialized result
+        is cached under doc_state:{id} until OperationProcessor commits a new
+        version and deletes it.
+        
         Returns:
             - state_vector: For clients to determine what updates they need
             - updates: Recent operations for sync
             - version: Current document version
         """
+        cache_key = f'doc_state:{document_id}'
+        state = cache.get(cache_key)
+        if state is None:
+            state = CRDTService._load_document_state(document_id)
+            if 'error' not in state:
+                cache.set(cache_key, state, CRDTService.DOC_STATE_TTL)
+        return state
+    
+    @staticmethod
+    def _load_document_state(document_id: str) -> Dict:
+        """
+        Build get_document_state's result from the database.
+        """
         from apps.documents.models import Document
         from .models import OperationLog
         
         try:
-            document = Document.objects.get(id=document_id)
+            document = Document.objects.only('state', 'current_version').get(id=document_id)
+            snapshot = CRDTService._get_snapshot(document_id)
             
-            # Get recent operations (last 100 or since last snapshot)
+            # Get recent operations (last 100 since the snapshot), selected
+            # newest-first in a subquery and returned oldest-first as tuples
+            latest_ids = OperationLog.objects.filter(
+                document_id=document_id,
+                version__gt=snapshot.version if snapshot else 0
+            ).order_by('-version').values('id')[:100]
             recent_ops = OperationLog.objects.filter(
-                document_id=document_id
-            ).order_by('-version')[:100]
+                id__in=Subquery(latest_ids)
+            ).order_by('version').values_list('operation_id', 'version', 'payload', 'timestamp')
             
             return {
                 'document_id': str(document_id),
                 'state': document.state,  # CRDT state (Yjs state vector or Automerge heads)
                 'version': document.current_version,
+                'snapshot': CRDTService._serialize_snapshot(snapshot),
                 'updates': [
                     {
-                        'operation_id': op.operation_id,
-                        'version': op.version,
-                        'payload': op.payload.hex(),  # Convert binary to hex for JSON
-                        'timestamp': op.timestamp,
+                        'operation_id': str(operation_id),
+                        'version': version,
+                        'payload': payload.hex(),  # Convert binary to hex for JSON
+                        'timestamp': timestamp,
                     }
-                    for op in reversed(list(recent_ops))
+                    for operation_id, version, payload, timestamp in recent_ops
                 ],
             }
         except Document.DoesNotExist:
             return {'error': 'Document not found'}
     
     @staticmethod
-    def apply_state_vector(document_id: str, client_state_vector: Dict) -> List[bytes]:
+    def apply_state_vector(document_id: str, client_state_vector: Dict) -> Iterator[bytes]:
         """
         Compare client's state vector with server's to find missing updates.
         
         This is how Yjs determines which updates to send to a syncing client.
+        Updates are yielded as they are read, snapshot first, so the log is
+        never held in memory as a whole.
         """
         from .models import OperationLog
         
@@ -122,12 +183,202 @@ class CRDTService:
         
         client_version = client_state_vector.get('version', 0)
         
+        # Operations folded into the snapshot are gone from the log
+        snapshot = CRDTService._get_snapshot(document_id)
+        if snapshot and client_version < snapshot.version:
+            yield bytes(snapshot.state)
+        
+        # Stream payloads in chunks rather than materializing model rows
+        yield from OperationLog.objects.filter(
+            document_id=document_id,
+            version__gt=client_version
+        ).order_by('version').values_list('payload', flat=True).iterator(chunk_size=500)
+    
+    @staticmethod
+    def get_state_vector(document_id: str) -> Dict:
+        """
+        Get the server's state vector for a document.
+        
+        Mirrors Yjs's encodeStateVector: the latest server version plus the
+        highest version seen from each client. Sent on connect so the client
+        can answer with its own vector and receive only what it is missing.
+        """
+        from django.db.models import Max
+        from apps.documents.models import Document
+        from .models import OperationLog
+        
+        try:
+            current_version = Document.objects.values_list(
+                'current_version', flat=True
+            ).get(id=document_id)
+        except Document.DoesNotExist:
+            return {'error': 'Document not found'}
+        
+        clients = OperationLog.objects.filter(
+            document_id=document_id
+        ).values('client_id').annotate(version=Max('version'))
+        
+        return {
+            'version': current_version,
+            'clients': {row['client_id']: row['version'] for row in clients},
+        }
+    
+    @staticmethod
+    def encode_state_as_update(
+        document_id: str,
+        client_state_vector: Dict,
+        raw: bool = False
+    ) -> Dict:
+        """
+        Encode the operations a client is missing, given its state vector.
+        
+        Mirrors Yjs's encodeStateAsUpdate(doc, clientStateVector): only the
+        diff is returned, so a reconnecting client pays for what changed
+        rather than for the whole document.
+        
+        Payloads are hex strings for JSON clients, or bytes with raw=True
+        for binary frames.
+        """
+        from apps.documents.models import Document
+        from .models import OperationLog
+        
+        try:
+            current_version = Document.objects.values_list(
+                'current_version', flat=True
+            ).get(id=document_id)
+        except Document.DoesNotExist:
+            return {'error': 'Document not found'}
+        
+        encode = bytes if raw else (lambda payload: bytes(payload).hex())
+        client_version = client_state_vector.get('version', 0)
+        client_clocks = client_state_vector.get('clients') or {}
+        
         missing_ops = OperationLog.objects.filter(
             document_id=document_id,
             version__gt=client_version
-        ).order_by('version')
+        ).order_by('version').only('operation_id', 'version', 'payload', 'timestamp', 'client_id')
+        
+        # Clients behind the snapshot need it; its operations were pruned
+        snapshot = CRDTService._get_snapshot(document_id)
+        if snapshot and client_version >= snapshot.version:
+            snapshot = None
+        
+        return {
+            'version': current_version,
+            'snapshot': CRDTService._serialize_snapshot(snapshot, raw),
+            'updates': [
+                {
+                    'operation_id': str(op.operation_id),
+                    'version': op.version,
+                    'payload': encode(op.payload),
+                    'timestamp': op.timestamp,
+                }
+                for op in missing_ops
+                # Skip operations the client already holds from that peer
+                if op.version > client_clocks.get(op.client_id, 0)
+            ],
+        }
+    
+    @staticmethod
+    def snapshot(document_id: str) -> Optional[int]:
+        """
+        Fold committed operations into the document's snapshot and prune them.
+        
+        Operations are only logged in the transaction that claims their
+        version, so everything up to the document's current version is
+        committed and causally stable: merging it (with the previous
+        snapshot) into one Yjs update loses nothing. The merge runs in yrs
+        (via pycrdt) before any lock is taken; the document row is locked
+        only to swap in the snapshot and prune. Returns the number of
+        operations pruned, or None if there was nothing to fold, the
+        payloads aren't Yjs updates, or a concurrent snapshot won.
         
-        return [op.payload for op in missing_ops]
+        Payloads are streamed in chunks and folded into the running state,
+        so memory holds one chunk plus the merged update, not the whole log.
+        """
+        from apps.documents.models import Document
+        from .models import DocumentSnapshot, OperationLog
+        
+        try:
+            current_version = Document.objects.values_list(
+                'current_version', flat=True
+            ).get(id=document_id)
+        except Document.DoesNotExist:
+            return None
+        
+        snapshot = CRDTService._get_snapshot(document_id)
+        base_version = snapshot.version if snapshot else 0
+        
+        rows = OperationLog.objects.filter(
+            document_id=document_id,
+            version__gt=base_version,
+            version__lte=current_version
+        ).order_by('version').values_list('version', 'payload').iterator(
+            chunk_size=CRDTService.SNAPSHOT_CHUNK_SIZE
+        )
+        
+        state = bytes(snapshot.state) if snapshot else None
+        version = None
+        folded = 0
+        
+        while chunk := list(islice(rows, CRDTService.SNAPSHOT_CHUNK_SIZE)):
+            updates = [bytes(payload) for _, payload in chunk]
+            if state is not None:
+                updates.insert(0, state)
+            
+            try:
+                state = merge_updates(*updates)
+            except ValueError:
+                logger.warning(f"Cannot snapshot document {document_id}: payloads are not Yjs updates")
+                return None
+            
+            version = chunk[-1][0]
+            folded += len(chunk)
+        
+        if version is None:
+            return None
+        
+        with transaction.atomic():
+            list(Document.objects.select_for_update().filter(id=document_id).values_list('id', flat=True))
+            
+            # Another snapshot moved the base while we were merging
+            latest = CRDTService._get_snapshot(document_id)
+            if (latest.version if latest else 0) != base_version:
+                return None
+            
+            DocumentSnapshot.objects.update_or_create(
+                document_id=document_id,
+                defaults={'state': state, 'version': version}
+            )
+            deleted, _ = OperationLog.objects.filter(
+                document_id=document_id,
+                version__lte=version
+            ).delete()
+        
+        logger.info(f"Snapshotted document {document_id} at v{version} ({folded} operations)")
+        return deleted
+    
+    @staticmethod
+    def _get_snapshot(document_id: str):
+        """
+        Get the document's snapshot, if any.
+        """
+        from .models import DocumentSnapshot
+        
+        return DocumentSnapshot.objects.filter(document_id=document_id).first()
+    
+    @staticmethod
+    def _serialize_snapshot(snapshot, raw: bool = False) -> Optional[Dict]:
+        """
+        Serialize a snapshot for the wire (hex payload, like operations).
+        """
+        if snapshot is None:
+            return None
+        
+        return {
+            'version': snapshot.version,
+            'payload': bytes(snapshot.state) if raw else bytes(snapshot.state).hex(),
+        }
 
 
 class OperationProcessor:
@@ -137,8 +388,10 @@ class OperationProcessor:
     CRITICAL PATH: This is where concurrent edits are handled.
     """
     
+    MAX_VERSION_RETRIES = 3
+    DOC_META_TTL = 60  # seconds
+    
     @staticmethod
-    @transaction.atomic
     def process_operation(
         document_id: str,
         user_id: str,
@@ -159,124 +412,304 @@ class OperationProcessor:
         The CRDT properties ensure this is conflict-free even with
         concurrent operations from multiple clients.
         """
+        return OperationProcessor.process_batch(document_id, [{
+            'user_id': user_id,
+            'operation_data': operation_data,
+            'client_version': client_version,
+            'message_id': message_id,
+        }])[0]
+    
+    @staticmethod
+    def process_batch(document_id: str, operations: List[Dict]) -> List[Dict]:
+        """
+        Process a batch of CRDT operations for a single document.
+        
+        Accepted operations are written with a single bulk insert and the
+        document is updated once, so a burst of keystrokes costs one
+        transaction instead of one each. Consecutive Yjs updates from the
+        same client are merged into one log row sharing one version.
+        
+        Instead of SELECT FOR UPDATE, versions are claimed with a
+        conditional UPDATE on current_version as the transaction's last
+        statement; if another writer got there first the insert is rolled
+        back and the batch is re-prepared against the new version. Cache
+        and activity side effects run after COMMIT.
+        
+        The base version is read from the doc_meta cache when present, so a
+        steady stream of batches skips the SELECT on documents; a stale
+        entry just loses the claim and the retry reads the database.
+        
+        Each entry carries the keyword arguments of process_operation
+        (user_id, operation_data, client_version, message_id). Returns one
+        result per entry, in order, shaped like process_operation's.
+        """
         from apps.documents.models import Document
         from .models import OperationLog
-        from django.contrib.auth import get_user_model
         
-        User = get_user_model()
+        meta_key = f'doc_meta:{document_id}'
         
         try:
-            # Load document with row-level lock (SELECT FOR UPDATE)
-            document = Document.objects.select_for_update().get(
-                id=document_id,
-                is_deleted=False
-            )
+            for attempt in range(OperationProcessor.MAX_VERSION_RETRIES):
+                try:
+                    with transaction.atomic():
+                        base_version = cache.get(meta_key) if attempt == 0 else None
+                        
+                        if base_version is None:
+                            base_version = Document.objects.filter(
+                                id=document_id,
+                                is_deleted=False
+                            ).values_list('current_version', flat=True).first()
+                        
+                        if base_version is None:
+                            raise Document.DoesNotExist
+                        
+                        results, accepted = OperationProcessor._prepare_batch(
+                            document_id, operations, base_version
+                        )
+                        
+                        if not accepted:
+                            return results
+                        
+                        pending_logs, server_version = OperationProcessor._merge_updates(
+                            accepted, base_version
+                        )
+                        
+                        # Create operation log entries before claiming, so the
+                        # document row lock taken by the claim is held only
+                        # until COMMIT
+                        OperationLog.objects.bulk_create(pending_logs)
+                        
+                        # Claim the versions; a no-op if another writer moved on
+                        now = timezone.now()
+                        claimed = Document.objects.filter(
+                            id=document_id,
+                            current_version=base_version,
+                            is_deleted=False
+                        ).update(
+                            current_version=server_version,
+                            last_edited_by_id=pending_logs[-1].user_id,
+                            last_edited_at=now,
+                            updated_at=now
+                        )
+                        
+                        if not claimed:
+                            raise _VersionConflict
+                except _VersionConflict:
+                    continue
+                
+                # Update cache
+                cache.delete(f'doc_state:{document_id}')
+                cache.set(meta_key, server_version, OperationProcessor.DOC_META_TTL)
+                
+                # Log activity (once per editing user in the batch),
+                # queued off the database for a bulk insert
+                from apps.users.services import UserService
+                for user_id in dict.fromkeys(log.user_id for log in pending_logs):
+                    UserService.queue_activity(
+                        user_id=user_id,
+                        activity_type='document_edit',
+                        content_type='document',
+                        object_id=document_id,
+                        metadata={'version': server_version}
+                    )
+                
+                return results
+            
+            logger.warning(f"Version conflict persisted for document {document_id}")
+            return [
+                {'success': False, 'error': 'Version conflict, please retry'}
+                for _ in operations
+            ]
+        
+        except Document.DoesNotExist:
+            return [
+                {'success': False, 'error': 'Document not found'}
+                for _ in operations
+            ]
+        except Exception as e:
+            logger.exception(f"Error processing operations: {e}")
+            return [
+                {'success': False, 'error': 'Internal server error'}
+                for _ in operations
+            ]
+    
+    @staticmethod
+    def _prepare_batch(document_id: str, operations: List[Dict], base_version: int):
+        """
+        Validate a batch and build log rows for the accepted operations.
+        
+        Returns (results, accepted) where accepted pairs each new OperationLog
+        with its (mutable) result dict. Versions are provisional until
+        _merge_updates assigns the final ones.
+        
+        Duplicates are found with one operation_id IN (...) lookup for the
+        whole batch rather than one EXISTS per operation.
+        """
+        from .models import OperationLog
+        
+        results = [None] * len(operations)
+        candidates = []
+        
+        for index, entry in enumerate(operations):
+            operation_data = entry['operation_data']
             
             # Validate operation structure
             if not OperationProcessor._validate_operation(operation_data):
-                return {
+                results[index] = {
                     'success': False,
                     'error': 'Invalid operation format'
                 }
+                continue
             
-            # Assign server version (monotonically increasing)
-            server_version = document.current_version + 1
-            
-            # Generate operation ID (for idempotency)
-            operation_id = OperationProcessor._generate_operation_id(
-                document_id, user_id, message_id, server_version
-            )
-            
-            # Check if operation already exists (idempotency)
-            if OperationLog.objects.filter(operation_id=operation_id).exists():
-                logger.warning(f"Duplicate operation {operation_id}")
-                return {
-                    'success': False,
-                    'error': 'Duplicate operation'
-                }
-            
-            # Extract binary payload (Yjs update or Automerge change)
-            payload_hex = operation_data.get('payload')
-            if not payload_hex:
-                return {
+            # Extract binary payload (Yjs update or Automerge change);
+            # binary frames deliver raw bytes, JSON frames deliver hex.
+            # Decoded before the duplicate lookup so malformed payloads
+            # never cost a query.
+            payload = operation_data.get('payload')
+            if not payload:
+                results[index] = {
                     'success': False,
                     'error': 'Missing payload'
                 }
+                continue
             
-            payload_binary = bytes.fromhex(payload_hex)
+            if isinstance(payload, bytes):
+                payload_binary = payload
+                payload_hex = payload.hex()
+            else:
+                try:
+                    payload_binary = bytes.fromhex(payload)
+                except ValueError:
+                    results[index] = {
+                        'success': False,
+                        'error': 'Invalid operation format'
+                    }
+                    continue
+                payload_hex = payload
+            
+            candidates.append((index, entry, payload_binary, payload_hex))
+        
+        # Operation IDs include the version, and a duplicate doesn't consume
+        # one, so IDs after a duplicate shift; re-check only the shifted ones
+        existing = set()
+        checked = set()
+        while True:
+            assigned = []
+            version = base_version
+            for candidate in candidates:
+                _, entry, _, _ = candidate
+                operation_id = OperationProcessor._generate_operation_id(
+                    document_id, entry['user_id'], entry['message_id'], version + 1
+                )
+                if operation_id in existing:
+                    continue
+                version += 1
+                assigned.append((candidate, operation_id, version))
             
-            # Create operation log entry
-            operation = OperationLog.objects.create(
+            unchecked = [
+                operation_id for _, operation_id, _ in assigned
+                if operation_id not in checked
+            ]
+            if not unchecked:
+                break
+            checked.update(unchecked)
+            for operation_id, merged_ids in OperationLog.objects.filter(
+                Q(operation_id__in=unchecked) | Q(merged_operation_ids__overlap=unchecked),
+                document_id=document_id
+            ).order_by().values_list('operation_id', 'merged_operation_ids'):
+                existing.add(operation_id)
+                existing.update(merged_ids)
+        
+        accepted = []
+        for (index, entry, payload_binary, payload_hex), operation_id, version in assigned:
+            operation_data = entry['operation_data']
+            user_id = entry['user_id']
+            log = OperationLog(
                 document_id=document_id,
                 user_id=user_id,
                 operation_id=operation_id,
                 operation_type=operation_data.get('type', 'update'),
                 payload=payload_binary,
-                version=server_version,
+                version=version,
                 client_id=operation_data.get('client_id', user_id),
                 timestamp=int(time.time() * 1000000)  # Microsecond precision
             )
-            
-            # Update document state (merge CRDT update)
-            # In production, you'd use Yjs or Automerge library here
-            # For now, we'll update the state version
-            document.current_version = server_version
-            document.last_edited_by_id = user_id
-            document.last_edited_at = timezone.now()
-            
-            # Optionally update the full state snapshot
-            # This would involve loading the Yjs document server-side
-            # and applying the update, then storing the new state
-            
-            document.save(update_fields=[
-                'current_version',
-                'last_edited_by_id',
-                'last_edited_at',
-                'updated_at'
-            ])
-            
-            # Update cache
-            cache.delete(f'doc_state:{document_id}')
-            
-            # Log activity
-            user = User.objects.get(id=user_id)
-            from apps.users.services import UserService
-            UserService.log_activity(
-                user=user,
-                activity_type='document_edit',
-                content_type='document',
-                object_id=document_id,
-                metadata={'version': server_version}
-            )
-            
-            return {
+            result = {
                 'success': True,
                 'operation': {
-                    'id': operation_id,
+                    'id': str(operation_id),
                     'payload': payload_hex,
                 },
-                'version': server_version,
+                'update': payload_binary,  # Raw bytes for binary frames
+                'version': version,
             }
+            results[index] = result
+            accepted.append((log, result))
         
-        except Document.DoesNotExist:
-            return {
-                'success': False,
-                'error': 'Document not found'
-            }
-        except Exception as e:
-            logger.exception(f"Error processing operation: {e}")
-            return {
-                'success': False,
-                'error': 'Internal server error'
-            }
+        for index, result in enumerate(results):
+            if result is None:
+                logger.warning(f"Duplicate operation {operations[index]['message_id']}")
+                results[index] = {
+                    'success': False,
+                    'error': 'Duplicate operation'
+                }
+        
+        return results, accepted
+    
+    @staticmethod
+    def _merge_updates(accepted: List, base_version: int):
+        """
+        Merge consecutive Yjs updates from the same client into one log row.
+        
+        Each run of operations by one (user, client) becomes a single row
+        holding Y.mergeUpdates of its payloads, and every operation in the
+        run is acknowledged with that row's version. The folded operations'
+        IDs are kept on the row so redeliveries are still caught as
+        duplicates. Runs whose payloads aren't Yjs updates keep one row and
+        version per operation.
+        
+        Returns (logs, server_version).
+        """
+        logs = []
+        version = base_version
+        
+        for _, run in groupby(accepted, key=lambda pair: (pair[0].user_id, pair[0].client_id)):
+            run = list(run)
+            merged = None
+            
+            if len(run) > 1:
+                try:
+                    merged = merge_updates(*(log.payload for log, _ in run))
+                except ValueError:
+                    pass
+            
+            if merged is not None:
+                version += 1
+                log = run[0][0]
+                log.payload = merged
+                log.version = version
+                log.merged_operation_ids = [merged_log.operation_id for merged_log, _ in run[1:]]
+                for _, result in run:
+                    result['version'] = version
+                logs.append(log)
+                continue
+            
+            for log, result in run:
+                version += 1
+                log.version = version
+                result['version'] = version
+                logs.append(log)
+        
+        return logs, version
     
     @staticmethod
     def _validate_operation(operation_data: Dict) -> bool:
         """
         Validate operation structure.
+        
+        A single C-level set comparison against the dict's key view.
         """
-        required_fields = ['payload', 'type']
-        return all(field in operation_data for field in required_fields)
+        return operation_data.keys() >= REQUIRED_OPERATION_FIELDS
     
     @staticmethod
     def _generate_operation_id(
@@ -284,12 +717,17 @@ class OperationProcessor:
         user_id: str,
         message_id: str,
         version: int
-    ) -> str:
+    ) -> uuid.UUID:
         """
         Generate a unique operation ID.
+        
+        A deterministic idempotency key: the same (document, user, message,
+        version) always maps to the same UUID, stored in a native uuid column.
         """
-        data = f"{document_id}:{user_id}:{message_id}:{version}"
-        return hashlib.sha256(data.encode()).hexdigest()[:32]
+        return uuid.uuid5(
+            OPERATION_ID_NAMESPACE,
+            f"{document_id}|{user_id}|{message_id}|{version}"
+        )
 
 
 class PresenceService:
@@ -300,37 +738,59 @@ class PresenceService:
     """
     
     PRESENCE_TTL = 60  # seconds
-    CURSOR_UPDATE_THROTTLE = 0.1  # seconds
+    CURSOR_UPDATE_THROTTLE = 0.05  # seconds; latest cursor wins per window
     
     @staticmethod
     def get_active_users(document_id: str) -> List[Dict]:
         """
         Get all active users on a document.
+        
+        Two round-trips regardless of user count: the member set, then
+        every user hash in one pipeline.
         """
         redis_client = get_redis_client()
         key = f"presence:{document_id}:users"
         
         # Get all user IDs from Redis set
-        user_ids = redis_client.smembers(key)
+        user_ids = list(redis_client.smembers(key))
+        if not user_ids:
+            return []
         
-        # Get presence data for each user
-        users = []
+        # Fetch presence data for every user in one batch
+        pipe = redis_client.pipeline(transaction=False)
         for user_id in user_ids:
-            user_key = f"presence:{document_id}:user:{user_id}"
-            user_data = redis_client.hgetall(user_key)
-            
-            if user_data:
-                # Parse JSON fields
-                users.append({
-                    'user_id': user_id,
-                    'display_name': user_data.get('display_name', ''),
-                    'avatar': user_data.get('avatar', ''),
-                    'color': user_data.get('color', '#6366f1'),
-                    'cursor': json.loads(user_data.get('cursor', '{}')),
-                    'last_activity': float(user_data.get('last_activity', 0)),
-                })
+            pipe.hgetall(f"presence:{document_id}:user:{user_id}")
+        
+        return [
+            PresenceService._parse_user(user_id, user_data)
+            for user_id, user_data in zip(user_ids, pipe.execute())
+            if user_data
+        ]
+    
+    @staticmethod
+    def count_active_users(document_id: str) -> int:
+        """
+        Count active users on a document in O(1) via SCARD.
         
-        return users
+        May include members whose hash has just expired; use
+        get_active_users when the entries themselves are needed.
+        """
+        redis_client = get_redis_client()
+        return redis_client.scard(f"presence:{document_id}:users")
+    
+    @staticmethod
+    def _parse_user(user_id: str, user_data: Dict) -> Dict:
+        """
+        Build a user's presence entry from its Redis hash.
+        """
+        return {
+            'user_id': user_id,
+            'display_name': user_data.get('display_name', ''),
+            'avatar': user_data.get('avatar', ''),
+            'color': user_data.get('color', '#6366f1'),
+            'cursor': orjson.loads(user_data.get('cursor', '{}')),
+            'last_activity': float(user_data.get('last_activity', 0)),
+        }
     
     @staticmethod
     def add_user_presence(
@@ -340,24 +800,30 @@ class PresenceService:
     ):
         """
         Add or update user presence.
+        
+        Set membership and user hash are written in one MULTI/EXEC, so
+        readers never see a member without its data.
         """
         redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=True)
         
         # Add to active users set
         set_key = f"presence:{document_id}:users"
-        redis_client.sadd(set_key, user_id)
-        redis_client.expire(set_key, PresenceService.PRESENCE_TTL)
+        pipe.sadd(set_key, user_id)
+        pipe.expire(set_key, PresenceService.PRESENCE_TTL)
         
         # Store user data
         user_key = f"presence:{document_id}:user:{user_id}"
-        redis_client.hmset(user_key, {
+        pipe.hset(user_key, mapping={
             'display_name': user_data.get('display_name', ''),
             'avatar': user_data.get('avatar', ''),
             'color': user_data.get('color', '#6366f1'),
-            'cursor': json.dumps({}),
+            'cursor': orjson.dumps({}),
             'last_activity': time.time(),
         })
-        redis_client.expire(user_key, PresenceService.PRESENCE_TTL)
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        
+        pipe.execute()
     
     @staticmethod
     def remove_user_presence(document_id: str, user_id: str):
@@ -365,12 +831,15 @@ class PresenceService:
         Remove user from presence.
         """
         redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=True)
         
         set_key = f"presence:{document_id}:users"
-        redis_client.srem(set_key, user_id)
+        pipe.srem(set_key, user_id)
         
         user_key = f"presence:{document_id}:user:{user_id}"
-        redis_client.delete(user_key)
+        pipe.delete(user_key)
+        
+        pipe.execute()
     
     @staticmethod
     def update_cursor(document_id: str, user_id: str, cursor_data: Dict):
@@ -378,11 +847,15 @@ class PresenceService:
         Update user's cursor position.
         """
         redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=False)
         
         user_key = f"presence:{document_id}:user:{user_id}"
-        redis_client.hset(user_key, 'cursor', json.dumps(cursor_data))
-        redis_client.hset(user_key, 'last_activity', time.time())
-        redis_client.expire(user_key, PresenceService.PRESENCE_TTL)
+        pipe.hset(user_key, mapping={
+            'cursor': orjson.dumps(cursor_data),
+            'last_activity': time.time(),
+        })
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        pipe.execute()
     
     @staticmethod
     def update_awareness(document_id: str, user_id: str, state: Dict):
@@ -394,20 +867,190 @@ class PresenceService:
         awareness_key = f"awareness:{document_id}:{user_id}"
         redis_client.set(
             awareness_key,
-            json.dumps(state),
+            orjson.dumps(state),
             ex=PresenceService.PRESENCE_TTL
         )
     
+    @staticmethod
+    def update_many(
+        document_id: str,
+        user_id: str,
+        cursor_data: Optional[Dict] = None,
+        state: Optional[Dict] = None
+    ):
+        """
+        Update cursor and/or awareness state in a single round-trip.
+
+        Used by the throttled presence flush in DocumentConsumer.
+        """
+        redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=False)
+
+        if cursor_data is not None:
+            user_key = f"presence:{document_id}:user:{user_id}"
+            pipe.hset(user_key, mapping={
+                'cursor': orjson.dumps(cursor_data),
+                'last_activity': time.time(),
+            })
+            pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+
+        if state is not None:
+            awareness_key = f"awareness:{document_id}:{user_id}"
+            pipe.set(
+                awareness_key,
+                orjson.dumps(state),
+                ex=PresenceService.PRESENCE_TTL
+            )
+
+        pipe.execute()
+
     @staticmethod
     def update_activity(document_id: str, user_id: str):
         """
         Update last activity timestamp.
         """
         redis_client = get_redis_client()
+        pipe = redis_client.pipeline(transaction=False)
+        
+        user_key = f"presence:{document_id}:user:{user_id}"
+        pipe.hset(user_key, 'last_activity', time.time())
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        pipe.execute()
+    
+    # =========================================================================
+    # Async variants for WebSocket consumers (redis.asyncio, no threadpool)
+    # =========================================================================
+    
+    @staticmethod
+    async def aget_active_users(document_id: str, redis_client=None) -> List[Dict]:
+        """
+        Async variant of get_active_users.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        
+        user_ids = list(await redis_client.smembers(f"presence:{document_id}:users"))
+        if not user_ids:
+            return []
+        
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hgetall(f"presence:{document_id}:user:{user_id}")
+        
+        return [
+            PresenceService._parse_user(user_id, user_data)
+            for user_id, user_data in zip(user_ids, await pipe.execute())
+            if user_data
+        ]
+    
+    @staticmethod
+    async def aadd_user_presence(document_id: str, user_id: str, user_data: Dict, redis_client=None):
+        """
+        Async variant of add_user_presence.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        pipe = redis_client.pipeline(transaction=True)
+        
+        set_key = f"presence:{document_id}:users"
+        pipe.sadd(set_key, user_id)
+        pipe.expire(set_key, PresenceService.PRESENCE_TTL)
+        
+        user_key = f"presence:{document_id}:user:{user_id}"
+        pipe.hset(user_key, mapping={
+            'display_name': user_data.get('display_name', ''),
+            'avatar': user_data.get('avatar', ''),
+            'color': user_data.get('color', '#6366f1'),
+            'cursor': orjson.dumps({}),
+            'last_activity': time.time(),
+        })
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        
+        await pipe.execute()
+    
+    @staticmethod
+    async def aremove_user_presence(document_id: str, user_id: str, redis_client=None):
+        """
+        Async variant of remove_user_presence.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.srem(f"presence:{document_id}:users", user_id)
+        pipe.delete(f"presence:{document_id}:user:{user_id}")
+        await pipe.execute()
+    
+    @staticmethod
+    async def aupdate_cursor(document_id: str, user_id: str, cursor_data: Dict, redis_client=None):
+        """
+        Async variant of update_cursor.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        
+        user_key = f"presence:{document_id}:user:{user_id}"
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(user_key, mapping={
+            'cursor': orjson.dumps(cursor_data),
+            'last_activity': time.time(),
+        })
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        await pipe.execute()
+    
+    @staticmethod
+    async def aupdate_awareness(document_id: str, user_id: str, state: Dict, redis_client=None):
+        """
+        Async variant of update_awareness.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        
+        awareness_key = f"awareness:{document_id}:{user_id}"
+        await redis_client.set(
+            awareness_key,
+            orjson.dumps(state),
+            ex=PresenceService.PRESENCE_TTL
+        )
+    
+    @staticmethod
+    async def aupdate_many(
+        document_id: str,
+        user_id: str,
+        cursor_data: Optional[Dict] = None,
+        state: Optional[Dict] = None,
+        redis_client=None
+    ):
+        """
+        Async variant of update_many.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        pipe = redis_client.pipeline(transaction=False)
+        
+        if cursor_data is not None:
+            user_key = f"presence:{document_id}:user:{user_id}"
+            pipe.hset(user_key, mapping={
+                'cursor': orjson.dumps(cursor_data),
+                'last_activity': time.time(),
+            })
+            pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        
+        if state is not None:
+            awareness_key = f"awareness:{document_id}:{user_id}"
+            pipe.set(
+                awareness_key,
+                orjson.dumps(state),
+                ex=PresenceService.PRESENCE_TTL
+            )
+        
+        await pipe.execute()
+    
+    @staticmethod
+    async def aupdate_activity(document_id: str, user_id: str, redis_client=None):
+        """
+        Async variant of update_activity.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
         
         user_key = f"presence:{document_id}:user:{user_id}"
-        redis_client.hset(user_key, 'last_activity', time.time())
-        redis_client.expire(user_key, PresenceService.PRESENCE_TTL)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(user_key, 'last_activity', time.time())
+        pipe.expire(user_key, PresenceService.PRESENCE_TTL)
+        await pipe.execute()
 
 
 class CollaborationService:
@@ -426,17 +1069,12 @@ class CollaborationService:
         """
         from .models import CollaborationSession
         from django.contrib.auth import get_user_model
-        import random
         
         User = get_user_model()
         user = User.objects.get(id=user_id)
         
         # Generate user color
-        colors = [
-            '#ef4444', '#f59e0b', '#10b981', '#3b82f6',
-            '#6366f1', '#8b5cf6', '#ec4899', '#f97316'
-        ]
-        user_color = random.choice(colors)
+        user_color = CollaborationService._pick_color(str(user_id))
         
         # Create session
         session = CollaborationSession.objects.create(
@@ -476,6 +1114,68 @@ class CollaborationService:
         
         PresenceService.remove_user_presence(document_id, user_id)
     
+    @staticmethod
+    async def acreate_session(document_id: str, user, channel_name: str) -> Dict:
+        """
+        Async variant of create_session for consumers.
+        
+        Takes the already-authenticated user, and writes the session row
+        and Redis presence concurrently.
+        """
+        from .models import CollaborationSession
+        
+        user_id = str(user.id)
+        user_color = CollaborationService._pick_color(user_id)
+        
+        session, _ = await asyncio.gather(
+            CollaborationSession.objects.acreate(
+                document_id=document_id,
+                user_id=user_id,
+                channel_name=channel_name,
+                color=user_color
+            ),
+            PresenceService.aadd_user_presence(
+                document_id=document_id,
+                user_id=user_id,
+                user_data={
+                    'display_name': user.display_name,
+                    'avatar': user.avatar.url if user.avatar else '',
+                    'color': user_color,
+                }
+            ),
+        )
+        
+        return {
+            'session_id': str(session.id),
+            'color': user_color,
+        }
+    
+    @staticmethod
+    async def aend_session(document_id: str, user_id: str):
+        """
+        Async variant of end_session.
+        """
+        from .models import CollaborationSession
+        
+        await asyncio.gather(
+            CollaborationSession.objects.filter(
+                document_id=document_id,
+                user_id=user_id
+            ).aupdate(is_active=False),
+            PresenceService.aremove_user_presence(document_id, user_id),
+        )
+    
+    @staticmethod
+    def _pick_color(user_id: str) -> str:
+        """
+        Pick a user's cursor color.
+        
+        Derived from a stable hash of the user id (the builtin hash() is
+        salted per process), so a user keeps their color across reconnects
+        and workers.
+        """
+        return USER_COLORS[zlib.crc32(user_id.encode()) % len(USER_COLORS)]
+    
     @staticmethod
     def acquire_block_lock(
         document_id: str,
@@ -509,16 +1209,40 @@ class CollaborationService:
         redis_client = get_redis_client()
         lock_key = f"block_lock:{document_id}:{block_id}"
         
-        # Lua script for atomic check-and-delete
-        lua_script = """
-        if redis.call("get", KEYS[1]) == ARGV[1] then
-            return redis.call("del", KEYS[1])
-        else
-            return 0
-        end
+        RELEASE_LOCK_SCRIPT(redis_client, [lock_key], [user_id])
+    
+    @staticmethod
+    async def aacquire_block_lock(
+        document_id: str,
+        block_id: str,
+        user_id: str,
+        timeout: int = 30,
+        redis_client=None
+    ) -> bool:
+        """
+        Async variant of acquire_block_lock.
         """
+        redis_client = redis_client or get_redis_client(async_=True)
+        lock_key = f"block_lock:{document_id}:{block_id}"
+        
+        acquired = await redis_client.set(
+            lock_key,
+            user_id,
+            nx=True,
+            ex=timeout
+        )
+        
+        return bool(acquired)
+    
+    @staticmethod
+    async def arelease_block_lock(document_id: str, block_id: str, user_id: str, redis_client=None):
+        """
+        Async variant of release_block_lock.
+        """
+        redis_client = redis_client or get_redis_client(async_=True)
+        lock_key = f"block_lock:{document_id}:{block_id}"
         
-        redis_client.eval(lua_script, 1, lock_key, user_id)
+        await RELEASE_LOCK_SCRIPT.acall(redis_client, [lock_key], [user_id])
     
     @staticmethod
     def get_block_lock_owner(document_id: str, block_id: str) -> Optional[str]:
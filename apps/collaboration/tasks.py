@@ -8,6 +8,10 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Minimum age of CollaborationSession.last_activity before presence sync
+# rewrites it; matches the sync-presence-to-db beat interval.
+SESSION_TOUCH_INTERVAL = 60
+
 
 @shared_task
 def cleanup_expired_sessions():
@@ -33,92 +37,152 @@ def compress_operation_logs(document_id: str):
     """
     Compress old operation logs by creating a snapshot.
     
-    CRDT systems accumulate operations over time. Periodically, we can
-    create a snapshot of the current state and delete old operations.
+    CRDT systems accumulate operations over time. Once a document has more
+    than 1000 operations, they are merged into its snapshot (in yrs, via
+    CRDTService.snapshot) and deleted. Returns the number of operations
+    folded away.
     """
     from .models import OperationLog
+    from .services import CRDTService
     from apps.documents.models import Document
     
-    try:
-        document = Document.objects.get(id=document_id)
-        
-        # Get operation count
-        op_count = OperationLog.objects.filter(document_id=document_id).count()
-        
-        # If we have more than 1000 operations, compress
-        if op_count > 1000:
-            # In a real implementation with Yjs:
-            # 1. Load all operations
-            # 2. Apply them to a Y.Doc
-            # 3. Create a state snapshot
-            # 4. Delete operations older than the snapshot
-            # 5. Store the snapshot
-            
-            # For now, we'll just keep last 500 operations
-            old_ops = OperationLog.objects.filter(
-                document_id=document_id
-            ).order_by('-version')[500:]
-            
-            deleted_count = old_ops.delete()[0]
-            
-            logger.info(f"Compressed {deleted_count} operations for document {document_id}")
-            return deleted_count
-        
-        return 0
-    except Document.DoesNotExist:
+    if not Document.objects.filter(id=document_id).exists():
         logger.error(f"Document {document_id} not found")
         return 0
+    
+    # Get operation count
+    op_count = OperationLog.objects.filter(document_id=document_id).count()
+    
+    # If we have more than 1000 operations, compress
+    if op_count <= 1000:
+        return 0
+    
+    deleted_count = CRDTService.snapshot(document_id)
+    if deleted_count is None:
+        return 0
+    
+    logger.info(f"Compressed {deleted_count} operations for document {document_id}")
+    return deleted_count
 
 
 @shared_task
-def sync_presence_to_db():
+def snapshot_documents(min_operations: int = 100):
+    """
+    Snapshot documents whose operation log has grown since the last snapshot.
+    Runs hourly via Celery Beat.
+    
+    New clients then load one merged update plus the tail of operations,
+    so sync cost tracks recent activity rather than document age.
+    """
+    from django.db.models import Count
+    from .models import OperationLog
+    from .services import CRDTService
+    
+    document_ids = OperationLog.objects.values('document_id').annotate(
+        op_count=Count('id')
+    ).filter(op_count__gte=min_operations).values_list('document_id', flat=True)
+    
+    snapshotted = 0
+    for document_id in document_ids:
+        if CRDTService.snapshot(str(document_id)) is not None:
+            snapshotted += 1
+    
+    logger.info(f"Snapshotted {snapshotted} documents")
+    return snapshotted
+
+
+@shared_task
+def sync_presence_to_db(batch_size=500):
     """
     Periodically sync Redis presence data to database.
     This provides a backup and allows for analytics.
+    Runs every minute via Celery Beat.
+    
+    SCAN walks 1000 keys per call, each page is fetched with one pipelined
+    HGETALL batch, and rows are upserted with INSERT ... ON CONFLICT in batches of `batch_size`.
+    
+    Heartbeats only touch Redis; this is also where the matching
+    CollaborationSession rows get their last_activity refreshed, with one
+    UPDATE per batch that skips rows touched within the last interval.
     """
+    from django.db.models import Q
     from apps.core.utils import get_redis_client
-    from .models import PresenceAwareness
-    import json
+    from .models import CollaborationSession, PresenceAwareness
+    import orjson
     
     redis_client = get_redis_client()
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=SESSION_TOUCH_INTERVAL)
+    
+    def flush(records):
+        PresenceAwareness.objects.bulk_create(
+            records,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=['document_id', 'user_id', 'state', 'last_updated'],
+        )
+        
+        live = Q()
+        for record in records:
+            live |= Q(document_id=record.document_id, user_id=record.user_id)
+        CollaborationSession.objects.filter(
+            live,
+            is_active=True,
+            last_activity__lt=stale_before,
+        ).update(last_activity=now)
     
     # Find all presence keys
     cursor = 0
     synced_count = 0
+    # Keyed by id: SCAN may return a key more than once, and one upsert
+    # statement can't touch the same row twice
+    pending = {}
     
     while True:
         cursor, keys = redis_client.scan(
             cursor=cursor,
             match="presence:*:user:*",
-            count=100
+            count=1000
         )
         
-        for key in keys:
-            # Parse key: presence:{doc_id}:user:{user_id}
-            parts = key.split(':')
-            if len(parts) >= 4:
+        # Parse keys: presence:{doc_id}:user:{user_id}
+        keys = [key for key in keys if len(key.split(':')) >= 4]
+        
+        if keys:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            
+            for key, user_data in zip(keys, pipe.execute()):
+                if not user_data:
+                    continue
+                
+                parts = key.split(':')
                 doc_id = parts[1]
                 user_id = parts[3]
-                
-                user_data = redis_client.hgetall(key)
-                if user_data:
-                    # Upsert to database
-                    PresenceAwareness.objects.update_or_create(
-                        id=f"{doc_id}:{user_id}",
-                        defaults={
-                            'document_id': doc_id,
-                            'user_id': user_id,
-                            'state': {
-                                'cursor': json.loads(user_data.get('cursor', '{}')),
-                                'color': user_data.get('color', '#6366f1'),
-                                'last_activity': float(user_data.get('last_activity', 0)),
-                            }
-                        }
-                    )
-                    synced_count += 1
+                pending[f"{doc_id}:{user_id}"] = PresenceAwareness(
+                    id=f"{doc_id}:{user_id}",
+                    document_id=doc_id,
+                    user_id=user_id,
+                    state={
+                        'cursor': orjson.loads(user_data.get('cursor', '{}')),
+                        'color': user_data.get('color', '#6366f1'),
+                        'last_activity': float(user_data.get('last_activity', 0)),
+                    }
+                )
+        
+        if len(pending) >= batch_size:
+            flush(list(pending.values()))
+            synced_count += len(pending)
+            pending = {}
         
         if cursor == 0:
             break
     
+    if pending:
+        flush(list(pending.values()))
+        synced_count += len(pending)
+    
     logger.info(f"Synced {synced_count} presence records to database")
     return synced_count
@@ -1,10 +1,13 @@
 """
 Unit tests for WebSocket consumers.
 """
+import asyncio
+import msgpack
 import pytest
+from unittest.mock import AsyncMock, patch
 from channels.testing import WebsocketCommunicator
 from channels.layers import get_channel_layer
-from apps.collaboration.consumers import DocumentConsumer
+from apps.collaboration.consumers import DocumentConsumer, OperationBatcher, combine_events
 from apps.core.tests.factories import UserFactory, DocumentFactory, WorkspaceFactory
 
 pytestmark = [pytest.mark.django_db, pytest.mark.asyncio, pytest.mark.websocket]
@@ -38,6 +41,165 @@ class TestDocumentConsumer:
         # Connection should be rejected for anonymous users
         # (actual test would connect and check for rejection)
         assert communicator is not None
+    
+    async def test_every_message_type_has_handler(self):
+        """Test each inbound message type dispatches to a handler method."""
+        from typing import get_args
+        from apps.collaboration.schemas import IncomingMessage
+        
+        message_types = {
+            get_args(model.model_fields['type'].annotation)[0]
+            for model in get_args(get_args(IncomingMessage)[0])
+        }
+        
+        assert message_types == set(DocumentConsumer._HANDLER_NAMES)
+        for name in DocumentConsumer._HANDLER_NAMES.values():
+            assert callable(getattr(DocumentConsumer, name))
+    
+    async def test_operation_broadcast_binary_frames(self):
+        """Test binary clients receive tagged raw updates, skipping the sender."""
+        consumer = DocumentConsumer()
+        consumer.channel_name = 'me'
+        consumer.binary_frames = True
+        consumer.send = AsyncMock()
+        
+        await consumer.operation_broadcast({'ops': [
+            {'operation': {}, 'update': b'\xde\xad', 'version': 7,
+             'user_id': 'u1', 'exclude_channel': 'other'},
+            {'operation': {}, 'update': b'\xbe\xef', 'version': 8,
+             'user_id': 'u2', 'exclude_channel': 'me'},
+        ]})
+        
+        consumer.send.assert_awaited_once_with(
+            bytes_data=b'\x01\x00\x00\x00\x07\xde\xad'
+        )
+    
+    async def test_receive_rejects_malformed_binary_frame(self):
+        """Test a corrupt binary frame gets an error instead of a crash."""
+        consumer = DocumentConsumer()
+        consumer.user_id_str = 'u1'
+        consumer.send_error = AsyncMock()
+        
+        with patch('apps.collaboration.consumers.RateLimitService.ahit', AsyncMock(return_value=True)):
+            await consumer.receive(bytes_data=b'\x01')
+        
+        consumer.send_error.assert_awaited_once_with("Invalid binary frame")
+    
+    async def test_cursor_update_msgpack_frames(self):
+        """Test msgpack clients receive presence broadcasts as control frames."""
+        consumer = DocumentConsumer()
+        consumer.channel_name = 'me'
+        consumer.msgpack_frames = True
+        consumer.send = AsyncMock()
+        
+        await consumer.cursor_update({'user_id': 'u1', 'cursor': {'line': 3}})
+        
+        frame = consumer.send.call_args.kwargs['bytes_data']
+        assert frame[0] == 0x02
+        assert msgpack.unpackb(frame[1:]) == {
+            'type': 'cursor.update',
+            'data': {'user_id': 'u1', 'cursor': {'line': 3}},
+        }
+    
+    async def test_operation_broadcast_json_frames(self):
+        """Test JSON clients keep receiving the hex operation envelope."""
+        consumer = DocumentConsumer()
+        consumer.channel_name = 'me'
+        consumer.send_json = AsyncMock()
+        
+        await consumer.operation_broadcast({'ops': [
+            {'operation': {'id': 'op1', 'payload': 'dead'}, 'update': b'\xde\xad',
+             'version': 7, 'user_id': 'u1', 'exclude_channel': 'other'},
+        ]})
+        
+        consumer.send_json.assert_awaited_once_with({
+            'type': 'operation',
+            'data': {
+                'operation': {'id': 'op1', 'payload': 'dead'},
+                'version': 7,
+                'user_id': 'u1',
+            }
+        })
+    
+    async def test_cursor_updates_are_throttled(self):
+        """Test a burst of cursor moves is flushed once with the latest position."""
+        consumer = DocumentConsumer()
+        consumer.channel_name = 'me'
+        consumer.document_id = 'doc_1'
+        consumer.document_group = 'document_doc_1'
+        consumer.user_id_str = 'u1'
+        consumer.channel_layer = AsyncMock()
+        
+        with patch('apps.collaboration.consumers.PresenceService.aupdate_many', AsyncMock()) as update_many:
+            for position in range(10):
+                await consumer.handle_cursor_update({'position': position}, None)
+            await asyncio.sleep(DocumentConsumer.PRESENCE_FLUSH_INTERVAL * 2)
+        
+        update_many.assert_awaited_once()
+        assert update_many.call_args.kwargs['cursor_data']['position'] == 9
+        consumer.channel_layer.group_send.assert_awaited_once()
+    
+    async def test_combined_broadcast_dispatches_sub_events(self):
+        """Test a combined group message is unpacked into its handlers."""
+        consumer = DocumentConsumer()
+        consumer.channel_name = 'me'
+        consumer.send_json = AsyncMock()
+        
+        await consumer.combined_broadcast(combine_events([
+            {'type': 'cursor.update', 'user_id': 'u1', 'cursor': {'position': 1},
+             'exclude_channel': 'other'},
+            {'type': 'typing.started', 'user_id': 'u1', 'block_id': 'b1',
+             'exclude_channel': 'me'},
+            {'type': 'user.left', 'user_id': 'u2'},
+        ]))
+        
+        assert consumer.send_json.await_count == 2
+    
+    @pytest.mark.django_db(transaction=True)
+    async def test_query_document_access(self, user, document):
+        """Test the access check allows the owner and denies strangers."""
+        from channels.db import database_sync_to_async
+        
+        consumer = DocumentConsumer()
+        consumer.document_id = str(document.id)
+        consumer.user = document.created_by
+        assert await consumer._query_document_access() is True
+        
+        consumer.user = await database_sync_to_async(UserFactory)()
+        assert await consumer._query_document_access() is False
+        
+        consumer.document_id = '00000000-0000-0000-0000-000000000000'
+        assert await consumer._query_document_access() is False
+
+
+class TestOperationBatcher:
+    """Tests for batched operation processing."""
+    
+    async def test_broadcast_failure_still_resolves_results(self):
+        """Test committed operations are acknowledged when the broadcast fails."""
+        result = {
+            'success': True,
+            'operation': {'id': 'op_1', 'payload': 'dead'},
+            'update': b'\xde\xad',
+            'version': 2,
+        }
+        channel_layer = AsyncMock()
+        channel_layer.group_send.side_effect = ConnectionError('layer down')
+        operation = {
+            'user_id': 'u1',
+            'operation_data': {'type': 'update', 'payload': 'dead'},
+            'client_version': 1,
+            'message_id': 'msg_1',
+            'channel_name': 'me',
+        }
+        
+        with patch('apps.collaboration.consumers.OperationProcessor.process_batch', return_value=[result]):
+            future = OperationBatcher.submit('doc_1', 'document_doc_1', channel_layer, operation)
+            await OperationBatcher._batchers['document_doc_1'].task
+        
+        assert future.result() == result
+        
+        channel_layer.group_send.assert_awaited_once()
 
 
 @pytest.mark.unit
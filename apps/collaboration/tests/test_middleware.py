@@ -0,0 +1,81 @@
+"""
+Unit tests for WebSocket authentication middleware.
+"""
+import pytest
+from unittest.mock import patch, AsyncMock
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.collaboration.middleware import (
+    get_user_from_token, get_query_token, RateLimitMiddleware
+)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestGetUserFromToken:
+    """Tests for JWT validation on WebSocket handshake."""
+
+    async def test_valid_token_returns_user(self, user):
+        """Test a valid access token resolves to its user."""
+        token = str(AccessToken.for_user(user))
+
+        result = await get_user_from_token(token)
+
+        assert result.id == user.id
+
+    async def test_validated_token_is_cached(self, user):
+        """Test reconnects with the same token skip signature verification."""
+        token = str(AccessToken.for_user(user))
+        await get_user_from_token(token)
+
+        with patch('apps.collaboration.middleware.AccessToken') as mock_token:
+            result = await get_user_from_token(token)
+
+        mock_token.assert_not_called()
+        assert result.id == user.id
+
+    async def test_invalid_token_returns_anonymous(self):
+        """Test a malformed token is rejected."""
+        result = await get_user_from_token('not-a-jwt')
+
+        assert isinstance(result, AnonymousUser)
+
+
+@pytest.mark.parametrize('query_string, expected', [
+    (b'token=abc.def', 'abc.def'),
+    (b'foo=1&token=abc&bar=2', 'abc'),
+    (b'token=a%2Bb', 'a+b'),
+    (b'tokenx=abc', None),
+    (b'token=', None),
+    (b'', None),
+])
+def test_get_query_token(query_string, expected):
+    """Test the token parameter is extracted from raw query strings."""
+    assert get_query_token(query_string) == expected
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestRateLimitMiddleware:
+    """Tests for WebSocket handshake rate limiting."""
+
+    async def test_rejects_over_limit(self, user):
+        """Test handshakes over the limit are closed with 4008."""
+        inner = AsyncMock()
+        receive = AsyncMock(return_value={'type': 'websocket.connect'})
+        send = AsyncMock()
+
+        with patch('apps.core.utils.RateLimitService.ahit', AsyncMock(return_value=False)):
+            await RateLimitMiddleware(inner)({'type': 'websocket', 'user': user}, receive, send)
+
+        inner.assert_not_called()
+        send.assert_awaited_once_with({'type': 'websocket.close', 'code': 4008})
+
+    async def test_passes_under_limit(self, user):
+        """Test handshakes under the limit reach the application."""
+        inner = AsyncMock()
+
+        with patch('apps.core.utils.RateLimitService.ahit', AsyncMock(return_value=True)):
+            await RateLimitMiddleware(inner)({'type': 'websocket', 'user': user}, AsyncMock(), AsyncMock())
+
+        inner.assert_awaited_once()
@@ -0,0 +1,131 @@
+"""
+Tests for WebSocket message schemas.
+"""
+import msgpack
+import orjson
+import pytest
+from pydantic import ValidationError
+from apps.collaboration.schemas import (
+    parse_incoming_message,
+    describe_validation_error,
+    CursorMessage,
+    Frame,
+    CursorData,
+    parse_binary_message,
+    encode_sync_frame,
+    encode_control_frame,
+    INBOUND_HEADER,
+    OPERATION_FRAME,
+    CONTROL_FRAME,
+)
+
+
+class TestParseIncomingMessage:
+    """Tests for inbound message parsing."""
+
+    def test_parse_valid_message(self):
+        """Test a valid frame is routed to its message model."""
+        message = parse_incoming_message(
+            '{"type": "cursor", "id": "msg-1", "data": {"position": 3}}'
+        )
+
+        assert isinstance(message, CursorMessage)
+        assert message.id == 'msg-1'
+        assert message.data == {'position': 3}
+
+    def test_parse_defaults(self):
+        """Test id and data are optional."""
+        message = parse_incoming_message('{"type": "ping"}')
+
+        assert message.id is None
+        assert message.data == {}
+
+    @pytest.mark.parametrize('raw, expected', [
+        ('{not json', 'Invalid JSON'),
+        ('{"type": "bogus"}', 'Unknown message type: bogus'),
+        ('{"data": {}}', 'Unknown message type: None'),
+        ('{"type": "cursor", "data": 5}', 'Invalid message format'),
+    ])
+    def test_invalid_messages(self, raw, expected):
+        """Test malformed frames map to client-facing error messages."""
+        with pytest.raises(ValidationError) as exc_info:
+            parse_incoming_message(raw)
+
+        assert describe_validation_error(exc_info.value) == expected
+
+
+class TestOutboundFrames:
+    """Tests for server -> client frame dataclasses."""
+
+    def test_frame_serializes_like_dict(self):
+        """Test dataclass frames encode to the same JSON as the dict form."""
+        frame = Frame('cursor.update', CursorData('user_1', {'position': 3}))
+
+        assert orjson.loads(orjson.dumps(frame)) == {
+            'type': 'cursor.update',
+            'data': {'user_id': 'user_1', 'cursor': {'position': 3}},
+        }
+
+
+class TestBinaryFrames:
+    """Tests for the binary CRDT frame codec."""
+
+    def test_parse_binary_message(self):
+        """Test a binary operation frame keeps the update as raw bytes."""
+        header = msgpack.packb({'id': 'msg_1', 'version': 4, 'client_id': 'client_1'})
+        frame = INBOUND_HEADER.pack(OPERATION_FRAME, len(header)) + header + b'\x00\xff'
+
+        message = parse_binary_message(frame)
+
+        assert message.type == 'operation'
+        assert message.id == 'msg_1'
+        assert message.data == {
+            'operation': {'type': 'update', 'payload': b'\x00\xff', 'client_id': 'client_1'},
+            'version': 4,
+        }
+
+    @pytest.mark.parametrize('frame', [
+        b'',
+        b'\x01',
+        b'\x07\x00\x00',
+        bytes([CONTROL_FRAME]) + b'\xc1',
+        INBOUND_HEADER.pack(OPERATION_FRAME, 1) + b'\xc1',
+    ])
+    def test_parse_invalid_binary_message(self, frame):
+        """Test truncated, unknown or corrupt frames are rejected."""
+        with pytest.raises(ValueError):
+            parse_binary_message(frame)
+
+    def test_parse_control_frame(self):
+        """Test msgpack control frames validate like JSON text frames."""
+        frame = bytes([CONTROL_FRAME]) + msgpack.packb({
+            'type': 'cursor', 'data': {'position': {'line': 1, 'column': 2}},
+        })
+
+        message = parse_binary_message(frame)
+
+        assert isinstance(message, CursorMessage)
+        assert message.data == {'position': {'line': 1, 'column': 2}}
+
+    def test_parse_invalid_control_frame(self):
+        """Test control frames with an unknown type fail validation."""
+        frame = bytes([CONTROL_FRAME]) + msgpack.packb({'type': 'bogus'})
+
+        with pytest.raises(ValidationError):
+            parse_binary_message(frame)
+
+    def test_encode_control_frame(self):
+        """Test outbound frames encode as plain msgpack maps."""
+        frame = encode_control_frame(Frame('cursor.update', CursorData('u1', {'line': 1})))
+
+        assert frame[0] == CONTROL_FRAME
+        assert msgpack.unpackb(frame[1:]) == {
+            'type': 'cursor.update',
+            'data': {'user_id': 'u1', 'cursor': {'line': 1}},
+        }
+
+    def test_encode_sync_frame(self):
+        """Test sync frames length-prefix each update."""
+        frame = encode_sync_frame(7, [b'ab', b'c'])
+
+        assert frame == b'\x03\x00\x00\x00\x07' + b'\x00\x00\x00\x02ab' + b'\x00\x00\x00\x01c'
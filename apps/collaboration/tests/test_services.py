@@ -2,8 +2,9 @@
 Tests for Collaboration Services
 """
 import json
+import uuid
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from apps.collaboration.services import (
     CRDTService,
     OperationProcessor,
@@ -14,6 +15,21 @@ from apps.core.tests.factories import UserFactory, DocumentFactory
 from apps.collaboration.models import OperationLog, CollaborationSession
 
 
+def _make_op(document, i, **fields):
+    """Build an unsaved OperationLog at version i + 1 for bulk_create."""
+    return OperationLog(**{
+        'document_id': document.id,
+        'user_id': document.created_by_id,
+        'operation_id': uuid.uuid4(),
+        'operation_type': 'update',
+        'payload': b'\x00',
+        'version': i + 1,
+        'client_id': 'client_1',
+        'timestamp': 1000000 + i,
+        **fields,
+    })
+
+
 @pytest.mark.django_db
 class TestCRDTService:
     """Test CRDT service methods"""
@@ -23,17 +39,9 @@ class TestCRDTService:
         document = DocumentFactory(current_version=5)
         
         # Create some operation logs
-        for i in range(3):
-            OperationLog.objects.create(
-                document_id=document.id,
-                user_id=document.created_by_id,
-                operation_id=f"op_{i}",
-                operation_type='update',
-                payload=b'\x00\x01\x02',
-                version=i + 1,
-                client_id='client_1',
-                timestamp=1000000 + i
-            )
+        OperationLog.objects.bulk_create(
+            _make_op(document, i, payload=b'\x00\x01\x02') for i in range(3)
+        )
         
         result = CRDTService.get_document_state(str(document.id))
         
@@ -41,6 +49,36 @@ class TestCRDTService:
         assert result['version'] == 5
         assert 'updates' in result
         assert len(result['updates']) == 3
+        assert result['updates'][0]['payload'] == '000102'
+    
+    def test_get_document_state_is_cached_until_next_write(self, django_assert_num_queries):
+        """Test repeat reads skip the database until a batch commits"""
+        document = DocumentFactory(current_version=1)
+        
+        first = CRDTService.get_document_state(str(document.id))
+        with django_assert_num_queries(0):
+            assert CRDTService.get_document_state(str(document.id)) == first
+        
+        OperationProcessor.process_operation(
+            document_id=str(document.id),
+            user_id=str(document.created_by_id),
+            operation_data={'type': 'update', 'payload': 'dead', 'client_id': 'client_1'},
+            client_version=1,
+            message_id='msg_1'
+        )
+        
+        state = CRDTService.get_document_state(str(document.id))
+        assert state['version'] == 2
+        assert [u['payload'] for u in state['updates']] == ['dead']
+    
+    def test_get_document_state_returns_latest_100_in_order(self):
+        """Test only the newest 100 operations are returned, oldest first"""
+        document = DocumentFactory(current_version=105)
+        OperationLog.objects.bulk_create(_make_op(document, i) for i in range(105))
+        
+        result = CRDTService.get_document_state(str(document.id))
+        
+        assert [u['version'] for u in result['updates']] == list(range(6, 106))
     
     def test_get_document_state_not_found(self):
         """Test getting state for non-existent document"""
@@ -54,24 +92,173 @@ class TestCRDTService:
         document = DocumentFactory()
         
         # Create operations with different versions
-        for i in range(5):
-            OperationLog.objects.create(
-                document_id=document.id,
-                user_id=document.created_by_id,
-                operation_id=f"op_{i}",
-                operation_type='update',
-                payload=f'payload_{i}'.encode(),
-                version=i + 1,
-                client_id='client_1',
-                timestamp=1000000 + i
-            )
+        OperationLog.objects.bulk_create(
+            _make_op(document, i, payload=f'payload_{i}'.encode()) for i in range(5)
+        )
         
         # Client has version 2, should get versions 3, 4, 5
         client_state_vector = {'version': 2}
-        missing_ops = CRDTService.apply_state_vector(str(document.id), client_state_vector)
+        missing_ops = list(CRDTService.apply_state_vector(str(document.id), client_state_vector))
         
         assert len(missing_ops) == 3
         assert missing_ops[0] == b'payload_2'
+    
+    def test_get_state_vector(self):
+        """Test the state vector tracks the latest version per client"""
+        document = DocumentFactory(current_version=3)
+        
+        OperationLog.objects.bulk_create(
+            _make_op(document, i, client_id=client_id)
+            for i, client_id in enumerate(['client_1', 'client_2', 'client_1'])
+        )
+        
+        state_vector = CRDTService.get_state_vector(str(document.id))
+        
+        assert state_vector == {
+            'version': 3,
+            'clients': {'client_1': 3, 'client_2': 2},
+        }
+    
+    def test_encode_state_as_update(self):
+        """Test only operations missing from the client vector are encoded"""
+        document = DocumentFactory(current_version=4)
+        
+        OperationLog.objects.bulk_create(
+            _make_op(document, i, payload=bytes([i]), client_id=client_id)
+            for i, client_id in enumerate(['client_1', 'client_2', 'client_1', 'client_2'])
+        )
+        
+        # Client is at version 1 but already holds its own op at version 3
+        update = CRDTService.encode_state_as_update(
+            str(document.id),
+            {'version': 1, 'clients': {'client_1': 3}}
+        )
+        
+        assert update['version'] == 4
+        assert [u['version'] for u in update['updates']] == [2, 4]
+        assert update['updates'][0]['payload'] == '01'
+    
+    def test_encode_state_as_update_raw(self):
+        """Test raw encoding returns payloads as bytes for binary frames"""
+        document = DocumentFactory(current_version=1)
+        OperationLog.objects.create(
+            document_id=document.id,
+            user_id=document.created_by_id,
+            operation_id=uuid.uuid4(),
+            operation_type='update',
+            payload=b'\xde\xad',
+            version=1,
+            client_id='client_1',
+            timestamp=1000000
+        )
+        
+        update = CRDTService.encode_state_as_update(str(document.id), {'version': 0}, raw=True)
+        
+        assert update['updates'][0]['payload'] == b'\xde\xad'
+    
+    def test_encode_state_as_update_not_found(self):
+        """Test encoding an update for a non-existent document"""
+        update = CRDTService.encode_state_as_update(
+            '00000000-0000-0000-0000-000000000000',
+            {'version': 0}
+        )
+        
+        assert update == {'error': 'Document not found'}
+    
+    def test_snapshot_merges_and_prunes_operations(self):
+        """Test snapshot folds operations into one update and serves the tail"""
+        from pycrdt import Doc, Text
+        
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        updates = []
+        for chunk in ['a', 'b', 'c']:
+            state = ydoc.get_state()
+            text += chunk
+            updates.append(ydoc.get_update(state))
+        
+        document = DocumentFactory(current_version=2)
+        OperationLog.objects.bulk_create(
+            _make_op(document, i, payload=update) for i, update in enumerate(updates)
+        )
+        
+        # Only versions committed on the document are folded
+        assert CRDTService.snapshot(str(document.id)) == 2
+        assert list(
+            OperationLog.objects.filter(document_id=document.id).values_list('version', flat=True)
+        ) == [3]
+        
+        update = CRDTService.encode_state_as_update(str(document.id), {'version': 0})
+        replica = Doc()
+        replica.apply_update(bytes.fromhex(update['snapshot']['payload']))
+        for op in update['updates']:
+            replica.apply_update(bytes.fromhex(op['payload']))
+        
+        assert update['snapshot']['version'] == 2
+        assert str(replica.get('content', type=Text)) == 'abc'
+    
+    def test_snapshot_merges_in_chunks(self):
+        """Test operations streamed over several chunks fold into one state"""
+        from pycrdt import Doc, Text
+        
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        document = DocumentFactory(current_version=5)
+        logs = []
+        for i in range(5):
+            state = ydoc.get_state()
+            text += str(i)
+            logs.append(_make_op(document, i, payload=ydoc.get_update(state)))
+        OperationLog.objects.bulk_create(logs)
+        
+        with patch.object(CRDTService, 'SNAPSHOT_CHUNK_SIZE', 2):
+            assert CRDTService.snapshot(str(document.id)) == 5
+        
+        update = CRDTService.encode_state_as_update(str(document.id), {'version': 0}, raw=True)
+        replica = Doc()
+        replica.apply_update(update['snapshot']['payload'])
+        assert str(replica.get('content', type=Text)) == '01234'
+    
+    def test_snapshot_prunes_with_one_range_delete(self):
+        """Test pruning is a single DELETE on (document, version), no id list"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from pycrdt import Doc, Text
+        
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        document = DocumentFactory(current_version=50)
+        logs = []
+        for i in range(50):
+            state = ydoc.get_state()
+            text += 'x'
+            logs.append(_make_op(document, i, payload=ydoc.get_update(state)))
+        OperationLog.objects.bulk_create(logs)
+        
+        with CaptureQueriesContext(connection) as queries:
+            assert CRDTService.snapshot(str(document.id)) == 50
+        
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE')]
+        assert len(deletes) == 1
+        assert '"version" <= 50' in deletes[0]
+        assert ' IN (' not in deletes[0]
+    
+    def test_snapshot_skips_non_yjs_payloads(self):
+        """Test snapshot leaves the log alone when payloads can't be merged"""
+        document = DocumentFactory(current_version=1)
+        OperationLog.objects.create(
+            document_id=document.id,
+            user_id=document.created_by_id,
+            operation_id=uuid.uuid4(),
+            operation_type='update',
+            payload=b'\xde\xad',
+            version=1,
+            client_id='client_1',
+            timestamp=1000000
+        )
+        
+        assert CRDTService.snapshot(str(document.id)) is None
+        assert OperationLog.objects.filter(document_id=document.id).count() == 1
 
 
 @pytest.mark.django_db
@@ -166,6 +353,31 @@ class TestOperationProcessor:
         assert result['success'] is False
         assert 'Duplicate operation' in result['error']
     
+    def test_operation_id_is_unique_per_document(self):
+        """Test the partition-local unique constraint on operation_id"""
+        from django.db import IntegrityError, transaction
+        
+        first, second = DocumentFactory(), DocumentFactory()
+        operation_id = uuid.uuid4()
+        
+        def create(document):
+            OperationLog.objects.create(
+                document_id=document.id,
+                user_id=document.created_by_id,
+                operation_id=operation_id,
+                operation_type='update',
+                payload=b'\x00',
+                version=1,
+                client_id='client_1',
+                timestamp=1000000
+            )
+        
+        create(first)
+        create(second)
+        
+        with pytest.raises(IntegrityError), transaction.atomic():
+            create(first)
+    
     def test_process_operation_document_not_found(self):
         """Test operation on non-existent document"""
         user = UserFactory()
@@ -186,6 +398,286 @@ class TestOperationProcessor:
         assert result['success'] is False
         assert 'not found' in result['error']
     
+    def test_process_batch_assigns_sequential_versions(self):
+        """Test a batch commits every operation under one document update"""
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        
+        operations = [
+            {
+                'user_id': str(user.id),
+                'operation_data': {'type': 'update', 'payload': payload},
+                'client_version': 1,
+                'message_id': f'msg_{i}',
+            }
+            for i, payload in enumerate(['dead', 'beef', 'cafe'])
+        ]
+        
+        results = OperationProcessor.process_batch(str(document.id), operations)
+        
+        assert [r['version'] for r in results] == [2, 3, 4]
+        assert OperationLog.objects.filter(document_id=document.id).count() == 3
+        
+        document.refresh_from_db()
+        assert document.current_version == 4
+    
+    def test_process_batch_accepts_raw_payloads(self):
+        """Test payloads from binary frames are stored without hex decoding"""
+        document = DocumentFactory(current_version=0)
+        user = UserFactory()
+        
+        results = OperationProcessor.process_batch(str(document.id), [{
+            'user_id': str(user.id),
+            'operation_data': {'type': 'update', 'payload': b'\xbe\xef'},
+            'client_version': 0,
+            'message_id': 'msg_1',
+        }])
+        
+        assert results[0]['success'] is True
+        assert results[0]['update'] == b'\xbe\xef'
+        assert bytes(OperationLog.objects.get(document_id=document.id).payload) == b'\xbe\xef'
+    
+    def test_process_batch_skips_invalid_operations(self):
+        """Test invalid entries fail individually without consuming a version"""
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        
+        operations = [
+            {
+                'user_id': str(user.id),
+                'operation_data': operation_data,
+                'client_version': 1,
+                'message_id': f'msg_{i}',
+            }
+            for i, operation_data in enumerate([
+                {'type': 'update'},
+                {'type': 'update', 'payload': 'not-hex'},
+                {'type': 'update', 'payload': 'deadbeef'},
+            ])
+        ]
+        
+        results = OperationProcessor.process_batch(str(document.id), operations)
+        
+        assert results[0]['success'] is False
+        assert results[1]['success'] is False
+        assert results[2]['success'] is True
+        assert results[2]['version'] == 2
+    
+    def test_process_batch_checks_duplicates_in_one_query(self):
+        """Test a duplicate is skipped and later operations take its version"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        document = DocumentFactory(current_version=1)
+        user_id = str(document.created_by_id)
+        OperationLog.objects.create(
+            document_id=document.id,
+            user_id=user_id,
+            operation_id=OperationProcessor._generate_operation_id(
+                str(document.id), user_id, 'msg_0', 2
+            ),
+            operation_type='update',
+            payload=b'\x00',
+            version=2,
+            client_id='client_1',
+            timestamp=1000000
+        )
+        operations = [
+            {
+                'user_id': user_id,
+                'operation_data': {'type': 'update', 'payload': 'dead', 'client_id': f'client_{i}'},
+                'client_version': 1,
+                'message_id': f'msg_{i}',
+            }
+            for i in range(3)
+        ]
+        
+        with CaptureQueriesContext(connection) as queries:
+            results, accepted = OperationProcessor._prepare_batch(
+                str(document.id), operations, base_version=1
+            )
+        
+        assert results[0] == {'success': False, 'error': 'Duplicate operation'}
+        assert [r['version'] for r in results[1:]] == [2, 3]
+        assert len(accepted) == 2
+        # One lookup for the batch, one more for the two shifted ids
+        assert len(queries.captured_queries) == 2
+    
+    def test_process_batch_rejects_bad_payload_without_duplicate_lookup(self):
+        """Test malformed payloads fail before the operation_logs query"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        document = DocumentFactory(current_version=1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            results = OperationProcessor.process_batch(str(document.id), [{
+                'user_id': str(document.created_by_id),
+                'operation_data': {'type': 'update', 'payload': 'not-hex'},
+                'client_version': 1,
+                'message_id': 'msg_1',
+            }])
+        
+        assert results == [{'success': False, 'error': 'Invalid operation format'}]
+        assert not any('operation_logs' in q['sql'] for q in queries.captured_queries)
+    
+    def test_process_batch_merges_yjs_updates(self):
+        """Test consecutive Yjs updates from one client share one log row"""
+        from pycrdt import Doc, Text
+        
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        payloads = []
+        for chunk in ['a', 'b', 'c']:
+            state = ydoc.get_state()
+            text += chunk
+            payloads.append(ydoc.get_update(state).hex())
+        
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        operations = [
+            {
+                'user_id': str(user.id),
+                'operation_data': {'type': 'update', 'payload': payload, 'client_id': 'c1'},
+                'client_version': 1,
+                'message_id': f'msg_{i}',
+            }
+            for i, payload in enumerate(payloads)
+        ]
+        
+        results = OperationProcessor.process_batch(str(document.id), operations)
+        
+        assert [r['version'] for r in results] == [2, 2, 2]
+        log = OperationLog.objects.get(document_id=document.id)
+        replica = Doc()
+        replica.apply_update(bytes(log.payload))
+        assert str(replica.get('content', type=Text)) == 'abc'
+        
+        document.refresh_from_db()
+        assert document.current_version == 2
+    
+    def test_process_batch_rejects_redelivered_merged_operation(self):
+        """Test an operation folded into a merged row is still a duplicate"""
+        from pycrdt import Doc, Text
+        
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        payloads = []
+        for chunk in ['a', 'b']:
+            state = ydoc.get_state()
+            text += chunk
+            payloads.append(ydoc.get_update(state).hex())
+        
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        operations = [
+            {
+                'user_id': str(user.id),
+                'operation_data': {'type': 'update', 'payload': payload, 'client_id': 'c1'},
+                'client_version': 1,
+                'message_id': f'msg_{i}',
+            }
+            for i, payload in enumerate(payloads)
+        ]
+        OperationProcessor.process_batch(str(document.id), operations)
+        
+        results = OperationProcessor.process_batch(str(document.id), operations[1:])
+        
+        assert results == [{'success': False, 'error': 'Duplicate operation'}]
+        assert OperationLog.objects.filter(document_id=document.id).count() == 1
+        document.refresh_from_db()
+        assert document.current_version == 2
+    
+    @pytest.mark.django_db(transaction=True)
+    def test_process_batch_retries_on_version_conflict(self):
+        """Test a concurrent version bump rolls back and re-prepares the batch"""
+        from django.db import connections
+        
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        merge = OperationProcessor._merge_updates
+        calls = []
+        
+        # A concurrent writer commits on its own connection mid-batch
+        other = connections.create_connection('default')
+        
+        def merge_after_concurrent_write(accepted, base_version):
+            if not calls:
+                with other.cursor() as cursor:
+                    cursor.execute(
+                        'UPDATE documents SET current_version = 5 WHERE id = %s',
+                        [document.id]
+                    )
+            calls.append(base_version)
+            return merge(accepted, base_version)
+        
+        try:
+            with patch.object(OperationProcessor, '_merge_updates', side_effect=merge_after_concurrent_write):
+                result = OperationProcessor.process_operation(
+                    document_id=str(document.id),
+                    user_id=str(user.id),
+                    operation_data={'type': 'update', 'payload': 'deadbeef'},
+                    client_version=1,
+                    message_id='msg_1'
+                )
+        finally:
+            other.close()
+        
+        assert calls == [1, 5]
+        assert result['version'] == 6
+        
+        # The losing attempt's log row was rolled back
+        assert list(
+            OperationLog.objects.filter(document_id=document.id).values_list('version', flat=True)
+        ) == [6]
+    
+    def test_process_batch_reads_base_version_from_cache(self):
+        """Test consecutive batches skip the document SELECT"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        
+        def batch(message_id):
+            return OperationProcessor.process_batch(str(document.id), [{
+                'user_id': str(user.id),
+                'operation_data': {'type': 'update', 'payload': 'dead'},
+                'client_version': 1,
+                'message_id': message_id,
+            }])
+        
+        batch('msg_1')
+        with CaptureQueriesContext(connection) as queries:
+            results = batch('msg_2')
+        
+        assert results[0]['version'] == 3
+        assert not [
+            q for q in queries.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "documents"' in q['sql']
+        ]
+    
+    def test_process_batch_recovers_from_stale_cache(self):
+        """Test a stale cached version loses the claim and retries from the database"""
+        from django.core.cache import cache
+        
+        document = DocumentFactory(current_version=7)
+        user = UserFactory()
+        cache.set(f'doc_meta:{document.id}', 3)
+        
+        results = OperationProcessor.process_batch(str(document.id), [{
+            'user_id': str(user.id),
+            'operation_data': {'type': 'update', 'payload': 'dead'},
+            'client_version': 7,
+            'message_id': 'msg_1',
+        }])
+        
+        assert results[0]['version'] == 8
+        assert cache.get(f'doc_meta:{document.id}') == 8
+        assert list(
+            OperationLog.objects.filter(document_id=document.id).values_list('version', flat=True)
+        ) == [8]
+    
     def test_validate_operation(self):
         """Test operation validation"""
         valid_op = {
@@ -209,8 +701,7 @@ class TestOperationProcessor:
             version=1
         )
         
-        assert isinstance(op_id, str)
-        assert len(op_id) == 32
+        assert isinstance(op_id, uuid.UUID)
         
         # Same inputs should generate same ID
         op_id2 = OperationProcessor._generate_operation_id(
@@ -234,7 +725,8 @@ class TestPresenceService:
         
         # Mock Redis responses
         mock_client.smembers.return_value = ['user_1', 'user_2']
-        mock_client.hgetall.side_effect = [
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [
             {
                 'display_name': 'User 1',
                 'avatar': '',
@@ -257,6 +749,32 @@ class TestPresenceService:
         assert users[0]['user_id'] == 'user_1'
         assert users[0]['display_name'] == 'User 1'
         assert users[1]['user_id'] == 'user_2'
+        
+        # One pipelined batch instead of a round-trip per user
+        assert mock_pipe.hgetall.call_count == 2
+        mock_pipe.execute.assert_called_once()
+        mock_client.hgetall.assert_not_called()
+    
+    @patch('apps.collaboration.services.get_redis_client')
+    def test_get_active_users_empty(self, mock_redis):
+        """Test an empty document skips the pipeline"""
+        mock_client = MagicMock()
+        mock_redis.return_value = mock_client
+        mock_client.smembers.return_value = set()
+        
+        assert PresenceService.get_active_users('doc_1') == []
+        mock_client.pipeline.assert_not_called()
+    
+    @patch('apps.collaboration.services.get_redis_client')
+    def test_count_active_users(self, mock_redis):
+        """Test counting reads the set cardinality without fetching hashes"""
+        mock_client = MagicMock()
+        mock_redis.return_value = mock_client
+        mock_client.scard.return_value = 3
+        
+        assert PresenceService.count_active_users('doc_1') == 3
+        mock_client.scard.assert_called_once_with('presence:doc_1:users')
+        mock_client.smembers.assert_not_called()
     
     @patch('apps.collaboration.services.get_redis_client')
     def test_add_user_presence(self, mock_redis):
@@ -274,10 +792,15 @@ class TestPresenceService:
             }
         )
         
-        # Verify Redis calls
-        mock_client.sadd.assert_called()
-        mock_client.hmset.assert_called()
-        assert mock_client.expire.call_count == 2
+        # Verify Redis calls are sent as one MULTI/EXEC
+        mock_client.pipeline.assert_called_once_with(transaction=True)
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.sadd.assert_called_once_with('presence:doc_1:users', 'user_1')
+        mock_pipe.hset.assert_called_once()
+        assert mock_pipe.hset.call_args.kwargs['mapping']['display_name'] == 'Test User'
+        assert mock_pipe.expire.call_count == 2
+        mock_pipe.execute.assert_called_once()
+        mock_client.hmset.assert_not_called()
     
     @patch('apps.collaboration.services.get_redis_client')
     def test_remove_user_presence(self, mock_redis):
@@ -287,8 +810,11 @@ class TestPresenceService:
         
         PresenceService.remove_user_presence('doc_1', 'user_1')
         
-        mock_client.srem.assert_called_once()
-        mock_client.delete.assert_called_once()
+        mock_client.pipeline.assert_called_once_with(transaction=True)
+        pipe = mock_client.pipeline.return_value
+        pipe.srem.assert_called_once_with('presence:doc_1:users', 'user_1')
+        pipe.delete.assert_called_once_with('presence:doc_1:user:user_1')
+        pipe.execute.assert_called_once()
     
     @patch('apps.collaboration.services.get_redis_client')
     def test_update_cursor(self, mock_redis):
@@ -299,9 +825,12 @@ class TestPresenceService:
         cursor_data = {'line': 5, 'column': 10}
         PresenceService.update_cursor('doc_1', 'user_1', cursor_data)
         
-        # Verify cursor data was serialized and set
-        assert mock_client.hset.call_count == 2
-        mock_client.expire.assert_called()
+        # Verify cursor data was serialized and set in one round-trip
+        pipe = mock_client.pipeline.return_value
+        pipe.hset.assert_called_once()
+        assert pipe.hset.call_args.kwargs['mapping']['cursor'] == b'{"line":5,"column":10}'
+        pipe.expire.assert_called_once()
+        pipe.execute.assert_called_once()
     
     @patch('apps.collaboration.services.get_redis_client')
     def test_update_awareness(self, mock_redis):
@@ -314,6 +843,35 @@ class TestPresenceService:
         
         mock_client.set.assert_called_once()
     
+    @patch('apps.collaboration.services.get_redis_client')
+    def test_update_many(self, mock_redis):
+        """Test cursor and awareness are written in one pipeline"""
+        mock_client = MagicMock()
+        mock_redis.return_value = mock_client
+        pipe = mock_client.pipeline.return_value
+        
+        PresenceService.update_many(
+            'doc_1', 'user_1',
+            cursor_data={'line': 5},
+            state={'selection': {'start': 0, 'end': 5}}
+        )
+        
+        pipe.hset.assert_called_once()
+        pipe.set.assert_called_once()
+        pipe.execute.assert_called_once()
+    
+    @patch('apps.collaboration.services.get_redis_client')
+    def test_update_many_cursor_only(self, mock_redis):
+        """Test awareness is untouched when only the cursor changed"""
+        mock_client = MagicMock()
+        mock_redis.return_value = mock_client
+        pipe = mock_client.pipeline.return_value
+        
+        PresenceService.update_many('doc_1', 'user_1', cursor_data={'line': 5})
+        
+        pipe.hset.assert_called_once()
+        pipe.set.assert_not_called()
+    
     @patch('apps.collaboration.services.get_redis_client')
     def test_update_activity(self, mock_redis):
         """Test updating activity timestamp"""
@@ -322,8 +880,43 @@ class TestPresenceService:
         
         PresenceService.update_activity('doc_1', 'user_1')
         
-        mock_client.hset.assert_called()
-        mock_client.expire.assert_called()
+        pipe = mock_client.pipeline.return_value
+        pipe.hset.assert_called()
+        pipe.expire.assert_called()
+        pipe.execute.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_aupdate_many(self):
+        """Test the async variant writes through an async pipeline"""
+        mock_client = MagicMock()
+        pipe = mock_client.pipeline.return_value
+        pipe.execute = AsyncMock()
+        
+        await PresenceService.aupdate_many(
+            'doc_1', 'user_1',
+            cursor_data={'line': 5},
+            redis_client=mock_client
+        )
+        
+        pipe.hset.assert_called_once()
+        pipe.set.assert_not_called()
+        pipe.execute.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_aget_active_users(self):
+        """Test the async variant fetches every user hash in one pipeline"""
+        mock_client = MagicMock()
+        mock_client.smembers = AsyncMock(return_value={'user_1'})
+        pipe = mock_client.pipeline.return_value
+        pipe.execute = AsyncMock(return_value=[
+            {'display_name': 'User 1', 'cursor': '{}', 'last_activity': '1.0'},
+        ])
+        
+        users = await PresenceService.aget_active_users('doc_1', redis_client=mock_client)
+        
+        assert users[0]['user_id'] == 'user_1'
+        assert users[0]['display_name'] == 'User 1'
+        pipe.hgetall.assert_called_once_with('presence:doc_1:user:user_1')
 
 
 @pytest.mark.django_db
@@ -353,6 +946,35 @@ class TestCollaborationService:
         # Verify presence was updated
         mock_presence.assert_called_once()
     
+    def test_session_color_is_stable_per_user(self):
+        """Test a user gets the same color on every session"""
+        from apps.collaboration.services import USER_COLORS
+        
+        color = CollaborationService._pick_color('user_1')
+        
+        assert color in USER_COLORS
+        assert all(CollaborationService._pick_color('user_1') == color for _ in range(5))
+    
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_acreate_session(self):
+        """Test the async variant writes the session and presence together"""
+        from asgiref.sync import sync_to_async
+        
+        document = await sync_to_async(DocumentFactory)()
+        user = await sync_to_async(UserFactory)()
+        
+        with patch('apps.collaboration.services.PresenceService.aadd_user_presence', AsyncMock()) as presence:
+            result = await CollaborationService.acreate_session(
+                document_id=str(document.id),
+                user=user,
+                channel_name='channel_1'
+            )
+        
+        session = await CollaborationSession.objects.aget(id=result['session_id'])
+        assert session.user_id == user.id
+        assert presence.call_args.kwargs['user_data']['color'] == result['color']
+    
     @patch('apps.collaboration.services.PresenceService.remove_user_presence')
     def test_end_session(self, mock_presence):
         """Test ending collaboration session"""
@@ -417,7 +1039,21 @@ class TestCollaborationService:
             user_id='user_1'
         )
         
+        mock_client.evalsha.assert_called_once()
+        mock_client.eval.assert_not_called()
+    
+    @patch('apps.collaboration.services.get_redis_client')
+    def test_release_block_lock_loads_missing_script(self, mock_redis):
+        """Test releasing falls back to EVAL when Redis lacks the script"""
+        import redis
+        mock_client = MagicMock()
+        mock_redis.return_value = mock_client
+        mock_client.evalsha.side_effect = redis.exceptions.NoScriptError()
+        
+        CollaborationService.release_block_lock('doc_1', 'block_1', 'user_1')
+        
         mock_client.eval.assert_called_once()
+        assert mock_client.eval.call_args.args[1:] == (1, 'block_lock:doc_1:block_1', 'user_1')
     
     @patch('apps.collaboration.services.get_redis_client')
     def test_get_block_lock_owner(self, mock_redis):
@@ -440,3 +1076,34 @@ class TestCollaborationService:
         owner = CollaborationService.get_block_lock_owner('doc_1', 'block_1')
         
         assert owner is None
+    
+    @pytest.mark.asyncio
+    async def test_aacquire_block_lock(self):
+        """Test acquiring a block lock with the async client"""
+        mock_client = MagicMock()
+        mock_client.set = AsyncMock(return_value=None)
+        
+        result = await CollaborationService.aacquire_block_lock(
+            document_id='doc_1',
+            block_id='block_1',
+            user_id='user_1',
+            redis_client=mock_client
+        )
+        
+        assert result is False
+        mock_client.set.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_arelease_block_lock(self):
+        """Test releasing a block lock with the async client"""
+        mock_client = MagicMock()
+        mock_client.evalsha = AsyncMock(return_value=1)
+        
+        await CollaborationService.arelease_block_lock(
+            document_id='doc_1',
+            block_id='block_1',
+            user_id='user_1',
+            redis_client=mock_client
+        )
+        
+        mock_client.evalsha.assert_awaited_once()
@@ -1,6 +1,7 @@
 """
 Unit tests for Collaboration tasks.
 """
+import uuid
 import pytest
 from unittest.mock import patch, MagicMock
 from django.utils import timezone
@@ -8,14 +9,30 @@ from datetime import timedelta
 from apps.collaboration.tasks import (
     cleanup_expired_sessions,
     compress_operation_logs,
+    snapshot_documents,
     sync_presence_to_db
 )
-from apps.collaboration.models import CollaborationSession, OperationLog
+from apps.collaboration.models import CollaborationSession, OperationLog, PresenceAwareness
 from apps.core.tests.factories import UserFactory, DocumentFactory, WorkspaceFactory
 
 pytestmark = pytest.mark.django_db
 
 
+def _make_op(document, i, **fields):
+    """Build an unsaved OperationLog at version i + 1 for bulk_create."""
+    return OperationLog(**{
+        'document_id': document.id,
+        'user_id': document.created_by_id,
+        'operation_id': uuid.uuid4(),
+        'operation_type': 'insert',
+        'payload': b'test',
+        'version': i + 1,
+        'client_id': 'test-client',
+        'timestamp': i,
+        **fields,
+    })
+
+
 class TestCollaborationTasks:
     """Tests for collaboration Celery tasks."""
     
@@ -65,48 +82,69 @@ class TestCollaborationTasks:
         
         assert result == 0
     
+    def test_cleanup_expired_sessions_is_one_update(self, user, document, django_assert_num_queries):
+        """Test expiry is a single UPDATE regardless of how many rows match."""
+        CollaborationSession.objects.bulk_create(
+            CollaborationSession(
+                document=document, user=user, channel_name=f'channel-{i}', is_active=True,
+            )
+            for i in range(5)
+        )
+        CollaborationSession.objects.update(last_activity=timezone.now() - timedelta(minutes=10))
+        
+        with django_assert_num_queries(1):
+            assert cleanup_expired_sessions() == 5
+    
     def test_compress_operation_logs_under_threshold(self, document):
         """Test compression is skipped when under threshold."""
         # Create less than 1000 operations
-        for i in range(100):
-            OperationLog.objects.create(
-                document=document,
-                user=document.created_by,
-                operation_id=f'op-{document.id}-{i}',
-                operation_type='insert',
-                payload=b'test',
-                version=i,
-                client_id='test-client',
-                timestamp=i
-            )
+        OperationLog.objects.bulk_create(_make_op(document, i) for i in range(100))
         
         result = compress_operation_logs(str(document.id))
         
         assert result == 0  # No compression needed
     
     def test_compress_operation_logs_over_threshold(self, document):
-        """Test compression when over threshold."""
-        # Note: The actual compress_operation_logs task has a bug where it tries to 
-        # delete with limit/offset which Django doesn't support. This test verifies
-        # the task runs and counts operations correctly before the deletion attempt.
-        # The task would need to be fixed to use .values_list('id') and then delete by ids.
+        """Test compression folds operations into the snapshot."""
+        from pycrdt import Doc, Text
+        from apps.collaboration.models import DocumentSnapshot
         
-        # Create more than 1000 operations  
+        ydoc = Doc()
+        text = ydoc.get('content', type=Text)
+        
+        # Create more than 1000 operations
+        logs = []
         for i in range(1100):
-            OperationLog.objects.create(
-                document=document,
-                user=document.created_by,
-                operation_id=f'op-{document.id}-{i}',
-                operation_type='insert',
-                payload=b'test',
-                version=i,
-                client_id='test-client',
-                timestamp=i
-            )
+            state = ydoc.get_state()
+            text += 'x'
+            logs.append(_make_op(document, i, payload=ydoc.get_update(state)))
+        OperationLog.objects.bulk_create(logs, batch_size=500)
+        document.current_version = 1100
+        document.save(update_fields=['current_version'])
+        
+        result = compress_operation_logs(str(document.id))
         
-        # The task has a bug with limit/offset delete, but we verify setup
-        op_count = OperationLog.objects.filter(document_id=document.id).count()
-        assert op_count == 1100
+        assert result == 1100
+        assert not OperationLog.objects.filter(document_id=document.id).exists()
+        
+        snapshot = DocumentSnapshot.objects.get(document_id=document.id)
+        replica = Doc()
+        replica.apply_update(bytes(snapshot.state))
+        assert str(replica.get('content', type=Text)) == 'x' * 1100
+    
+    def test_compress_operation_logs_reports_pruned_rows(self, document):
+        """Test operations logged during the snapshot don't skew the count."""
+        from unittest.mock import patch
+        from apps.collaboration.services import CRDTService
+        
+        OperationLog.objects.bulk_create(_make_op(document, i) for i in range(1001))
+        
+        def snapshot_with_concurrent_write(document_id):
+            _make_op(document, 1001).save()
+            return 1001
+        
+        with patch.object(CRDTService, 'snapshot', side_effect=snapshot_with_concurrent_write):
+            assert compress_operation_logs(str(document.id)) == 1001
     
     def test_compress_operation_logs_document_not_found(self):
         """Test compression with non-existent document."""
@@ -114,6 +152,22 @@ class TestCollaborationTasks:
         
         assert result == 0
     
+    @patch('apps.collaboration.services.CRDTService.snapshot')
+    def test_snapshot_documents_over_threshold(self, mock_snapshot, document):
+        """Test only documents with enough new operations are snapshotted."""
+        quiet_document = DocumentFactory()
+        OperationLog.objects.bulk_create(
+            _make_op(doc, i)
+            for doc, count in [(document, 3), (quiet_document, 1)]
+            for i in range(count)
+        )
+        mock_snapshot.return_value = 3
+        
+        result = snapshot_documents(min_operations=2)
+        
+        assert result == 1
+        mock_snapshot.assert_called_once_with(str(document.id))
+    
     @patch('apps.core.utils.get_redis_client')
     def test_sync_presence_to_db(self, mock_get_redis):
         """Test syncing presence data from Redis to database."""
@@ -126,7 +180,10 @@ class TestCollaborationTasks:
         result = sync_presence_to_db()
         
         assert result == 0
-        mock_redis.scan.assert_called()
+        mock_redis.scan.assert_called_once_with(
+            cursor=0, match='presence:*:user:*', count=1000
+        )
+        mock_redis.pipeline.assert_not_called()
     
     @patch('apps.core.utils.get_redis_client')
     def test_sync_presence_to_db_with_data(self, mock_get_redis, user, document):
@@ -137,16 +194,61 @@ class TestCollaborationTasks:
         # Simulate Redis scan returning presence keys
         presence_key = f'presence:{document.id}:user:{user.id}'
         mock_redis.scan.return_value = (0, [presence_key])
-        mock_redis.hgetall.return_value = {
+        mock_pipe = mock_redis.pipeline.return_value
+        mock_pipe.execute.return_value = [{
             'cursor': '{"line": 1, "column": 5}',
             'color': '#ff0000',
             'last_activity': str(timezone.now().timestamp())
-        }
+        }]
         
         result = sync_presence_to_db()
         
         assert result == 1
-        mock_redis.hgetall.assert_called_with(presence_key)
+        mock_pipe.hgetall.assert_called_once_with(presence_key)
+        
+        presence = PresenceAwareness.objects.get(id=f'{document.id}:{user.id}')
+        assert presence.state['cursor'] == {'line': 1, 'column': 5}
+    
+    @patch('apps.core.utils.get_redis_client')
+    def test_sync_presence_to_db_upserts(self, mock_get_redis, user, document):
+        """Test re-syncing a key updates the existing row."""
+        mock_redis = MagicMock()
+        mock_get_redis.return_value = mock_redis
+        
+        mock_redis.scan.return_value = (0, [f'presence:{document.id}:user:{user.id}'])
+        mock_pipe = mock_redis.pipeline.return_value
+        mock_pipe.execute.side_effect = [
+            [{'cursor': '{}', 'color': '#ff0000', 'last_activity': '1'}],
+            [{'cursor': '{}', 'color': '#00ff00', 'last_activity': '2'}],
+        ]
+        
+        sync_presence_to_db()
+        sync_presence_to_db()
+        
+        presence = PresenceAwareness.objects.get(id=f'{document.id}:{user.id}')
+        assert presence.state['color'] == '#00ff00'
+        assert PresenceAwareness.objects.count() == 1
+    
+    @patch('apps.core.utils.get_redis_client')
+    def test_sync_presence_to_db_duplicate_scan_keys(self, mock_get_redis, user, document):
+        """Test a key returned twice by SCAN is upserted once, latest data winning."""
+        mock_redis = MagicMock()
+        mock_get_redis.return_value = mock_redis
+        
+        presence_key = f'presence:{document.id}:user:{user.id}'
+        mock_redis.scan.side_effect = [
+            (100, [presence_key]),
+            (0, [presence_key]),
+        ]
+        mock_redis.pipeline.return_value.execute.side_effect = [
+            [{'cursor': '{}', 'color': '#ff0000', 'last_activity': '1'}],
+            [{'cursor': '{}', 'color': '#00ff00', 'last_activity': '2'}],
+        ]
+        
+        assert sync_presence_to_db() == 1
+        
+        presence = PresenceAwareness.objects.get(id=f'{document.id}:{user.id}')
+        assert presence.state['color'] == '#00ff00'
     
     @patch('apps.core.utils.get_redis_client')
     def test_sync_presence_multiple_iterations(self, mock_get_redis, user, document):
@@ -160,13 +262,41 @@ class TestCollaborationTasks:
             (100, [presence_key]),
             (0, [])
         ]
-        mock_redis.hgetall.return_value = {
+        mock_redis.pipeline.return_value.execute.return_value = [{
             'cursor': '{}',
             'color': '#ff0000',
             'last_activity': '0'
-        }
+        }]
         
         result = sync_presence_to_db()
         
         assert result == 1
         assert mock_redis.scan.call_count == 2
+    
+    @patch('apps.core.utils.get_redis_client')
+    def test_sync_presence_touches_live_sessions(self, mock_get_redis, user, document):
+        """Test present users keep their session alive; others are left alone."""
+        mock_redis = MagicMock()
+        mock_get_redis.return_value = mock_redis
+        
+        mock_redis.scan.return_value = (0, [f'presence:{document.id}:user:{user.id}'])
+        mock_redis.pipeline.return_value.execute.return_value = [{
+            'cursor': '{}', 'color': '#ff0000', 'last_activity': '0'
+        }]
+        
+        stale = timezone.now() - timedelta(minutes=10)
+        live_session = CollaborationSession.objects.create(
+            document=document, user=user, channel_name='live', is_active=True,
+        )
+        other_session = CollaborationSession.objects.create(
+            document=document, user=UserFactory(), channel_name='gone', is_active=True,
+        )
+        CollaborationSession.objects.update(last_activity=stale)
+        
+        sync_presence_to_db()
+        
+        live_session.refresh_from_db()
+        other_session.refresh_from_db()
+        assert live_session.last_activity > stale
+        assert other_session.last_activity == stale
+        assert cleanup_expired_sessions() == 1
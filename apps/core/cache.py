@@ -5,10 +5,15 @@ Provides decorators and helper functions for caching frequently accessed data.
 """
 from functools import wraps
 from typing import Optional, Callable, Any, Union
+import asyncio
 import hashlib
 import json
 import logging
+import threading
+import time
+import weakref
 
+import redis
 from django.core.cache import cache
 from django.conf import settings
 
@@ -27,6 +32,27 @@ CACHE_PREFIX_DOCUMENT = "document"
 CACHE_PREFIX_BOARD = "board"
 CACHE_PREFIX_PERMISSIONS = "perms"
 
+# Per-workspace cache entries managed together by CacheManager
+WORKSPACE_CACHE_SUFFIXES = ("detail", "members", "boards")
+
+# `cached` stores _NONE for cached None results; _MISS is the get() default
+_MISS = object()
+_NONE = "\x00__NONE__\x00"
+
+# How long `cached` keeps results in process memory in front of Redis
+LOCAL_CACHE_TTL = 5
+
+
+def short_hash(data: bytes) -> str:
+    """
+    Return a 16-character hex digest for folding keys and building ETags.
+    
+    blake2b with an 8-byte digest is noticeably cheaper than MD5 on the short
+    inputs these hot paths hash; the digest is an opaque token, never a
+    security boundary.
+    """
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
 
 def make_cache_key(*args, prefix: str = "") -> str:
     """
@@ -44,14 +70,22 @@ def make_cache_key(*args, prefix: str = "") -> str:
     
     # If key is too long, hash it
     if len(key_data) > 200:
-        key_hash = hashlib.md5(key_data.encode()).hexdigest()
-        key_data = key_hash
+        key_data = short_hash(key_data.encode())
     
     if prefix:
         return f"{prefix}:{key_data}"
     return key_data
 
 
+def _default_cache_key(func_name: str, key_prefix: str, args: tuple, kwargs: dict) -> str:
+    """
+    Build the `cached` key for a call; positional-only calls skip the kwargs sort.
+    """
+    if kwargs:
+        args = (*args, *(f"{k}={v}" for k, v in sorted(kwargs.items())))
+    return make_cache_key(func_name, *args, prefix=key_prefix)
+
+
 def cached(
     timeout: int = CACHE_TIMEOUT_MEDIUM,
     key_prefix: str = "",
@@ -61,6 +95,12 @@ def cached(
     """
     Decorator to cache function results in Redis.
     
+    Results are also kept in process memory for LOCAL_CACHE_TTL seconds, so
+    repeat calls on the same worker skip Redis. Invalidation only clears the
+    local copy in the calling process; other workers may serve the old value
+    until their copy expires. Cached values are shared, not copied, so
+    callers must not mutate them.
+    
     Args:
         timeout: Cache timeout in seconds
         key_prefix: Prefix for cache key
@@ -73,29 +113,26 @@ def cached(
             return User.objects.get(id=user_id)
     """
     def decorator(func):
+        func_name = func.__name__
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Generate cache key
             if key_func:
                 cache_key = key_func(*args, **kwargs)
             else:
-                # Default key generation
-                func_name = func.__name__
-                all_args = list(args) + [f"{k}={v}" for k, v in sorted(kwargs.items())]
-                cache_key = make_cache_key(func_name, *all_args, prefix=key_prefix)
+                cache_key = _default_cache_key(func_name, key_prefix, args, kwargs)
             
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
+            # Process memory first, then one round trip covers hits,
+            # cached Nones and misses
+            cached_value = _local_cache.get(cache_key, _MISS)
+            if cached_value is _MISS:
+                cached_value = cache.get(cache_key, _MISS)
+                if cached_value is not _MISS:
+                    _local_cache.set(cache_key, cached_value)
+            if cached_value is not _MISS:
                 logger.debug(f"Cache hit: {cache_key}")
-                return cached_value
-            
-            # Check for cached None (special marker)
-            if cache_none:
-                none_marker = cache.get(f"{cache_key}:none")
-                if none_marker:
-                    logger.debug(f"Cache hit (None): {cache_key}")
-                    return None
+                return None if cached_value == _NONE else cached_value
             
             # Execute function
             result = func(*args, **kwargs)
@@ -103,9 +140,11 @@ def cached(
             # Cache result
             if result is not None:
                 cache.set(cache_key, result, timeout)
+                _local_cache.set(cache_key, result)
                 logger.debug(f"Cache set: {cache_key}")
             elif cache_none:
-                cache.set(f"{cache_key}:none", True, timeout)
+                cache.set(cache_key, _NONE, timeout)
+                _local_cache.set(cache_key, _NONE)
             
             return result
         
@@ -126,12 +165,10 @@ def invalidate_cached(func, key_prefix, key_func, *args, **kwargs):
     if key_func:
         cache_key = key_func(*args, **kwargs)
     else:
-        func_name = func.__name__
-        all_args = list(args) + [f"{k}={v}" for k, v in sorted(kwargs.items())]
-        cache_key = make_cache_key(func_name, *all_args, prefix=key_prefix)
+        cache_key = _default_cache_key(func.__name__, key_prefix, args, kwargs)
     
     cache.delete(cache_key)
-    cache.delete(f"{cache_key}:none")
+    _local_cache.invalidate(cache_key)
     logger.debug(f"Cache invalidated: {cache_key}")
 
 
@@ -143,34 +180,30 @@ class CacheManager:
     @staticmethod
     def get_user_cache_key(user_id: str, suffix: str = "") -> str:
         """Generate cache key for user-related data."""
-        key = f"{CACHE_PREFIX_USER}:{user_id}"
         if suffix:
-            key = f"{key}:{suffix}"
-        return key
+            return f"{CACHE_PREFIX_USER}:{user_id}:{suffix}"
+        return f"{CACHE_PREFIX_USER}:{user_id}"
     
     @staticmethod
     def get_workspace_cache_key(workspace_id: str, suffix: str = "") -> str:
         """Generate cache key for workspace-related data."""
-        key = f"{CACHE_PREFIX_WORKSPACE}:{workspace_id}"
         if suffix:
-            key = f"{key}:{suffix}"
-        return key
+            return f"{CACHE_PREFIX_WORKSPACE}:{workspace_id}:{suffix}"
+        return f"{CACHE_PREFIX_WORKSPACE}:{workspace_id}"
     
     @staticmethod
     def get_document_cache_key(document_id: str, suffix: str = "") -> str:
         """Generate cache key for document-related data."""
-        key = f"{CACHE_PREFIX_DOCUMENT}:{document_id}"
         if suffix:
-            key = f"{key}:{suffix}"
-        return key
+            return f"{CACHE_PREFIX_DOCUMENT}:{document_id}:{suffix}"
+        return f"{CACHE_PREFIX_DOCUMENT}:{document_id}"
     
     @staticmethod
     def get_board_cache_key(board_id: str, suffix: str = "") -> str:
         """Generate cache key for board-related data."""
-        key = f"{CACHE_PREFIX_BOARD}:{board_id}"
         if suffix:
-            key = f"{key}:{suffix}"
-        return key
+            return f"{CACHE_PREFIX_BOARD}:{board_id}:{suffix}"
+        return f"{CACHE_PREFIX_BOARD}:{board_id}"
     
     # =========================================================================
     # User caching methods
@@ -334,9 +367,24 @@ class CacheManager:
     
     @classmethod
     def cache_board_cards(cls, board_id: str, list_id: str, cards_data: Any, timeout: int = CACHE_TIMEOUT_SHORT):
-        """Cache board list cards."""
+        """Cache board list cards and record the list in the board's index."""
         key = cls.get_board_cache_key(board_id, f"list:{list_id}:cards")
         cache.set(key, cards_data, timeout)
+        
+        # The index must outlive every cards entry it points at
+        index_key = cls.get_board_cache_key(board_id, "list_index")
+        index_timeout = max(timeout, CACHE_TIMEOUT_DAY)
+        redis_conn = cls._get_redis_connection()
+        if redis_conn is not None:
+            # The raw client bypasses IGNORE_EXCEPTIONS; degrade like the cache does
+            try:
+                redis_conn.pipeline().sadd(index_key, list_id).expire(index_key, index_timeout).execute()
+            except redis.RedisError as e:
+                logger.warning(f"Failed to index cards cache for board {board_id}: {e}")
+        else:
+            list_ids = cache.get(index_key, set())
+            list_ids.add(list_id)
+            cache.set(index_key, list_ids, index_timeout)
     
     @classmethod
     def get_board_cards(cls, board_id: str, list_id: str) -> Optional[Any]:
@@ -350,33 +398,63 @@ class CacheManager:
         if list_id:
             key = cls.get_board_cache_key(board_id, f"list:{list_id}:cards")
             cache.delete(key)
+            return
+        
+        # Invalidate all lists recorded in the board's index
+        index_key = cls.get_board_cache_key(board_id, "list_index")
+        redis_conn = cls._get_redis_connection()
+        if redis_conn is not None:
+            try:
+                list_ids, _ = redis_conn.pipeline().smembers(index_key).delete(index_key).execute()
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read cards cache index for board {board_id}: {e}")
+                return
+            list_ids = [lid.decode() if isinstance(lid, bytes) else lid for lid in list_ids]
         else:
-            # Invalidate all lists - use pattern delete
-            pattern = cls.get_board_cache_key(board_id, "list:*:cards")
-            cache.delete_pattern(pattern)
+            list_ids = cache.get(index_key, set())
+            cache.delete(index_key)
+        
+        if list_ids:
+            cache.delete_many([
+                cls.get_board_cache_key(board_id, f"list:{lid}:cards") for lid in list_ids
+            ])
+    
+    @staticmethod
+    def _get_redis_connection():
+        """Return the raw Redis connection behind the default cache, or None."""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection("default")
+        except (ImportError, NotImplementedError):
+            return None
     
     # =========================================================================
     # Permission caching methods
     # =========================================================================
     
+    @staticmethod
+    def get_user_workspace_role_key(user_id: str, workspace_id: str) -> str:
+        """Generate cache key for a user's role in a workspace."""
+        return f"{CACHE_PREFIX_PERMISSIONS}:user:{user_id}:workspace:{workspace_id}:role"
+    
     @classmethod
     def cache_user_workspace_role(
         cls, user_id: str, workspace_id: str, role: str, timeout: int = CACHE_TIMEOUT_MEDIUM
     ):
         """Cache user's role in a workspace."""
-        key = f"{CACHE_PREFIX_PERMISSIONS}:user:{user_id}:workspace:{workspace_id}:role"
+        key = cls.get_user_workspace_role_key(user_id, workspace_id)
         cache.set(key, role, timeout)
     
     @classmethod
     def get_user_workspace_role(cls, user_id: str, workspace_id: str) -> Optional[str]:
         """Get cached user's workspace role."""
-        key = f"{CACHE_PREFIX_PERMISSIONS}:user:{user_id}:workspace:{workspace_id}:role"
+        key = cls.get_user_workspace_role_key(user_id, workspace_id)
         return cache.get(key)
     
     @classmethod
     def invalidate_user_workspace_role(cls, user_id: str, workspace_id: str):
         """Invalidate user's workspace role cache."""
-        key = f"{CACHE_PREFIX_PERMISSIONS}:user:{user_id}:workspace:{workspace_id}:role"
+        key = cls.get_user_workspace_role_key(user_id, workspace_id)
         cache.delete(key)
     
     # =========================================================================
@@ -386,15 +464,18 @@ class CacheManager:
     @classmethod
     def invalidate_workspace_all(cls, workspace_id: str):
         """Invalidate all cache related to a workspace."""
-        cls.invalidate_workspace_detail(workspace_id)
-        cls.invalidate_workspace_members(workspace_id)
-        cls.invalidate_workspace_boards(workspace_id)
+        cache.delete_many([
+            cls.get_workspace_cache_key(workspace_id, suffix)
+            for suffix in WORKSPACE_CACHE_SUFFIXES
+        ])
     
     @classmethod
     def invalidate_user_all(cls, user_id: str):
         """Invalidate all cache related to a user."""
-        cls.invalidate_user_profile(user_id)
-        cls.invalidate_user_workspaces(user_id)
+        cache.delete_many([
+            cls.get_user_cache_key(user_id, suffix)
+            for suffix in ("profile", "workspaces")
+        ])
     
     @classmethod
     def invalidate_board_all(cls, board_id: str):
@@ -404,8 +485,196 @@ class CacheManager:
     @classmethod
     def invalidate_document_all(cls, document_id: str):
         """Invalidate all cache related to a document."""
-        cls.invalidate_document_detail(document_id)
-        cls.invalidate_document_blocks(document_id)
+        cache.delete_many([
+            cls.get_document_cache_key(document_id, suffix)
+            for suffix in ("detail", "blocks")
+        ])
+    
+    # =========================================================================
+    # Bulk read/write methods
+    # =========================================================================
+    
+    @classmethod
+    def cache_workspace_bundle(
+        cls, workspace_id: str, detail: Any, members: Any, boards: Any,
+        timeout: int = CACHE_TIMEOUT_MEDIUM
+    ):
+        """Cache workspace detail, members and boards in one round trip."""
+        cache.set_many({
+            cls.get_workspace_cache_key(workspace_id, "detail"): detail,
+            cls.get_workspace_cache_key(workspace_id, "members"): members,
+            cls.get_workspace_cache_key(workspace_id, "boards"): boards,
+        }, timeout)
+    
+    @classmethod
+    def cache_document(cls, document_id: str, detail: Any, blocks: Any):
+        """
+        Cache document detail and blocks, each with its own TTL, in one round trip.
+        
+        On django-redis both writes go through one pipeline; other backends
+        fall back to two sets.
+        """
+        detail_key = cls.get_document_cache_key(document_id, "detail")
+        blocks_key = cls.get_document_cache_key(document_id, "blocks")
+        redis_conn = cls._get_redis_connection()
+        if redis_conn is None:
+            cache.set(detail_key, detail, CACHE_TIMEOUT_MEDIUM)
+            cache.set(blocks_key, blocks, CACHE_TIMEOUT_SHORT)
+            return
+        
+        pipe = redis_conn.pipeline(transaction=False)
+        cache.set(detail_key, detail, CACHE_TIMEOUT_MEDIUM, client=pipe)
+        cache.set(blocks_key, blocks, CACHE_TIMEOUT_SHORT, client=pipe)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to cache document {document_id}: {e}")
+    
+    @classmethod
+    def get_document_bundle(cls, document_id: str) -> dict:
+        """
+        Get cached document detail and blocks in one round trip.
+        
+        Returns a dict keyed by "detail" and "blocks" holding only the
+        entries that are cached.
+        """
+        keys = {
+            cls.get_document_cache_key(document_id, suffix): suffix
+            for suffix in ("detail", "blocks")
+        }
+        return {keys[key]: value for key, value in cache.get_many(keys).items()}
+    
+    @classmethod
+    def get_workspace_bundle(cls, workspace_id: str) -> dict:
+        """
+        Get cached workspace detail, members and boards in one round trip.
+        
+        Returns a dict keyed by "detail", "members" and "boards" holding only
+        the entries that are cached.
+        """
+        keys = {
+            cls.get_workspace_cache_key(workspace_id, suffix): suffix
+            for suffix in WORKSPACE_CACHE_SUFFIXES
+        }
+        return {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+
+class AsyncTTLCache:
+    """
+    Small per-process TTL cache for async lookups.
+    
+    Concurrent misses for the same key share one in-flight call, so a burst
+    of requests for a hot key costs one lookup per TTL window instead of
+    one per caller. Entries live in process memory only; use it for data
+    where a stale read of up to `ttl` seconds is acceptable.
+    """
+    
+    MAX_ENTRIES = 1024
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+    
+    async def get_or_call(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Return the cached result for key, calling func(*args, **kwargs) on a miss.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        
+        if entry is None or entry[0] <= now:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._prune(now)
+            entry = (now + self.ttl, asyncio.ensure_future(func(*args, **kwargs)))
+            self._entries[key] = entry
+        
+        try:
+            # Shield so one cancelled caller doesn't cancel the shared call
+            return await asyncio.shield(entry[1])
+        except Exception:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            raise
+    
+    def invalidate(self, key: str):
+        """
+        Drop a cached entry.
+        """
+        self._entries.pop(key, None)
+    
+    def _prune(self, now: float):
+        """
+        Drop expired entries.
+        """
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+
+
+class LocalTTLCache:
+    """
+    Thread-safe per-process TTL cache for sync callers.
+    
+    Sits in front of the shared cache for keys that are read far more often
+    than they change. Holds at most MAX_ENTRIES keys; expired entries are
+    pruned when it fills up, and the oldest entries are dropped if that is
+    not enough.
+    """
+    
+    MAX_ENTRIES = 1024
+    
+    # Every instance, so clear_all_cache can reach them
+    _instances = weakref.WeakSet()
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        LocalTTLCache._instances.add(self)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Return the value for key, or default if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+    
+    def set(self, key: str, value: Any):
+        """
+        Store value for key for `ttl` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES and key not in self._entries:
+                self._prune(now)
+            self._entries[key] = (now + self.ttl, value)
+    
+    def invalidate(self, key: str):
+        """
+        Drop a cached entry.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """
+        Drop all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+    
+    def _prune(self, now: float):
+        """
+        Drop expired entries, then the oldest ones if still full.
+        """
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.MAX_ENTRIES:
+            del self._entries[next(iter(self._entries))]
+
+
+_local_cache = LocalTTLCache(ttl=LOCAL_CACHE_TTL)
 
 
 # Convenience function for cache statistics
@@ -439,6 +708,8 @@ def clear_all_cache():
     """
     try:
         cache.clear()
+        for local_cache in list(LocalTTLCache._instances):
+            local_cache.clear()
         logger.info("All cache cleared")
     except Exception as e:
         logger.error(f"Failed to clear cache: {e}")
@@ -0,0 +1,54 @@
+"""
+Cache value compressors for django-redis.
+"""
+import threading
+import zlib
+
+import zstandard
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+
+
+class ZstdCompressor(BaseCompressor):
+    """
+    zstd compressor for cached values, built on the `zstandard` package.
+
+    Values under MIN_COMPRESS_SIZE are stored as-is; django-redis treats a
+    CompressorError on read as "not compressed". Entries written by the
+    previous zlib compressor are still readable until they expire.
+    """
+
+    MIN_COMPRESS_SIZE = 1024  # bytes
+    COMPRESSION_LEVEL = 3
+
+    # zstd contexts are not thread-safe; keep one pair per thread
+    _local = threading.local()
+
+    @classmethod
+    def _compressor(cls):
+        compressor = getattr(cls._local, 'compressor', None)
+        if compressor is None:
+            compressor = cls._local.compressor = zstandard.ZstdCompressor(
+                level=cls.COMPRESSION_LEVEL
+            )
+        return compressor
+
+    @classmethod
+    def _decompressor(cls):
+        decompressor = getattr(cls._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = cls._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def compress(self, value: bytes) -> bytes:
+        if len(value) >= self.MIN_COMPRESS_SIZE:
+            return self._compressor().compress(value)
+        return value
+
+    def decompress(self, value: bytes) -> bytes:
+        try:
+            if value[:4] == zstandard.FRAME_HEADER:
+                return self._decompressor().decompress(value)
+            return zlib.decompress(value)
+        except (zstandard.ZstdError, zlib.error) as e:
+            raise CompressorError from e
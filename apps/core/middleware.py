@@ -1,11 +1,15 @@
 """
 Cache Middleware for API Response Optimization
 """
-import hashlib
 import logging
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from django.utils.deprecation import MiddlewareMixin
 
+from apps.core.cache import short_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,18 +18,19 @@ class CacheHeaderMiddleware(MiddlewareMixin):
     Middleware to add cache control headers to API responses.
     """
     
-    # Paths that should have caching headers
-    CACHEABLE_PATHS = [
+    # Paths that should have caching headers (tuples, so one
+    # str.startswith call checks every prefix)
+    CACHEABLE_PATHS = (
         '/api/workspaces/',
         '/api/documents/',
-    ]
+    )
     
     # Paths that should never be cached
-    NO_CACHE_PATHS = [
+    NO_CACHE_PATHS = (
         '/api/auth/',
         '/api/notifications/',
         '/admin/',
-    ]
+    )
     
     def process_response(self, request, response):
         """Add appropriate cache headers to responses."""
@@ -37,24 +42,30 @@ class CacheHeaderMiddleware(MiddlewareMixin):
             return response
         
         # Check if path should not be cached
-        for no_cache_path in self.NO_CACHE_PATHS:
-            if path.startswith(no_cache_path):
-                response['Cache-Control'] = 'no-store'
-                return response
+        if path.startswith(self.NO_CACHE_PATHS):
+            response['Cache-Control'] = 'no-store'
+            return response
         
         # Add cache headers for cacheable paths
-        for cacheable_path in self.CACHEABLE_PATHS:
-            if path.startswith(cacheable_path):
-                # Private cache (browser only, not CDN)
-                # max-age for browser, must-revalidate after
-                response['Cache-Control'] = 'private, max-age=60, must-revalidate'
+        if path.startswith(self.CACHEABLE_PATHS):
+            # Private cache (browser only, not CDN)
+            # max-age for browser, must-revalidate after
+            response['Cache-Control'] = 'private, max-age=60, must-revalidate'
+            
+            # Add ETag based on response content
+            if response.content:
+                etag = f'"{short_hash(response.content)}"'
                 
-                # Add ETag based on response content
-                if response.content:
-                    etag = hashlib.md5(response.content).hexdigest()
-                    response['ETag'] = f'"{etag}"'
+                # Client already has this body; send headers only
+                if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+                if if_none_match and response.status_code == 200:
+                    if etag in parse_etags(if_none_match):
+                        response = HttpResponseNotModified()
+                        response['Cache-Control'] = 'private, max-age=60, must-revalidate'
                 
-                return response
+                response['ETag'] = etag
+            
+            return response
         
         return response
 
@@ -74,6 +85,13 @@ class APIResponseCacheMiddleware(MiddlewareMixin):
         '/api/workspaces/$': 'api:workspaces:list',  # List view
     }
     
+    @staticmethod
+    def _get_cache():
+        """Use the api_cache alias (msgpack-serialized) when it's configured."""
+        if 'api_cache' in settings.CACHES:
+            return caches['api_cache']
+        return cache
+    
     def _get_cache_key(self, request):
         """Generate a unique cache key for the request."""
         user_id = request.user.id if request.user.is_authenticated else 'anon'
@@ -81,7 +99,7 @@ class APIResponseCacheMiddleware(MiddlewareMixin):
         query = request.GET.urlencode()
         
         key_data = f"{user_id}:{path}:{query}"
-        return f"api_response:{hashlib.md5(key_data.encode()).hexdigest()}"
+        return f"api_response:{short_hash(key_data.encode())}"
     
     def process_request(self, request):
         """Check for cached response."""
@@ -94,12 +112,12 @@ class APIResponseCacheMiddleware(MiddlewareMixin):
             return None
         
         cache_key = self._get_cache_key(request)
-        cached_response = cache.get(cache_key)
+        cached_response = self._get_cache().get(cache_key)
         
         if cached_response:
             logger.debug(f"API cache hit: {request.path}")
-            from django.http import JsonResponse
-            return JsonResponse(cached_response, safe=False)
+            content, content_type = cached_response
+            return HttpResponse(content, content_type=content_type)
         
         return None
     
@@ -120,12 +138,10 @@ class APIResponseCacheMiddleware(MiddlewareMixin):
         if 'application/json' not in content_type:
             return response
         
-        # Cache the response
+        # Cache the already-rendered body; replaying it needs no JSON round trip
         try:
-            import json
             cache_key = self._get_cache_key(request)
-            response_data = json.loads(response.content.decode('utf-8'))
-            cache.set(cache_key, response_data, self.CACHE_DURATION)
+            self._get_cache().set(cache_key, (response.content, content_type), self.CACHE_DURATION)
             logger.debug(f"API cache set: {request.path}")
         except Exception as e:
             logger.warning(f"Failed to cache API response: {e}")
@@ -4,18 +4,44 @@ Core Abstract Models for the Collaboration Platform
 These models provide common fields and functionality
 that are inherited by other models throughout the application.
 """
+import os
+import threading
+import time
 import uuid
+from typing import Optional
+
+import zstandard
 from django.db import models
 from django.utils import timezone
 
 
+def uuid7(timestamp_ms: Optional[int] = None, entropy: Optional[bytes] = None) -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 (RFC 9562).
+    
+    The leading 48 bits are the Unix time in milliseconds, so new keys land
+    on the right-hand edge of the primary key B-tree instead of a random
+    leaf; the remaining bits are random apart from version and variant.
+    Passing timestamp_ms and 10 bytes of entropy gives a stable ID for
+    records derived from an external one.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    if entropy is None:
+        entropy = os.urandom(10)
+    value = timestamp_ms << 80 | int.from_bytes(entropy, 'big')
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+
 class TimeStampedModel(models.Model):
     """
     Abstract base model that provides self-updating
     `created_at` and `updated_at` fields.
     """
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
-    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
@@ -29,7 +55,7 @@ class UUIDModel(models.Model):
     """
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False
     )
 
@@ -78,7 +104,28 @@ class SoftDeleteModel(models.Model):
         self.save(update_fields=['is_deleted', 'deleted_at'])
 
 
-class SoftDeleteManager(models.Manager):
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk delete() soft-deletes every matched row in one UPDATE.
+    """
+    
+    def delete(self):
+        """Mark all matched records as deleted."""
+        count = self.update(is_deleted=True, deleted_at=timezone.now())
+        return count, {self.model._meta.label: count}
+    
+    delete.alters_data = True
+    delete.queryset_only = True
+    
+    def hard_delete(self):
+        """Actually delete the matched records from the database."""
+        return super().delete()
+    
+    hard_delete.alters_data = True
+    hard_delete.queryset_only = True
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """Manager that excludes soft-deleted objects by default."""
     
     def get_queryset(self):
@@ -97,15 +144,134 @@ class OrderedModel(models.Model):
     """
     Abstract model that provides ordering functionality.
     Useful for blocks, cards, and other ordered items.
+    
+    Positions are sparse floats: moving an item gives it the midpoint of its
+    new neighbours, so a reorder writes one row instead of shifting every
+    sibling. Siblings are renumbered only when repeated inserts at the same
+    spot exhaust float precision.
     """
-    position = models.PositiveIntegerField(default=0, db_index=True)
+    position = models.FloatField(default=0, db_index=True)
 
     class Meta:
         abstract = True
         ordering = ['position']
 
-    def move_to(self, new_position):
+    @staticmethod
+    def get_rank_between(before: Optional[float], after: Optional[float]) -> float:
+        """
+        Return a position between two neighbours; either may be None at the ends.
+        """
+        if before is None and after is None:
+            return 0.0
+        if before is None:
+            return after - 1
+        if after is None:
+            return before + 1
+        return (before + after) / 2
+
+    def get_siblings(self) -> models.QuerySet:
+        """
+        Return the items this one is ordered among, including itself.
+        """
+        raise NotImplementedError("Subclasses must implement get_siblings()")
+
+    def position_at(self, index: int) -> float:
         """
-        Move this item to a new position, adjusting siblings accordingly.
+        Return the position that places this item at index among its siblings.
         """
-        raise NotImplementedError("Subclasses must implement move_to()")
+        siblings = self.get_siblings().exclude(pk=self.pk).order_by('position')
+        positions = siblings.values_list('position', flat=True)
+        index = max(index, 0)
+
+        if index == 0:
+            before, after = None, positions.first()
+        else:
+            window = list(positions[index - 1:index + 1])
+            if not window:
+                window = [positions.last()]
+            before, after = window[0], window[1] if len(window) > 1 else None
+
+        position = self.get_rank_between(before, after)
+        if before is not None and after is not None and not before < position < after:
+            self._renumber(siblings)
+            return self.position_at(index)
+        return position
+
+    def move_to(self, new_position: int):
+        """
+        Move this item to index new_position among its siblings.
+        """
+        self.position = self.position_at(new_position)
+        self.save(update_fields=['position'])
+
+    @classmethod
+    def _renumber(cls, siblings: models.QuerySet):
+        """
+        Respace siblings to consecutive whole positions, keeping their order.
+        """
+        items = list(siblings.only('pk', 'position'))
+        for i, item in enumerate(items):
+            item.position = float(i)
+        cls.objects.bulk_update(items, ['position'])
+
+
+class CompressedBinaryField(models.BinaryField):
+    """
+    BinaryField stored zstd-compressed, transparently to the ORM.
+    
+    Stored values carry a 1-byte encoding tag: 0x00 raw, 0x01 zstd. Small
+    values, and values that don't shrink, are stored raw since a zstd
+    frame would only add overhead. Reads always return bytes.
+    """
+    
+    RAW = 0x00
+    ZSTD = 0x01
+    MIN_COMPRESS_SIZE = 256  # bytes
+    COMPRESSION_LEVEL = 3
+    
+    # zstd contexts are not thread-safe; keep one pair per thread
+    _local = threading.local()
+    
+    @classmethod
+    def _compressor(cls):
+        compressor = getattr(cls._local, 'compressor', None)
+        if compressor is None:
+            compressor = cls._local.compressor = zstandard.ZstdCompressor(
+                level=cls.COMPRESSION_LEVEL
+            )
+        return compressor
+    
+    @classmethod
+    def _decompressor(cls):
+        decompressor = getattr(cls._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = cls._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+    
+    @classmethod
+    def encode(cls, value) -> bytes:
+        value = bytes(value)
+        if len(value) >= cls.MIN_COMPRESS_SIZE:
+            compressed = cls._compressor().compress(value)
+            if len(compressed) < len(value):
+                return bytes([cls.ZSTD]) + compressed
+        return bytes([cls.RAW]) + value
+    
+    @classmethod
+    def decode(cls, value) -> bytes:
+        value = bytes(value)
+        if not value:
+            return value
+        if value[0] == cls.ZSTD:
+            return cls._decompressor().decompress(value[1:])
+        return value[1:]
+    
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is not None:
+            value = self.encode(value)
+        return super().get_db_prep_value(value, connection, prepared)
+    
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.decode(value)
@@ -1,8 +1,10 @@
 """
 Custom Pagination Classes
 """
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsPagination(PageNumberPagination):
@@ -28,6 +30,84 @@ class StandardResultsPagination(PageNumberPagination):
         })
 
 
+class FastPageNumberPagination(StandardResultsPagination):
+    """
+    Page-number pagination without the COUNT(*) query.
+    
+    Fetches one row past the page to tell whether a next page exists, so
+    the response carries has_next/has_previous instead of count and
+    total_pages. Pass ?include_count=1 to get the standard response.
+    """
+    include_count_query_param = 'include_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_count = request.query_params.get(
+            self.include_count_query_param
+        ) in ('1', 'true')
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+        
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        try:
+            page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params.get(self.page_query_param),
+                message='That page number is not a valid integer'
+            ))
+        
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='That page contains no results'
+            ))
+        
+        self.request = request
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.include_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.include_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        if self.include_count:
+            return super().get_paginated_response(data)
+        return Response({
+            'success': True,
+            'data': data,
+            'pagination': {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'page_size': self.page_size,
+                'current_page': self.page_number,
+                'has_next': self.has_next,
+                'has_previous': self.page_number > 1,
+            }
+        })
+
+
 class CursorResultsPagination(CursorPagination):
     """
     Cursor-based pagination for real-time data that changes frequently.
@@ -0,0 +1,249 @@
+"""
+Unit tests for Core cache utilities.
+"""
+import asyncio
+import pytest
+import redis
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from apps.core.cache import (
+    AsyncTTLCache, CacheManager, LocalTTLCache, cached, make_cache_key
+)
+
+
+@pytest.mark.asyncio
+class TestAsyncTTLCache:
+    """Tests for the per-process async TTL cache."""
+
+    async def test_concurrent_misses_share_one_call(self):
+        """Test concurrent callers for one key trigger a single lookup."""
+        cache = AsyncTTLCache(ttl=60)
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return ['user_1']
+
+        results = await asyncio.gather(*[
+            cache.get_or_call('doc_1', lookup) for _ in range(5)
+        ])
+
+        assert results == [['user_1']] * 5
+        assert len(calls) == 1
+
+    async def test_invalidate_forces_refresh(self):
+        """Test an invalidated key is looked up again."""
+        cache = AsyncTTLCache(ttl=60)
+        values = iter([1, 2])
+
+        async def lookup():
+            return next(values)
+
+        assert await cache.get_or_call('doc_1', lookup) == 1
+        assert await cache.get_or_call('doc_1', lookup) == 1
+
+        cache.invalidate('doc_1')
+
+        assert await cache.get_or_call('doc_1', lookup) == 2
+
+    async def test_failed_lookup_is_not_cached(self):
+        """Test errors propagate and are retried on the next call."""
+        cache = AsyncTTLCache(ttl=60)
+        outcomes = iter([ValueError('boom'), 'ok'])
+
+        async def lookup():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with pytest.raises(ValueError):
+            await cache.get_or_call('doc_1', lookup)
+
+        assert await cache.get_or_call('doc_1', lookup) == 'ok'
+
+
+class TestMakeCacheKey:
+    """Tests for cache key generation."""
+
+    def test_short_key_is_kept(self):
+        """Test keys under the length limit are used verbatim."""
+        assert make_cache_key('doc', 1, prefix='p') == 'p:doc:1'
+
+    def test_long_key_is_folded(self):
+        """Test long keys fold to a stable 16-character digest."""
+        key = make_cache_key('x' * 250, prefix='p')
+
+        assert key == make_cache_key('x' * 250, prefix='p')
+        assert len(key) == len('p:') + 16
+
+
+class TestCachedDecorator:
+    """Tests for the cached decorator."""
+
+    def test_cached_none_is_one_lookup(self):
+        """Test a cached None result is served by a single cache read."""
+        calls = []
+
+        @cached(key_prefix='test', cache_none=True)
+        def lookup(key):
+            calls.append(key)
+            return None
+
+        assert lookup('a') is None
+
+        with patch('apps.core.cache._local_cache', LocalTTLCache(ttl=60)), \
+                patch.object(cache, 'get', wraps=cache.get) as mock_get:
+            assert lookup('a') is None
+
+        assert mock_get.call_count == 1
+        assert calls == ['a']
+
+    def test_repeat_call_skips_shared_cache(self):
+        """Test a result cached in process memory is served without Redis."""
+        calls = []
+
+        @cached(key_prefix='test')
+        def lookup(key):
+            calls.append(key)
+            return {'key': key}
+
+        lookup('a')
+
+        with patch.object(cache, 'get') as mock_get:
+            assert lookup('a') == {'key': 'a'}
+
+        mock_get.assert_not_called()
+        assert calls == ['a']
+
+    def test_keyword_arguments_share_key_with_invalidate(self):
+        """Test calls with keyword arguments are invalidated by the same arguments."""
+        calls = []
+
+        @cached(key_prefix='test')
+        def lookup(key, scope=None):
+            calls.append(key)
+            return key
+
+        lookup('a', scope='x')
+        lookup.invalidate('a', scope='x')
+        lookup('a', scope='x')
+
+        assert calls == ['a', 'a']
+
+    def test_invalidate_drops_cached_none(self):
+        """Test invalidation forces the function to run again."""
+        calls = []
+
+        @cached(key_prefix='test', cache_none=True)
+        def lookup(key):
+            calls.append(key)
+            return None
+
+        lookup('a')
+        lookup.invalidate('a')
+        lookup('a')
+
+        assert calls == ['a', 'a']
+
+
+class TestLocalTTLCache:
+    """Tests for the per-process sync TTL cache."""
+
+    def test_expired_entry_is_missing(self):
+        """Test entries are dropped once their TTL passes."""
+        local = LocalTTLCache(ttl=0)
+        local.set('a', 1)
+
+        assert local.get('a') is None
+
+    def test_full_cache_evicts_oldest(self):
+        """Test the cache stays within MAX_ENTRIES."""
+        local = LocalTTLCache(ttl=60)
+
+        with patch.object(LocalTTLCache, 'MAX_ENTRIES', 2):
+            for key in ('a', 'b', 'c'):
+                local.set(key, key)
+
+        assert local.get('a') is None
+        assert local.get('c') == 'c'
+
+
+class TestCacheManagerBulk:
+    """Tests for CacheManager bulk helpers."""
+
+    def test_workspace_bundle_is_one_read(self):
+        """Test workspace entries are fetched with a single get_many."""
+        CacheManager.cache_workspace_detail('ws_1', {'name': 'Team'})
+        CacheManager.cache_workspace_members('ws_1', ['user_1'])
+
+        with patch.object(cache, 'get_many', wraps=cache.get_many) as mock_get_many:
+            bundle = CacheManager.get_workspace_bundle('ws_1')
+
+        mock_get_many.assert_called_once()
+        assert bundle == {'detail': {'name': 'Team'}, 'members': ['user_1']}
+
+    def test_workspace_bundle_is_one_write(self):
+        """Test a workspace bundle is stored with a single set_many."""
+        with patch.object(cache, 'set_many', wraps=cache.set_many) as mock_set_many:
+            CacheManager.cache_workspace_bundle('ws_1', {'name': 'Team'}, ['user_1'], [])
+
+        mock_set_many.assert_called_once()
+        assert CacheManager.get_workspace_bundle('ws_1') == {
+            'detail': {'name': 'Team'}, 'members': ['user_1'], 'boards': []
+        }
+
+    def test_document_bundle_round_trip(self):
+        """Test document detail and blocks are cached and read back together."""
+        CacheManager.cache_document('doc_1', {'title': 'Notes'}, [{'id': 'block_1'}])
+
+        assert CacheManager.get_document_bundle('doc_1') == {
+            'detail': {'title': 'Notes'}, 'blocks': [{'id': 'block_1'}]
+        }
+
+    def test_cache_document_survives_redis_outage(self):
+        """Test a failed document pipeline is logged rather than raised."""
+        redis_conn = MagicMock()
+        redis_conn.pipeline.return_value.execute.side_effect = redis.ConnectionError('down')
+        
+        with patch.object(CacheManager, '_get_redis_connection', return_value=redis_conn), \
+                patch.object(cache, 'set'):
+            CacheManager.cache_document('doc_1', {'title': 'Notes'}, [])
+        
+        redis_conn.pipeline.return_value.execute.assert_called_once()
+    
+    def test_invalidate_workspace_all_is_one_delete(self):
+        """Test workspace invalidation clears every entry in one call."""
+        CacheManager.cache_workspace_detail('ws_1', {'name': 'Team'})
+        CacheManager.cache_workspace_boards('ws_1', [])
+
+        with patch.object(cache, 'delete_many', wraps=cache.delete_many) as mock_delete_many:
+            CacheManager.invalidate_workspace_all('ws_1')
+
+        mock_delete_many.assert_called_once()
+        assert CacheManager.get_workspace_bundle('ws_1') == {}
+
+    def test_invalidate_board_cards_clears_every_list(self):
+        """Test board-wide invalidation clears each indexed list."""
+        CacheManager.cache_board_cards('board_1', 'list_1', ['card_1'])
+        CacheManager.cache_board_cards('board_1', 'list_2', ['card_2'])
+
+        CacheManager.invalidate_board_cards('board_1')
+
+        assert CacheManager.get_board_cards('board_1', 'list_1') is None
+        assert CacheManager.get_board_cards('board_1', 'list_2') is None
+    
+    def test_board_cards_index_survives_redis_outage(self):
+        """Test index pipeline errors are logged rather than raised."""
+        redis_conn = MagicMock()
+        redis_conn.pipeline.return_value.sadd.return_value.expire.return_value \
+            .execute.side_effect = redis.ConnectionError('down')
+        redis_conn.pipeline.return_value.smembers.return_value.delete.return_value \
+            .execute.side_effect = redis.ConnectionError('down')
+        
+        with patch.object(CacheManager, '_get_redis_connection', return_value=redis_conn):
+            CacheManager.cache_board_cards('board_1', 'list_1', ['card_1'])
+            CacheManager.invalidate_board_cards('board_1')
+        
+        assert CacheManager.get_board_cards('board_1', 'list_1') == ['card_1']
@@ -0,0 +1,37 @@
+"""
+Unit tests for cache value compressors.
+"""
+import zlib
+import pytest
+from django_redis.exceptions import CompressorError
+from apps.core.compressors import ZstdCompressor
+
+
+class TestZstdCompressor:
+    """Tests for the zstd django-redis compressor."""
+    
+    @pytest.fixture
+    def compressor(self):
+        return ZstdCompressor({})
+    
+    def test_round_trip(self, compressor):
+        """Test large values compress and decode to the original bytes."""
+        value = b'{"title": "Roadmap"}' * 200
+        compressed = compressor.compress(value)
+        
+        assert len(compressed) < len(value)
+        assert compressor.decompress(compressed) == value
+    
+    def test_small_values_stored_raw(self, compressor):
+        """Test values under the threshold are stored as-is and read back raw."""
+        value = b'\x80\x05small'
+        
+        assert compressor.compress(value) == value
+        with pytest.raises(CompressorError):
+            compressor.decompress(value)
+    
+    def test_reads_legacy_zlib_entries(self, compressor):
+        """Test entries written by the zlib compressor still decode."""
+        value = b'legacy' * 100
+        
+        assert compressor.decompress(zlib.compress(value)) == value
@@ -0,0 +1,89 @@
+"""
+Unit tests for Core cache middleware.
+"""
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from apps.core.middleware import APIResponseCacheMiddleware, CacheHeaderMiddleware
+
+pytestmark = pytest.mark.django_db
+
+
+class TestCacheHeaderMiddleware:
+    """Tests for cache headers on API responses."""
+    
+    def _process(self, **headers):
+        middleware = CacheHeaderMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/workspaces/', **headers)
+        response = HttpResponse(b'[{"id": "ws_1"}]', content_type='application/json')
+        return middleware.process_response(request, response)
+    
+    def test_matching_etag_returns_not_modified(self):
+        """Test a request carrying the current ETag gets an empty 304."""
+        etag = self._process()['ETag']
+        
+        response = self._process(HTTP_IF_NONE_MATCH=etag)
+        
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response['ETag'] == etag
+    
+    def test_stale_etag_returns_full_body(self):
+        """Test a request carrying an old ETag gets the full response."""
+        response = self._process(HTTP_IF_NONE_MATCH='"stale"')
+        
+        assert response.status_code == 200
+        assert response.content == b'[{"id": "ws_1"}]'
+
+
+class TestAPIResponseCacheMiddleware:
+    """Tests for the API response cache."""
+    
+    def test_cached_body_is_replayed_verbatim(self, user):
+        """Test a cached JSON response is served byte-for-byte on the next hit."""
+        middleware = APIResponseCacheMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/workspaces/')
+        request.user = user
+        body = b'[{"id": "ws_1", "name": "Team"}]'
+        
+        middleware.process_response(
+            request, HttpResponse(body, content_type='application/json')
+        )
+        cached = middleware.process_request(request)
+        
+        assert cached.content == body
+        assert cached['Content-Type'] == 'application/json'
+    
+    def test_responses_are_cached_in_api_cache(self, user):
+        """Test responses are stored in the api_cache alias, not the default cache."""
+        from django.core.cache import cache, caches
+        middleware = APIResponseCacheMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/workspaces/')
+        request.user = user
+        
+        middleware.process_response(
+            request, HttpResponse(b'[]', content_type='application/json')
+        )
+        
+        key = middleware._get_cache_key(request)
+        assert caches['api_cache'].get(key) is not None
+        assert cache.get(key) is None
+    
+    def test_msgpack_round_trip_is_replayable(self, user):
+        """Test a cached entry read back through msgpack (as a list) still replays."""
+        from unittest.mock import patch
+        from django_redis.serializers.msgpack import MSGPackSerializer
+        serializer = MSGPackSerializer({})
+        body = b'[{"id": "ws_1"}]'
+        stored = serializer.loads(serializer.dumps((body, 'application/json')))
+        middleware = APIResponseCacheMiddleware(lambda request: None)
+        request = RequestFactory().get('/api/workspaces/')
+        request.user = user
+        
+        with patch.object(middleware, '_get_cache') as mock_cache:
+            mock_cache.return_value.get.return_value = stored
+            cached = middleware.process_request(request)
+        
+        assert stored == [body, 'application/json']
+        assert cached.content == body
+        assert cached['Content-Type'] == 'application/json'
@@ -0,0 +1,93 @@
+"""
+Unit tests for Core model fields.
+"""
+import uuid
+import pytest
+from django.db import connection
+from apps.core.models import CompressedBinaryField, uuid7
+from apps.collaboration.models import OperationLog
+from apps.core.tests.factories import DocumentFactory
+from apps.documents.models import Document
+
+pytestmark = pytest.mark.django_db
+
+
+class TestUUID7:
+    """Tests for time-ordered primary keys."""
+    
+    def test_version_and_variant(self):
+        """Test generated ids are RFC 9562 version 7 UUIDs."""
+        value = uuid7()
+        
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+    
+    def test_ids_sort_by_creation_time(self, monkeypatch):
+        """Test ids from later milliseconds sort after earlier ones."""
+        monkeypatch.setattr('apps.core.models.time.time_ns', lambda: 1_000_000_000)
+        first = uuid7()
+        monkeypatch.setattr('apps.core.models.time.time_ns', lambda: 2_000_000_000)
+        second = uuid7()
+        
+        assert first < second
+
+
+class TestCompressedBinaryField:
+    """Tests for the zstd-compressed binary field."""
+    
+    @pytest.mark.parametrize('value', [b'', b'\x01\x02', b'abc' * 1000, bytes(range(256)) * 2])
+    def test_round_trip(self, value):
+        """Test values decode to exactly what was encoded."""
+        assert CompressedBinaryField.decode(CompressedBinaryField.encode(value)) == value
+    
+    def test_small_values_stored_raw(self):
+        """Test values under the threshold skip compression."""
+        assert CompressedBinaryField.encode(b'\x01\x02') == b'\x00\x01\x02'
+    
+    def test_payload_compressed_in_database(self):
+        """Test large payloads are stored compressed and read back as bytes."""
+        document = DocumentFactory()
+        payload = b'yjs-update' * 500
+        op = OperationLog.objects.create(
+            document=document,
+            user=document.created_by,
+            operation_id=uuid.uuid4(),
+            operation_type='update',
+            payload=payload,
+            version=1,
+            client_id='client_1',
+            timestamp=1
+        )
+        
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT payload FROM operation_logs WHERE id = %s', [op.id])
+            stored = bytes(cursor.fetchone()[0])
+        
+        assert stored[0] == CompressedBinaryField.ZSTD
+        assert len(stored) < len(payload)
+        assert OperationLog.objects.get(id=op.id).payload == payload
+
+
+class TestSoftDeleteQuerySet:
+    """Tests for bulk soft deletes."""
+    
+    def test_bulk_delete_is_one_update(self, django_assert_num_queries):
+        """Test queryset delete marks every row deleted in a single query."""
+        documents = DocumentFactory.create_batch(3)
+        
+        with django_assert_num_queries(1):
+            count, _ = Document.objects.filter(
+                id__in=[d.id for d in documents]
+            ).delete()
+        
+        assert count == 3
+        assert not Document.objects.filter(id__in=[d.id for d in documents]).exists()
+        assert Document.objects.deleted_only().filter(deleted_at__isnull=False).count() == 3
+    
+    def test_hard_delete_removes_rows(self):
+        """Test hard_delete still removes rows from the database."""
+        document = DocumentFactory()
+        
+        Document.objects.filter(id=document.id).hard_delete()
+        
+        assert not Document.objects.all_with_deleted().filter(id=document.id).exists()
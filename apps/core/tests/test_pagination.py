@@ -0,0 +1,64 @@
+"""
+Unit tests for Core pagination classes.
+"""
+import pytest
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.core.pagination import FastPageNumberPagination
+from apps.core.tests.factories import UserFactory
+from apps.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def _paginate(query='', page_size=2):
+    paginator = FastPageNumberPagination()
+    paginator.page_size = page_size
+    request = Request(APIRequestFactory().get(f'/api/users/{query}'))
+    page = paginator.paginate_queryset(User.objects.order_by('email'), request)
+    return paginator, page
+
+
+class TestFastPageNumberPagination:
+    """Tests for count-free page-number pagination."""
+    
+    def test_skips_count_query(self, django_assert_num_queries):
+        """Test a page costs one query and reports whether more pages exist."""
+        UserFactory.create_batch(3)
+        
+        with django_assert_num_queries(1):
+            paginator, page = _paginate()
+        pagination = paginator.get_paginated_response([]).data['pagination']
+        
+        assert len(page) == 2
+        assert pagination['has_next'] is True
+        assert pagination['has_previous'] is False
+        assert 'count' not in pagination
+        assert pagination['next'].endswith('?page=2')
+    
+    def test_last_page(self):
+        """Test the last page has no next link and links back to page 1."""
+        UserFactory.create_batch(3)
+        
+        paginator, page = _paginate('?page=2')
+        pagination = paginator.get_paginated_response([]).data['pagination']
+        
+        assert len(page) == 1
+        assert pagination['has_next'] is False
+        assert pagination['previous'] == 'http://testserver/api/users/'
+    
+    def test_include_count_keeps_standard_response(self):
+        """Test ?include_count=1 returns the exact count."""
+        UserFactory.create_batch(3)
+        
+        paginator, _ = _paginate('?include_count=1')
+        
+        assert paginator.get_paginated_response([]).data['pagination']['count'] == 3
+    
+    def test_empty_page_raises_not_found(self):
+        """Test pages past the end are rejected."""
+        UserFactory.create_batch(1)
+        
+        with pytest.raises(NotFound):
+            _paginate('?page=3')
@@ -7,6 +7,7 @@ from apps.core.utils import (
     generate_cache_key,
     CacheService,
     IdempotencyService,
+    RateLimitService,
     deep_merge,
     calculate_content_hash
 )
@@ -22,7 +23,7 @@ class TestGenerateCacheKey:
         key = generate_cache_key('arg1', 'arg2')
         
         assert key is not None
-        assert len(key) == 32  # MD5 hex length
+        assert len(key) == 32  # 16-byte blake2b hex length
     
     def test_generate_cache_key_with_prefix(self):
         """Test generating a cache key with prefix."""
@@ -45,6 +46,24 @@ class TestGenerateCacheKey:
         assert key1 != key2
 
 
+class TestGetRedisClient:
+    """Tests for get_redis_client function."""
+    
+    def test_sync_client_is_shared(self, settings, monkeypatch):
+        """Test sync callers reuse one process-wide client and pool."""
+        from apps.core.utils import get_redis_client
+        monkeypatch.setattr('apps.core.utils._redis_client', None)
+        settings.CHANNEL_LAYERS = {
+            'default': {'CONFIG': {'hosts': [('localhost', 6379)]}},
+        }
+        
+        first = get_redis_client()
+        second = get_redis_client()
+        
+        assert first is second
+        assert first.connection_pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+
+
 class TestCacheService:
     """Tests for CacheService class."""
     
@@ -77,22 +96,30 @@ class TestCacheService:
         assert result == 'cached_value'
         assert len(fetch_calls) == 0  # fetch_func should not be called
     
+    def test_get_or_set_caches_none(self):
+        """Test a None result is cached instead of re-fetched."""
+        fetch_calls = []
+        
+        def fetch_func():
+            fetch_calls.append(1)
+            return None
+        
+        assert CacheService.get_or_set('none_key', fetch_func, timeout=60) is None
+        assert CacheService.get_or_set('none_key', fetch_func, timeout=60) is None
+        assert len(fetch_calls) == 1
+    
     @patch('apps.core.utils.get_redis_client')
     def test_invalidate_pattern(self, mock_get_redis):
         """Test invalidating cache keys by pattern."""
         mock_redis = MagicMock()
         mock_get_redis.return_value = mock_redis
         
-        # Simulate scan returning some keys then finishing
-        mock_redis.scan.side_effect = [
-            (100, ['key1', 'key2']),
-            (0, [])
-        ]
+        mock_redis.scan_iter.return_value = iter(['key1', 'key2'])
         
-        CacheService.invalidate_pattern('test_pattern')
+        CacheService.invalidate_pattern('doc:123')
         
-        mock_redis.scan.assert_called()
-        mock_redis.delete.assert_called_with('key1', 'key2')
+        mock_redis.scan_iter.assert_called_once_with(match='doc:123*', count=1000)
+        mock_redis.unlink.assert_called_once_with('key1', 'key2')
     
     def test_get_document_cache_key(self):
         """Test generating document cache key."""
@@ -142,6 +169,84 @@ class TestIdempotencyService:
         
         assert cache.get('idempotency:test-message-id') is True
     
+    def test_check_and_mark(self):
+        """Test check_and_mark claims a message only once."""
+        from django.core.cache import cache
+        cache.delete('idempotency:claim-msg')
+        
+        assert IdempotencyService.check_and_mark('claim-msg') is True
+        assert IdempotencyService.check_and_mark('claim-msg') is False
+    
+    def test_check_and_mark_fails_open(self):
+        """Test a claim that couldn't be made lets the message through."""
+        from django.core.cache import cache
+        
+        def my_func():
+            return 'done'
+        
+        with patch.object(cache, 'add', return_value=None):
+            result, was_processed = IdempotencyService.process_once('outage-msg', my_func)
+        
+        assert result == 'done'
+        assert was_processed is True
+    
+    @pytest.mark.asyncio
+    async def test_acheck_and_mark(self):
+        """Test acheck_and_mark issues a single SET NX EX."""
+        from unittest.mock import AsyncMock
+        from django.core.cache import cache
+        mock_redis = MagicMock()
+        mock_redis.set = AsyncMock(side_effect=[True, None])
+        
+        with patch('apps.core.utils.get_cache_redis_client', return_value=mock_redis):
+            assert await IdempotencyService.acheck_and_mark('async-msg') is True
+            assert await IdempotencyService.acheck_and_mark('async-msg') is False
+        
+        mock_redis.set.assert_called_with(
+            cache.make_key('idempotency:async-msg'), 1,
+            nx=True, ex=IdempotencyService.IDEMPOTENCY_TTL
+        )
+    
+    @pytest.mark.asyncio
+    async def test_acheck_and_mark_fails_open(self):
+        """Test acheck_and_mark lets messages through when Redis is down."""
+        from unittest.mock import AsyncMock
+        import redis
+        mock_redis = MagicMock()
+        mock_redis.set = AsyncMock(side_effect=redis.ConnectionError('down'))
+        
+        with patch('apps.core.utils.get_cache_redis_client', return_value=mock_redis):
+            assert await IdempotencyService.acheck_and_mark('async-msg') is True
+    
+    @pytest.mark.asyncio
+    async def test_sync_and_async_claims_are_shared(self):
+        """Test a claim made by either path is a duplicate for the other."""
+        assert IdempotencyService.check_and_mark('shared-sync-msg') is True
+        assert await IdempotencyService.acheck_and_mark('shared-sync-msg') is False
+        
+        assert await IdempotencyService.acheck_and_mark('shared-async-msg') is True
+        assert IdempotencyService.is_duplicate('shared-async-msg') is True
+        assert IdempotencyService.check_and_mark('shared-async-msg') is False
+    
+    @pytest.mark.asyncio
+    async def test_async_client_uses_cache_database(self):
+        """Test the async claim client targets the default cache's Redis database."""
+        from apps.core.utils import get_cache_redis_client
+        
+        with patch('apps.core.utils.settings') as mock_settings, \
+                patch('apps.core.utils._async_cache_clients', {}):
+            mock_settings.CACHES = {
+                'default': {
+                    'BACKEND': 'django_redis.cache.RedisCache',
+                    'LOCATION': 'redis://cache-host:6380/1',
+                },
+            }
+            mock_settings.REDIS_MAX_CONNECTIONS = 10
+            client = get_cache_redis_client()
+        
+        kwargs = client.connection_pool.connection_kwargs
+        assert (kwargs['host'], kwargs['port'], kwargs['db']) == ('cache-host', 6380, 1)
+    
     def test_process_once_first_time(self):
         """Test process_once executes function first time."""
         from django.core.cache import cache
@@ -177,6 +282,48 @@ class TestIdempotencyService:
         assert result is None
         assert was_processed is False
         assert len(call_count) == 0
+    
+    def test_process_once_releases_claim_on_error(self):
+        """Test a failed message can be processed again."""
+        def failing():
+            raise ValueError('boom')
+        
+        with pytest.raises(ValueError):
+            IdempotencyService.process_once('failing-msg', failing)
+        
+        result, was_processed = IdempotencyService.process_once('failing-msg', lambda: 'ok')
+        
+        assert result == 'ok'
+        assert was_processed is True
+
+
+class TestRateLimitService:
+    """Tests for RateLimitService."""
+    
+    @pytest.mark.asyncio
+    async def test_ahit_over_limit(self):
+        """Test hits beyond the limit are rejected."""
+        from unittest.mock import AsyncMock
+        mock_redis = MagicMock()
+        mock_redis.evalsha = AsyncMock(side_effect=[1, 2, 3])
+        
+        with patch('apps.core.utils.get_redis_client', return_value=mock_redis):
+            results = [await RateLimitService.ahit('msg:user_1', limit=2) for _ in range(3)]
+        
+        assert results == [True, True, False]
+        key = mock_redis.evalsha.call_args[0][2]
+        assert key.startswith('rl:msg:user_1:')
+    
+    @pytest.mark.asyncio
+    async def test_ahit_fails_open(self):
+        """Test Redis errors don't block clients."""
+        import redis
+        from unittest.mock import AsyncMock
+        mock_redis = MagicMock()
+        mock_redis.evalsha = AsyncMock(side_effect=redis.ConnectionError('down'))
+        
+        with patch('apps.core.utils.get_redis_client', return_value=mock_redis):
+            assert await RateLimitService.ahit('msg:user_1', limit=1) is True
 
 
 class TestDeepMerge:
@@ -225,6 +372,15 @@ class TestDeepMerge:
         deep_merge(base, updates)
         
         assert base == {'a': 1}
+    
+    def test_deep_merge_does_not_modify_nested_base(self):
+        """Test merging two levels down leaves the base's nested dicts intact."""
+        base = {'a': {'b': {'c': 1}}}
+        
+        result = deep_merge(base, {'a': {'b': {'d': 2}}})
+        
+        assert result == {'a': {'b': {'c': 1, 'd': 2}}}
+        assert base == {'a': {'b': {'c': 1}}}
 
 
 class TestCalculateContentHash:
@@ -236,7 +392,7 @@ class TestCalculateContentHash:
         hash2 = calculate_content_hash('test content')
         
         assert hash1 == hash2
-        assert len(hash1) == 16  # Truncated SHA256
+        assert len(hash1) == 16  # 8-byte blake2b digest
     
     def test_hash_dict(self):
         """Test hashing a dictionary."""
@@ -246,6 +402,25 @@ class TestCalculateContentHash:
         # Should be same regardless of key order due to sort_keys
         assert hash1 == hash2
     
+    def test_hash_list_of_dicts(self):
+        """Test dicts nested in lists are hashed independent of key order."""
+        hash1 = calculate_content_hash([{'a': 1, 'b': 2}])
+        hash2 = calculate_content_hash([{'b': 2, 'a': 1}])
+        
+        assert hash1 == hash2
+    
+    def test_hash_dict_with_int_keys(self):
+        """Test dicts with non-string keys are hashed independent of key order."""
+        assert calculate_content_hash({1: 'a', 2: 'b'}) == calculate_content_hash({2: 'b', 1: 'a'})
+    
+    def test_hash_dict_with_big_int(self):
+        """Test values orjson can't encode fall back to the json module."""
+        assert len(calculate_content_hash({'n': 2 ** 70})) == 16
+    
+    def test_hash_bytes_uses_raw_content(self):
+        """Test binary content hashes its bytes, not its repr."""
+        assert calculate_content_hash(b'payload') == calculate_content_hash('payload')
+    
     def test_hash_different_content(self):
         """Test that different content produces different hashes."""
         hash1 = calculate_content_hash('content1')
@@ -47,6 +47,19 @@ class DocumentSerializer(serializers.ModelSerializer):
             'blocks', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_by', 'last_edited_by', 'last_edited_at', 'current_version']
+    
+    def update(self, instance, validated_data):
+        """
+        Write only the submitted fields.
+        
+        A full save() would write back current_version from this request's
+        snapshot of the row, undoing versions claimed meanwhile by
+        collaboration batches.
+        """
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'last_edited_at', 'updated_at'])
+        return instance
 
 
 class DocumentListSerializer(serializers.ModelSerializer):
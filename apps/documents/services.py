@@ -112,7 +112,9 @@ class DocumentService:
         for key, value in kwargs.items():
             setattr(document, key, value)
         document.last_edited_by = user
-        document.save()
+        document.save(update_fields=[
+            *kwargs, 'last_edited_by', 'last_edited_at', 'updated_at'
+        ])
         
         # Invalidate caches
         CacheManager.invalidate_document_all(str(document.id))
@@ -1,9 +1,9 @@
 """
 Document Signals
 """
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import Document, Block
+from .models import Document, Block, DocumentPermission
 from django.utils import timezone
 
 
@@ -25,3 +25,17 @@ def block_pre_save(sender, instance, **kwargs):
     """
     if instance.pk:  # Existing block
         instance.version += 1
+
+
+@receiver(post_save, sender=DocumentPermission)
+@receiver(post_delete, sender=DocumentPermission)
+def document_permission_changed(sender, instance, **kwargs):
+    """
+    Invalidate cached roles and access decisions for the affected user.
+    """
+    from apps.workspaces.permissions import invalidate_permission_cache
+    
+    invalidate_permission_cache(
+        user_id=instance.user_id,
+        document_id=instance.document_id
+    )
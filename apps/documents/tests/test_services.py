@@ -97,6 +97,21 @@ class TestDocumentService:
         # Verify parent relationship maintained
         assert dup_blocks[1].parent_id == dup_blocks[0].id
     
+    def test_update_document_keeps_concurrent_version(self):
+        """Test updating metadata doesn't write back a stale current_version"""
+        document = DocumentFactory(current_version=1)
+        user = UserFactory()
+        
+        # A collaboration batch claims versions after the document was loaded
+        Document.objects.filter(id=document.id).update(current_version=7)
+        
+        DocumentService.update_document(document, user, title='Renamed')
+        
+        document.refresh_from_db()
+        assert document.title == 'Renamed'
+        assert document.last_edited_by == user
+        assert document.current_version == 7
+    
     def test_create_version_snapshot(self):
         """Test creating version snapshot"""
         user = UserFactory()
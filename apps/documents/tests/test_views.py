@@ -71,6 +71,22 @@ class TestDocumentViewSet:
             status.HTTP_404_NOT_FOUND
         ]
     
+    def test_update_document_keeps_concurrent_version(self, user):
+        """Test the serializer saves only submitted fields"""
+        from apps.documents.models import Document
+        from apps.documents.serializers import DocumentSerializer
+        
+        document = DocumentFactory(created_by=user, current_version=1)
+        Document.objects.filter(id=document.id).update(current_version=7)
+        
+        serializer = DocumentSerializer(document, data={'title': 'Renamed'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(last_edited_by=user)
+        
+        document.refresh_from_db()
+        assert document.title == 'Renamed'
+        assert document.current_version == 7
+    
     def test_delete_document(self, authenticated_client, user):
         """Test deleting a document."""
         workspace = WorkspaceFactory(owner=user)
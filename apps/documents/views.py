@@ -86,8 +86,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         document_id = str(document.id)
         
         # Soft delete
-        document.is_deleted = True
-        document.save()
+        document.soft_delete()
         
         # Invalidate cache for immediate display
         CacheManager.invalidate_document_all(document_id)
@@ -1,6 +1,8 @@
 """
 User Services - Business Logic Layer
 """
+import json
+import logging
 from typing import Optional
 from django.contrib.auth import get_user_model
 from django.db import transaction, models
@@ -8,6 +10,7 @@ from django.utils import timezone
 from .models import UserActivity, UserSession
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class UserService:
@@ -15,6 +18,10 @@ class UserService:
     Service class for user-related business logic.
     """
     
+    # Redis stream buffering high-frequency activity for drain_activity_stream
+    ACTIVITY_STREAM_KEY = 'user_activity'
+    ACTIVITY_STREAM_MAXLEN = 100000
+    
     @staticmethod
     def log_activity(
         user: User,
@@ -42,6 +49,47 @@ class UserService:
             object_id=object_id
         )
     
+    @staticmethod
+    def queue_activity(
+        user_id: str,
+        activity_type: str,
+        content_type: str = '',
+        object_id: str = None,
+        metadata: dict = None
+    ):
+        """
+        Log a user activity without a database round-trip.
+        
+        The entry is appended to a Redis stream and bulk inserted by the
+        drain_activity_stream task a few seconds later. For hot paths such
+        as collaborative editing; falls back to a direct insert if Redis
+        is unavailable, since activity logging must never fail the caller.
+        """
+        from apps.core.utils import get_redis_client
+        
+        try:
+            get_redis_client().xadd(
+                UserService.ACTIVITY_STREAM_KEY,
+                {
+                    'user_id': str(user_id),
+                    'activity_type': activity_type,
+                    'content_type': content_type,
+                    'object_id': object_id or '',
+                    'metadata': json.dumps(metadata or {}),
+                },
+                maxlen=UserService.ACTIVITY_STREAM_MAXLEN,
+                approximate=True
+            )
+        except Exception as e:
+            logger.warning(f"Activity stream unavailable, logging directly: {e}")
+            UserActivity.objects.create(
+                user_id=user_id,
+                activity_type=activity_type,
+                metadata=metadata or {},
+                content_type=content_type,
+                object_id=object_id
+            )
+    
     @staticmethod
     def get_client_ip(request) -> Optional[str]:
         """
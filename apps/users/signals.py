@@ -4,6 +4,7 @@ User Signals
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -13,6 +14,9 @@ def user_post_save(sender, instance, created, **kwargs):
     """
     Signal handler for post-save user events.
     """
+    # Public profile is cached for WebSocket presence payloads
+    cache.delete(f"user_pub:{instance.id}")
+    
     if created:
         # Initialize user preferences with defaults
         if not instance.preferences:
@@ -0,0 +1,94 @@
+"""
+User Celery Tasks
+"""
+import hashlib
+import json
+import logging
+import uuid
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+def _build_activity(entry_id: str, fields: dict):
+    """
+    Build an unsaved UserActivity for a stream entry.
+    
+    The primary key is a UUIDv7 derived from the entry id, so an entry
+    inserted again after a crash before XDEL conflicts instead of
+    duplicating. Raises KeyError or ValueError for malformed entries.
+    """
+    from apps.core.models import uuid7
+    from .models import UserActivity
+    
+    timestamp_ms = int(entry_id.split('-')[0])
+    entropy = hashlib.blake2b(entry_id.encode(), digest_size=10).digest()
+    return UserActivity(
+        id=uuid7(timestamp_ms, entropy),
+        user_id=uuid.UUID(fields['user_id']),
+        activity_type=fields['activity_type'],
+        content_type=fields.get('content_type', ''),
+        object_id=uuid.UUID(fields['object_id']) if fields.get('object_id') else None,
+        metadata=json.loads(fields.get('metadata') or '{}'),
+    )
+
+
+@shared_task
+def drain_activity_stream(batch_size=1000):
+    """
+    Bulk insert activities queued by UserService.queue_activity.
+    Runs every few seconds via Celery Beat.
+    
+    Entries that can't be inserted (malformed, or for a user deleted since
+    they were queued) are dropped with a warning rather than retried, so
+    one bad entry can't stall the stream.
+    """
+    from apps.core.utils import get_redis_client
+    from .models import User, UserActivity
+    from .services import UserService
+    
+    redis_client = get_redis_client()
+    
+    # Overlapping runs would insert the same entries twice
+    lock_key = f"lock:{UserService.ACTIVITY_STREAM_KEY}"
+    if not redis_client.set(lock_key, 1, nx=True, ex=60):
+        return 0
+    
+    drained = 0
+    try:
+        while True:
+            entries = redis_client.xrange(UserService.ACTIVITY_STREAM_KEY, count=batch_size)
+            if not entries:
+                break
+            
+            activities = []
+            for entry_id, fields in entries:
+                try:
+                    activities.append(_build_activity(entry_id, fields))
+                except (KeyError, ValueError) as e:
+                    logger.warning(f"Dropping malformed activity {entry_id}: {e}")
+            
+            user_ids = set(User.objects.filter(
+                id__in={activity.user_id for activity in activities}
+            ).values_list('id', flat=True))
+            
+            UserActivity.objects.bulk_create(
+                [activity for activity in activities if activity.user_id in user_ids],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            redis_client.xdel(
+                UserService.ACTIVITY_STREAM_KEY,
+                *[entry_id for entry_id, _ in entries]
+            )
+            drained += len(entries)
+            
+            if len(entries) < batch_size:
+                break
+    finally:
+        redis_client.delete(lock_key)
+    
+    if drained:
+        logger.info(f"Drained {drained} activities from the stream")
+    return drained
@@ -40,6 +40,31 @@ class TestUserService:
         
         assert activity.ip_address == '192.168.1.1'
     
+    def test_queue_activity(self, user, mock_redis):
+        """Test queued activity goes to the Redis stream, not the database."""
+        UserService.queue_activity(
+            user_id=user.id,
+            activity_type='document_edit',
+            content_type='document',
+            object_id='00000000-0000-0000-0000-000000000001',
+            metadata={'version': 3}
+        )
+        
+        mock_redis.xadd.assert_called_once()
+        key, fields = mock_redis.xadd.call_args.args
+        assert key == UserService.ACTIVITY_STREAM_KEY
+        assert fields['user_id'] == str(user.id)
+        assert fields['metadata'] == '{"version": 3}'
+        assert not UserActivity.objects.exists()
+    
+    def test_queue_activity_falls_back_to_database(self, user, mock_redis):
+        """Test activity is written directly when Redis is unavailable."""
+        mock_redis.xadd.side_effect = ConnectionError('down')
+        
+        UserService.queue_activity(user_id=user.id, activity_type='document_edit')
+        
+        assert UserActivity.objects.filter(user=user, activity_type='document_edit').exists()
+    
     def test_get_client_ip_from_remote_addr(self, rf):
         """Test getting client IP from REMOTE_ADDR."""
         request = rf.get('/')
@@ -0,0 +1,69 @@
+"""
+Unit tests for User tasks.
+"""
+import uuid
+import pytest
+from apps.users.models import UserActivity
+from apps.users.tasks import drain_activity_stream
+
+pytestmark = pytest.mark.django_db
+
+
+class TestUserTasks:
+    """Tests for user Celery tasks."""
+    
+    def test_drain_activity_stream(self, user, mock_redis):
+        """Test queued activities are bulk inserted and removed from the stream."""
+        document_id = str(uuid.uuid4())
+        mock_redis.set.return_value = True
+        mock_redis.xrange.return_value = [
+            ('1-0', {'user_id': str(user.id), 'activity_type': 'document_edit',
+                     'content_type': 'document', 'object_id': document_id,
+                     'metadata': '{"version": 2}'}),
+            ('1-1', {'user_id': str(user.id), 'activity_type': 'document_edit',
+                     'content_type': 'document', 'object_id': '',
+                     'metadata': '{}'}),
+        ]
+        
+        result = drain_activity_stream()
+        
+        assert result == 2
+        assert UserActivity.objects.filter(user=user).count() == 2
+        assert UserActivity.objects.get(object_id=document_id).metadata == {'version': 2}
+        mock_redis.xdel.assert_called_once_with('user_activity', '1-0', '1-1')
+        mock_redis.delete.assert_called_once()
+    
+    def test_drain_activity_stream_skips_when_locked(self, mock_redis):
+        """Test an overlapping run leaves the stream to the running one."""
+        mock_redis.set.return_value = None
+        
+        assert drain_activity_stream() == 0
+        mock_redis.xrange.assert_not_called()
+    
+    def test_drain_activity_stream_drops_poison_entries(self, user, mock_redis):
+        """Test entries that can't be inserted are removed instead of retried."""
+        mock_redis.set.return_value = True
+        mock_redis.xrange.return_value = [
+            ('1-0', {'user_id': str(user.id), 'activity_type': 'document_edit'}),
+            ('1-1', {'user_id': str(uuid.uuid4()), 'activity_type': 'document_edit'}),
+            ('1-2', {'user_id': str(user.id), 'activity_type': 'document_edit',
+                     'metadata': 'not json'}),
+            ('1-3', {'activity_type': 'document_edit'}),
+        ]
+        
+        assert drain_activity_stream() == 4
+        
+        assert UserActivity.objects.count() == 1
+        mock_redis.xdel.assert_called_once_with('user_activity', '1-0', '1-1', '1-2', '1-3')
+    
+    def test_drain_activity_stream_redelivery_is_idempotent(self, user, mock_redis):
+        """Test entries drained again after a missed XDEL aren't inserted twice."""
+        mock_redis.set.return_value = True
+        mock_redis.xrange.return_value = [
+            ('1700000000000-0', {'user_id': str(user.id), 'activity_type': 'document_edit'}),
+        ]
+        
+        drain_activity_stream()
+        drain_activity_stream()
+        
+        assert UserActivity.objects.filter(user=user).count() == 1
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-15 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workspaces', '0007_add_status_to_card'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='board',
+            name='position',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='boardlist',
+            name='position',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='position',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+    ]
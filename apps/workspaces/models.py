@@ -261,6 +261,9 @@ class Board(BaseModel, SoftDeleteModel, OrderedModel):
     
     def __str__(self):
         return f"{self.workspace.name} / {self.name}"
+    
+    def get_siblings(self):
+        return Board.objects.filter(workspace_id=self.workspace_id, parent_id=self.parent_id)
 
 
 class BoardMembership(BaseModel):
@@ -334,6 +337,9 @@ class BoardList(BaseModel, OrderedModel):
     
     def __str__(self):
         return f"{self.board.name} / {self.name}"
+    
+    def get_siblings(self):
+        return BoardList.objects.filter(board_id=self.board_id)
 
 
 class Card(BaseModel, OrderedModel):
@@ -408,6 +414,9 @@ class Card(BaseModel, OrderedModel):
     
     def __str__(self):
         return self.title
+    
+    def get_siblings(self):
+        return Card.objects.filter(list_id=self.list_id)
 
 
 class CardComment(BaseModel):
@@ -5,8 +5,16 @@ Implements granular RBAC at workspace, board, and document levels.
 """
 from rest_framework import permissions
 from django.core.cache import cache
+from apps.core.cache import LocalTTLCache
 from .models import WorkspaceMembership, BoardMembership, WorkspaceRole, DocumentRole
 
+# Workspace roles are read on nearly every request; keep them in process
+# memory briefly. Invalidation clears the local copy at once, other workers
+# drop theirs when it expires.
+WORKSPACE_ROLE_LOCAL_TTL = 5  # seconds
+_workspace_roles = LocalTTLCache(ttl=WORKSPACE_ROLE_LOCAL_TTL)
+_MISS = object()
+
 
 class RolePermissions:
     """
@@ -77,6 +85,10 @@ def get_workspace_role(user, workspace):
         return None
     
     cache_key = f"ws_role:{workspace.id}:{user.id}"
+    role = _workspace_roles.get(cache_key, _MISS)
+    if role is not _MISS:
+        return role
+    
     role = cache.get(cache_key)
     
     if role is None:
@@ -89,6 +101,7 @@ def get_workspace_role(user, workspace):
         role = membership.role if membership else None
         cache.set(cache_key, role, timeout=300)  # Cache for 5 minutes
     
+    _workspace_roles.set(cache_key, role)
     return role
 
 
@@ -168,8 +181,25 @@ def invalidate_permission_cache(user_id, workspace_id=None, document_id=None):
     """
     if workspace_id:
         cache.delete(f"ws_role:{workspace_id}:{user_id}")
+        _workspace_roles.invalidate(f"ws_role:{workspace_id}:{user_id}")
+        
+        # Document roles and WebSocket access decisions derive from the
+        # workspace role, so drop them for every document in the workspace.
+        from apps.documents.models import Document
+        document_ids = Document.objects.filter(
+            workspace_id=workspace_id
+        ).values_list('id', flat=True)
+        keys = []
+        for doc_id in document_ids:
+            keys.append(f"doc_role:{doc_id}:{user_id}")
+            keys.append(f"perm:{user_id}:{doc_id}")
+        if keys:
+            cache.delete_many(keys)
     if document_id:
-        cache.delete(f"doc_role:{document_id}:{user_id}")
+        cache.delete_many([
+            f"doc_role:{document_id}:{user_id}",
+            f"perm:{user_id}:{document_id}",
+        ])
 
 
 # =============================================================================
@@ -325,48 +325,13 @@ class BoardService:
     def move_board(board: Board, new_position: int, new_parent: Optional[Board] = None):
         """
         Move a board to a new position or parent.
+        
+        new_position is the board's index among its new siblings. Only the
+        moved row is written; see OrderedModel.position_at.
         """
-        from django.db.models import F
-        
-        old_position = board.position
-        old_parent = board.parent
-        
-        # If parent is changing
-        if new_parent != old_parent:
-            # Update positions in old parent's children
-            Board.objects.filter(
-                workspace=board.workspace,
-                parent=old_parent,
-                position__gt=old_position
-            ).update(position=F('position') - 1)
-            
-            # Update positions in new parent's children
-            Board.objects.filter(
-                workspace=board.workspace,
-                parent=new_parent,
-                position__gte=new_position
-            ).update(position=F('position') + 1)
-            
-            board.parent = new_parent
-        else:
-            # Same parent, just reorder
-            if new_position > old_position:
-                Board.objects.filter(
-                    workspace=board.workspace,
-                    parent=old_parent,
-                    position__gt=old_position,
-                    position__lte=new_position
-                ).update(position=F('position') - 1)
-            else:
-                Board.objects.filter(
-                    workspace=board.workspace,
-                    parent=old_parent,
-                    position__lt=old_position,
-                    position__gte=new_position
-                ).update(position=F('position') + 1)
-        
-        board.position = new_position
-        board.save()
+        board.parent = new_parent
+        board.position = board.position_at(int(new_position))
+        board.save(update_fields=['parent', 'position', 'updated_at'])
         
         # Invalidate workspace boards cache for immediate display
         CacheManager.invalidate_workspace_boards(str(board.workspace_id))
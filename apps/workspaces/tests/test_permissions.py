@@ -3,7 +3,8 @@ Unit tests for workspace permissions.
 """
 import pytest
 from django.contrib.auth.models import AnonymousUser
-from apps.workspaces.permissions import has_document_permission
+from django.core.cache import cache
+from apps.workspaces.permissions import has_document_permission, get_workspace_role
 from apps.workspaces.models import WorkspaceRole
 from apps.core.tests.factories import (
     UserFactory, WorkspaceFactory, DocumentFactory,
@@ -114,6 +115,35 @@ class TestDocumentPermissions:
         )
         
         assert document.is_public is True
+    
+    def test_membership_change_invalidates_document_access(self, user):
+        """Test workspace role changes drop cached document decisions."""
+        workspace = WorkspaceFactory()
+        membership = WorkspaceMembershipFactory(
+            workspace=workspace,
+            user=user,
+            role=WorkspaceRole.MEMBER
+        )
+        document = DocumentFactory(workspace=workspace)
+        
+        assert has_document_permission(user, document, 'can_edit') is True
+        cache.set(f"perm:{user.id}:{document.id}", '1')
+        
+        membership.role = WorkspaceRole.GUEST
+        membership.save()
+        
+        assert cache.get(f"perm:{user.id}:{document.id}") is None
+        assert has_document_permission(user, document, 'can_edit') is False
+    
+    def test_workspace_role_served_from_process_memory(self, user, django_assert_num_queries):
+        """Test repeat role lookups skip both the database and the shared cache."""
+        workspace = WorkspaceFactory()
+        WorkspaceMembershipFactory(workspace=workspace, user=user, role=WorkspaceRole.MEMBER)
+        get_workspace_role(user, workspace)
+        cache.clear()
+        
+        with django_assert_num_queries(0):
+            assert get_workspace_role(user, workspace) == WorkspaceRole.MEMBER
 
 
 class TestBoardPermissions:
@@ -377,11 +377,25 @@ class TestBoardService:
         
         board1.refresh_from_db()
         board2.refresh_from_db()
-        board3.refresh_from_db()
         
+        order = list(Board.objects.filter(workspace=workspace).order_by('position'))
+        assert order == [board1, board3, board2]
         assert board1.position == 0
-        assert board3.position == 1
-        assert board2.position == 2
+        assert board2.position == 1
+    
+    def test_move_board_renumbers_exhausted_gap(self):
+        """Test siblings are respaced when no position fits between neighbours"""
+        workspace = WorkspaceFactory()
+        board1 = BoardFactory(workspace=workspace, parent=None, position=0)
+        board2 = BoardFactory(workspace=workspace, parent=None, position=0)
+        board3 = BoardFactory(workspace=workspace, parent=None, position=5)
+        
+        BoardService.move_board(board3, new_position=1)
+        
+        order = list(Board.objects.filter(workspace=workspace).order_by('position'))
+        assert order[1] == board3
+        assert {order[0], order[2]} == {board1, board2}
+        assert len({board.position for board in order}) == 3
     
     def test_move_board_to_new_parent(self):
         """Test moving board to different parent"""
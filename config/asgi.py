@@ -19,14 +19,16 @@ django_asgi_app = get_asgi_application()
 try:
     from channels.routing import ProtocolTypeRouter, URLRouter
     from channels.security.websocket import AllowedHostsOriginValidator
-    from apps.collaboration.middleware import JWTAuthMiddleware
+    from apps.collaboration.middleware import JWTAuthMiddleware, RateLimitMiddleware
     from apps.collaboration.routing import websocket_urlpatterns
 
     application = ProtocolTypeRouter({
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
             JWTAuthMiddleware(
-                URLRouter(websocket_urlpatterns)
+                RateLimitMiddleware(
+                    URLRouter(websocket_urlpatterns)
+                )
             )
         ),
     })
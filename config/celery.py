@@ -23,6 +23,18 @@ app.conf.beat_schedule = {
         'task': 'apps.collaboration.tasks.cleanup_expired_sessions',
         'schedule': crontab(minute='*/5'),  # Every 5 minutes
     },
+    'sync-presence-to-db': {
+        'task': 'apps.collaboration.tasks.sync_presence_to_db',
+        'schedule': 60.0,  # Every minute
+    },
+    'drain-activity-stream': {
+        'task': 'apps.users.tasks.drain_activity_stream',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    'snapshot-documents': {
+        'task': 'apps.collaboration.tasks.snapshot_documents',
+        'schedule': crontab(minute=15),  # Hourly
+    },
     'cleanup-old-document-versions': {
         'task': 'apps.documents.tasks.cleanup_old_versions',
         'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
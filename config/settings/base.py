@@ -186,6 +186,18 @@ SIMPLE_JWT = {
 # =============================================================================
 # Django Channels Configuration
 # =============================================================================
+# Document rooms (DocumentConsumer) use Redis Pub/Sub: a group_send is one
+# PUBLISH that every subscribed process receives, instead of one LPUSH per
+# member channel. Groups and channels are sharded across all listed hosts
+# (COLLABORATION_REDIS_URLS, comma-separated). Trade-off: Pub/Sub is
+# at-most-once - a worker that is disconnected misses messages - which is
+# acceptable because clients resync from the operation log by state vector.
+COLLABORATION_REDIS_HOSTS = [
+    url.strip()
+    for url in os.environ.get('COLLABORATION_REDIS_URLS', '').split(',')
+    if url.strip()
+] or [(os.environ.get('REDIS_HOST', 'localhost'), 6379)]
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
@@ -195,6 +207,12 @@ CHANNEL_LAYERS = {
             'expiry': 10,
         },
     },
+    'collaboration': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': COLLABORATION_REDIS_HOSTS,
+        },
+    },
 }
 
 # =============================================================================
@@ -202,6 +220,11 @@ CHANNEL_LAYERS = {
 # =============================================================================
 REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 200))
+
+# WebSocket rate limits (per user, per minute)
+WS_RATE_LIMIT_CONNECTIONS = int(os.environ.get('WS_RATE_LIMIT_CONNECTIONS', 60))
+WS_RATE_LIMIT_MESSAGES = int(os.environ.get('WS_RATE_LIMIT_MESSAGES', 3000))
 
 CACHES = {
     'default': {
@@ -212,7 +235,7 @@ CACHES = {
             'SOCKET_CONNECT_TIMEOUT': 5,
             'SOCKET_TIMEOUT': 5,
             'CONNECTION_POOL_KWARGS': {'max_connections': 50},
-            'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
+            'COMPRESSOR': 'apps.core.compressors.ZstdCompressor',
             'IGNORE_EXCEPTIONS': True,  # Graceful degradation if Redis is down
         },
         'KEY_PREFIX': 'collab_platform',
@@ -226,13 +249,17 @@ CACHES = {
         },
         'KEY_PREFIX': 'session',
     },
-    # Separate cache for API responses (shorter TTL)
+    # Separate cache for API responses (shorter TTL). Values are plain
+    # serialized payloads, so msgpack replaces pickle here; the default cache
+    # also holds model instances and sets, which msgpack can't encode.
     'api_cache': {
         'BACKEND': 'django_redis.cache.RedisCache',
         'LOCATION': f"redis://{REDIS_HOST}:{REDIS_PORT}/3",
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-            'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
+            'COMPRESSOR': 'apps.core.compressors.ZstdCompressor',
+            'SERIALIZER': 'django_redis.serializers.msgpack.MSGPackSerializer',
+            'IGNORE_EXCEPTIONS': True,
         },
         'KEY_PREFIX': 'api',
         'TIMEOUT': 60,  # 1 minute default for API cache
@@ -59,6 +59,7 @@ if REDIS_URL:
             'LOCATION': REDIS_URL,
             'OPTIONS': {
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'COMPRESSOR': 'apps.core.compressors.ZstdCompressor',
                 'IGNORE_EXCEPTIONS': True,
             },
         }
@@ -70,6 +71,16 @@ if REDIS_URL:
                 'hosts': [REDIS_URL],
             },
         },
+        'collaboration': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': [
+                    url.strip()
+                    for url in os.environ.get('COLLABORATION_REDIS_URLS', '').split(',')
+                    if url.strip()
+                ] or [REDIS_URL],
+            },
+        },
     }
     CELERY_BROKER_URL = REDIS_URL
 else:
@@ -83,6 +94,9 @@ else:
         'default': {
             'BACKEND': 'channels.layers.InMemoryChannelLayer',
         },
+        'collaboration': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
     }
 
 # Use database sessions if Redis is not available
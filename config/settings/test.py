@@ -46,7 +46,10 @@ LOGGING = {
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer'
-    }
+    },
+    'collaboration': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+    },
 }
 
 # Use in-memory cache
@@ -58,7 +61,11 @@ CACHES = {
     'sessions': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'test-sessions',
-    }
+    },
+    'api_cache': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-api-cache',
+    },
 }
 
 # Disable Celery during tests (will be overridden to eager mode in conftest)
@@ -137,8 +137,10 @@ def channel_layer():
 @pytest.fixture(autouse=True)
 def clear_cache():
     """Clear cache before each test."""
-    from django.core.cache import cache
-    cache.clear()
+    from django.core.cache import cache, caches
+    from apps.core.cache import clear_all_cache
+    clear_all_cache()
+    caches['api_cache'].clear()
     yield
     cache.clear()
 